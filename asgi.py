@@ -0,0 +1,336 @@
+# asgi.py
+"""
+Punto de entrada ASGI opcional (requirements-asgi.txt):
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 2
+
+Las lecturas de horarios y usuarios se atienden con handlers async sobre
+sqlalchemy.ext.asyncio (aiosqlite / asyncmy), así que una conexión que
+espera a la base no ocupa un hilo. Todo lo demás (escrituras, login, SSE,
+estáticos, ...) pasa sin cambios a la app Flask de main.py por WSGI, que
+sigue funcionando igual con gunicorn.
+
+Las lecturas async tienen el mismo plazo por petición (PLAZO_PETICION_MS,
+PLAZOS_POR_RUTA, X-Plazo-Ms) y comparten los cupos del control de
+admisión con las peticiones que atiende la app Flask en el proceso.
+
+Con el interruptor de la base de la institución abierto, sus peticiones
+van a la app Flask, que sabe atender desde el respaldo de solo lectura o
+responder 503. Lo mismo con los tokens de instituciones cuya base está en
+un shard (DB_SHARDS): el engine async es solo de la base principal.
+"""
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from functools import wraps
+
+import jwt
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.exc import OperationalError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from main import app as flask_app
+from config import database
+from config.database_async import SesionAsync, engine_async
+from config.compression import COMPRESION_MIN_BYTES, COMPRESION_NIVEL_GZIP
+from config.periodos import PERIODO_ACTIVO, validar_periodo
+from config.instituciones import CLAIM_INSTITUCION, INSTITUCION_POR_DEFECTO
+from config.sobrecarga import (control, plazo_de, plazo_peticion, vencido, verificar_plazo, PlazoVencido,
+                               RECHAZO_REINTENTAR_EN, CABECERAS_RECHAZO, MENSAJE_VENCIDA_EN_COLA, MENSAJE_OCUPADO)
+from controllers.parametros import leer_ids, ordenar_por_ids
+from repositories.async_repository import HorarioAsyncRepository, UserAsyncRepository
+from services.horario_service import serializar_horario
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Hilos que atienden las peticiones que pasan a la app Flask
+WSGI_HILOS = 10
+JSON_UTF8 = {'Content-Type': 'application/json; charset=utf-8'}
+
+
+def _json(datos, codigo: int = 200, **headers):
+    return JSONResponse(datos, codigo, headers=dict(JSON_UTF8, **headers))
+
+
+def _no_disponible(mensaje):
+    reintentar_en = max(1, int(database.bd.intervalo))
+    return _json({'error': mensaje}, 503, **{'Retry-After': str(reintentar_en)})
+
+
+def _rechazar(mensaje):
+    return JSONResponse({'error': mensaje, 'reintentar_en': RECHAZO_REINTENTAR_EN}, 503, headers=CABECERAS_RECHAZO)
+
+
+def _token(headers):
+    """Access token del header Authorization, o None si no viene."""
+    partes = headers.get(flask_app.config['JWT_HEADER_NAME'], '').split()
+    if len(partes) != 2 or partes[0] != flask_app.config['JWT_HEADER_TYPE']:
+        return None
+    return partes[1]
+
+
+def _identidad(request):
+    """
+    Valida el access token igual que @jwt_required() (misma clave, tipo
+    'access', expiración) y retorna (ID del usuario, institución), o la
+    respuesta de error con los mismos códigos y mensajes que la app Flask.
+    """
+    token = _token(request.headers)
+    if token is None:
+        logger.warning("Intento de acceso sin autenticación JWT.")
+        return _json({'error': 'No autenticado. Debe enviar un token JWT válido en el header Authorization.'}, 401)
+    try:
+        claims = jwt.decode(token, flask_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        return _json({'error': 'Token expirado'}, 401)
+    except jwt.InvalidTokenError as e:
+        logger.warning(f"Token inválido: {e}")
+        return _json({'error': f'Token inválido: {str(e)}'}, 422)
+    if claims.get('type') != 'access':
+        return _json({'error': 'Only non-refresh tokens are allowed'}, 422)
+    identidad = claims.get('sub')
+    return (int(identidad) if isinstance(identidad, str) else identidad,
+            claims.get(CLAIM_INSTITUCION, INSTITUCION_POR_DEFECTO))
+
+
+def _en_principal(institucion):
+    try:
+        return database.enrutador.base(institucion) is database.bd
+    except Exception:
+        # Institución desconocida o shard sin configurar: el error lo responde la app Flask
+        return False
+
+
+class PasarAFlask:
+    """Respuesta que entrega la petición sin cambios a la app Flask."""
+    async def __call__(self, scope, receive, send):
+        await wsgi(scope, receive, send)
+
+
+def lectura(endpoint: str):
+    """
+    Autentica la petición y ejecuta `handler(request, db, user_id)` con una
+    AsyncSession, con el plazo y el control de admisión de init_sobrecarga
+    (`endpoint` es el de la ruta equivalente en la app Flask, para
+    PLAZOS_POR_RUTA). Si la base no responde en DB_TIMEOUT_SENTENCIA
+    segundos se responde 503 y la falla cuenta para el interruptor, como en
+    la app Flask; si lo que se agotó es el plazo de la petición, no cuenta.
+    """
+    def decorador(handler):
+        @wraps(handler)
+        async def envoltura(request):
+            identidad = _identidad(request)
+            if isinstance(identidad, JSONResponse):
+                return identidad
+            user_id, institucion = identidad
+            if not _en_principal(institucion):
+                # La app Flask aplica su propio plazo y control de admisión
+                return PasarAFlask()
+
+            plazo = plazo_de(endpoint, request.headers)
+            if plazo is not None and time.monotonic() >= plazo:
+                control.contar_vencida()
+                return _rechazar(MENSAJE_VENCIDA_EN_COLA)
+            if control.activo and not await control.entrar_async(plazo):
+                logger.warning(f"Petición descartada por sobrecarga: {request.method} {request.url.path} "
+                               f"({control.atendiendo} en curso, {control.esperando} en cola)")
+                return _rechazar(MENSAJE_OCUPADO)
+            token = plazo_peticion.set(plazo)
+            try:
+                return await _atender(handler, request, user_id, plazo)
+            finally:
+                plazo_peticion.reset(token)
+                if control.activo:
+                    control.salir()
+        return envoltura
+    return decorador
+
+
+async def _atender(handler, request, user_id, plazo):
+    limite = database.TIEMPO_LIMITE or None
+    if plazo is not None:
+        limite = min(limite or float('inf'), plazo - time.monotonic())
+    try:
+        async with asyncio.timeout(limite):
+            async with SesionAsync() as db:
+                return await handler(request, db, user_id)
+    except PlazoVencido as e:
+        control.contar_vencida()
+        logger.warning(f"Petición abandonada por plazo vencido ({e.paso}): {request.method} {request.url.path}")
+        return _rechazar(str(e))
+    except TimeoutError:
+        if vencido():
+            control.contar_vencida()
+            logger.warning(f"Petición abandonada por plazo vencido (consulta a la base de datos): "
+                           f"{request.method} {request.url.path}")
+            return _rechazar(str(PlazoVencido('consulta a la base de datos')))
+        database.bd.interruptor.registrar_fallo()
+        logger.error(f"La base no respondió a tiempo en {request.method} {request.url.path}")
+        return _no_disponible("La base de datos no respondió a tiempo")
+    except OperationalError as e:
+        logger.error(f"Error de base de datos en {request.method} {request.url.path}: {str(e.orig)}")
+        return _no_disponible("La base de datos no respondió a tiempo")
+
+
+def _periodo_consultado(request):
+    """Periodo de `?periodo=` (por defecto, el activo). Lanza ValueError si no es válido."""
+    return validar_periodo(request.query_params.get('periodo') or PERIODO_ACTIVO)
+
+
+def _email_usuario(h, email):
+    return email or ('Usuario eliminado' if h.user_id else 'Sin asignar')
+
+# ---------------------------------------------------------------------
+# GET /api/horarios (también ?ids= y ?periodo=)
+# ---------------------------------------------------------------------
+@lectura('horario_bp.get_horarios')
+async def get_horarios(request, db, user_id):
+    repository = HorarioAsyncRepository(db)
+    if 'ids' in request.query_params:
+        try:
+            ids = leer_ids(request.query_params['ids'])
+        except ValueError as e:
+            return _json({'error': str(e)}, 400)
+        filas, faltantes = ordenar_por_ids(ids, await repository.get_horarios_by_ids(ids), clave=lambda fila: fila[0].id)
+        return _json({
+            'horarios': [dict(serializar_horario(h), usuario=_email_usuario(h, email)) for h, email in filas],
+            'faltantes': faltantes
+        })
+    try:
+        periodo = _periodo_consultado(request)
+    except ValueError as e:
+        return _json({'error': str(e)}, 400)
+    # La versión se lee antes del listado: lo que cambie después llegará en el próximo delta
+    version = await repository.get_version_actual()
+    verificar_plazo('listado de horarios')
+    filas = await repository.get_all_horarios(periodo)
+    verificar_plazo('serialización del listado')
+    return _json([dict(serializar_horario(h), usuario=_email_usuario(h, email)) for h, email in filas],
+                 **{'X-Horarios-Version': str(version), 'X-Periodo-Activo': PERIODO_ACTIVO})
+
+# ---------------------------------------------------------------------
+# GET /api/horarios/<id>
+# ---------------------------------------------------------------------
+@lectura('horario_bp.get_horario')
+async def get_horario(request, db, user_id):
+    horario_id = request.path_params['horario_id']
+    horario = await HorarioAsyncRepository(db).get_horario_by_id(horario_id)
+    if horario is None:
+        logger.warning(f"Horario no encontrado: {horario_id}")
+        return _json({'error': 'Horario no encontrado'}, 404)
+    datos = serializar_horario(horario)
+    return _json({campo: datos[campo] for campo in ('id', 'materia', 'docente', 'dia', 'hora_inicio', 'hora_fin', 'salon')})
+
+# ---------------------------------------------------------------------
+# GET /api/mis-horarios
+# ---------------------------------------------------------------------
+@lectura('horario_bp.get_mis_horarios')
+async def get_mis_horarios(request, db, user_id):
+    try:
+        periodo = _periodo_consultado(request)
+    except ValueError as e:
+        return _json({'error': str(e)}, 400)
+    horarios = await HorarioAsyncRepository(db).get_horarios_by_user(user_id, periodo)
+    verificar_plazo('serialización del listado')
+    return _json([{campo: valor for campo, valor in serializar_horario(h).items() if campo != 'version'}
+                  for h in horarios])
+
+# ---------------------------------------------------------------------
+# GET /api/users (también ?ids=) y /api/users/<id>
+# ---------------------------------------------------------------------
+def _usuario(u):
+    return {'id': u.id, 'email': u.email, 'role': u.role}
+
+
+@lectura('users.list_users')
+async def list_users(request, db, user_id):
+    repository = UserAsyncRepository(db)
+    if 'ids' in request.query_params:
+        try:
+            ids = leer_ids(request.query_params['ids'])
+        except ValueError as e:
+            return _json({'error': str(e)}, 400)
+        users, faltantes = ordenar_por_ids(ids, await repository.get_users_by_ids(ids))
+        return _json({'usuarios': [_usuario(u) for u in users], 'faltantes': faltantes})
+    users = await repository.get_all_users()
+    verificar_plazo('serialización del listado')
+    return _json([_usuario(u) for u in users])
+
+
+@lectura('users.get_user')
+async def get_user(request, db, user_id):
+    user = await UserAsyncRepository(db).get_user_by_id(request.path_params['user_id'])
+    if user is None:
+        return _json({'error': 'Usuario no encontrado'}, 404)
+    return _json(_usuario(user))
+
+
+def _base_de(request):
+    """
+    Base de la institución de la petición, como institucion_actual() en la
+    app Flask: la del token (sin exigirlo; eso lo hace la ruta), la de
+    X-Institucion o ?institucion=, o la por defecto.
+    """
+    if not database.enrutador.activo:
+        return database.bd
+    institucion = None
+    token = _token(request.headers)
+    if token is not None:
+        try:
+            claims = jwt.decode(token, flask_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
+            institucion = claims.get(CLAIM_INSTITUCION, INSTITUCION_POR_DEFECTO)
+        except jwt.InvalidTokenError:
+            pass
+    if institucion is None:
+        institucion = (request.headers.get('X-Institucion') or request.query_params.get('institucion')
+                       or INSTITUCION_POR_DEFECTO)
+    try:
+        return database.enrutador.base(institucion)
+    except Exception:
+        # Institución desconocida o shard sin configurar: el error lo responde la app Flask
+        return database.bd
+
+
+class ModoDegradado:
+    """
+    Con el interruptor de la base de la institución abierto, la petición va
+    a la app Flask (respaldo de solo lectura o 503).
+    """
+    def __init__(self, asincrona, wsgi):
+        self.asincrona = asincrona
+        self.wsgi = wsgi
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and _base_de(Request(scope)).interruptor.abierto:
+            await self.wsgi(scope, receive, send)
+        else:
+            await self.asincrona(scope, receive, send)
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    yield
+    await engine_async.dispose()
+
+
+wsgi = WSGIMiddleware(flask_app, workers=WSGI_HILOS)
+comprimir = [Middleware(GZipMiddleware, minimum_size=COMPRESION_MIN_BYTES, compresslevel=COMPRESION_NIVEL_GZIP)]
+
+asincrona = Starlette(routes=[
+    Route('/api/horarios', get_horarios, methods=['GET'], middleware=comprimir),
+    Route('/api/horarios/{horario_id:int}', get_horario, methods=['GET'], middleware=comprimir),
+    Route('/api/mis-horarios', get_mis_horarios, methods=['GET'], middleware=comprimir),
+    Route('/api/users', list_users, methods=['GET'], middleware=comprimir),
+    Route('/api/users/{user_id:int}', get_user, methods=['GET'], middleware=comprimir),
+    # El resto de la API y los estáticos los atiende la app Flask
+    Mount('/', app=wsgi),
+], lifespan=ciclo_de_vida)
+
+app = ModoDegradado(asincrona, wsgi)
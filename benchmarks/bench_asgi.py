@@ -0,0 +1,212 @@
+# benchmarks/bench_asgi.py
+"""
+Compara el modo síncrono (gunicorn + main:app) con el modo ASGI (uvicorn +
+asgi:app) atendiendo lecturas con muchas conexiones keep-alive abiertas a la
+vez: peticiones por segundo, latencia, errores y memoria (RSS del servidor y
+sus workers, en reposo y máxima durante la carga).
+
+Uso:
+    python benchmarks/bench_asgi.py [--conexiones 1000] [--segundos 15] [--workers 1] [--hilos 100]
+                                    [--ruta /api/horarios/1] [--modos wsgi,asgi]
+
+Requiere requirements-asgi.txt. Los servidores escuchan en 127.0.0.1 con
+una base SQLite temporal; `--hilos` es el --threads de gunicorn.
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+import statistics
+from collections import Counter
+
+argumentos = argparse.ArgumentParser(description=__doc__)
+argumentos.add_argument('--conexiones', type=int, default=1000)
+argumentos.add_argument('--segundos', type=float, default=15)
+argumentos.add_argument('--workers', type=int, default=1, help='procesos del servidor en ambos modos')
+argumentos.add_argument('--hilos', type=int, default=100, help='hilos por worker de gunicorn')
+argumentos.add_argument('--horarios', type=int, default=500)
+argumentos.add_argument('--ruta', default='/api/horarios/1')
+argumentos.add_argument('--modos', default='wsgi,asgi')
+opciones = argumentos.parse_args()
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Base de datos temporal y configuración antes de importar la app; los servidores heredan el entorno
+os.environ["MYSQL_URI"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["ESQUEMA_AUTO_MIGRAR"] = "1"
+os.environ.setdefault("PERIODO_ACTIVO", "2026-2")
+os.environ["RATE_LIMIT_ACTIVO"] = "0"
+os.environ["DB_ECHO"] = "0"
+os.environ.setdefault("JWT_SECRET_KEY", os.urandom(32).hex())
+sys.path.insert(0, RAIZ)
+
+import logging
+logging.disable(logging.WARNING)
+
+from datetime import time as hora
+from sqlalchemy import insert
+from flask_jwt_extended import create_access_token
+from main import app
+from config.database import SessionLocal
+from models.horario_model import Horario
+from models.user_model import User
+
+SERVIDORES = {
+    'wsgi': lambda puerto: [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{puerto}', '--workers',
+                            str(opciones.workers), '--threads', str(opciones.hilos),
+                            '--worker-connections', str(opciones.conexiones * 2), 'main:app'],
+    'asgi': lambda puerto: [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(puerto),
+                            '--workers', str(opciones.workers), '--no-access-log',
+                            '--limit-concurrency', str(opciones.conexiones * 2), '--backlog', str(opciones.conexiones * 2)],
+}
+
+
+def sembrar():
+    db = SessionLocal()
+    db.execute(insert(User), [{'email': 'lector@bench.local', 'password': 'x', 'role': 'admin'}])
+    dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes']
+    db.execute(insert(Horario), [
+        {'materia': f'Materia {i}', 'docente': f'Docente {i % 20}', 'dia': dias[i % 5], 'hora_inicio': hora(8, 0),
+         'hora_fin': hora(10, 0), 'salon': f'S{i % 30}', 'user_id': 1, 'version': 0}
+        for i in range(opciones.horarios)
+    ])
+    db.commit()
+    db.close()
+    with app.app_context():
+        return create_access_token(identity='1')
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    """RSS del proceso y de sus hijos directos (los workers), en MB."""
+    total = 0
+    for entrada in os.listdir('/proc'):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entrada}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            if int(entrada) != pid and ppid != pid:
+                continue
+            with open(f'/proc/{entrada}/status') as f:
+                total += next(int(linea.split()[1]) for linea in f if linea.startswith('VmRSS'))
+        except (OSError, StopIteration, ValueError):
+            continue
+    return total / 1024
+
+
+def esperar_servidor(puerto, proceso, limite=30):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al iniciar (código {proceso.returncode})")
+        try:
+            with socket.create_connection(('127.0.0.1', puerto), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+async def conexion(puerto, peticion, fin, tiempos, codigos):
+    """Una conexión keep-alive que repite la petición hasta `fin` (reconecta si el servidor la cierra)."""
+    lector = escritor = None
+    while time.monotonic() < fin:
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            inicio = time.perf_counter()
+            escritor.write(peticion)
+            estado = await lector.readline()
+            if not estado:
+                raise ConnectionError('conexión cerrada')
+            largo, cerrar = 0, False
+            while (linea := await lector.readline()) not in (b'\r\n', b''):
+                nombre, _, valor = linea.decode('latin-1').partition(':')
+                nombre = nombre.lower()
+                if nombre == 'content-length':
+                    largo = int(valor)
+                elif nombre == 'connection' and valor.strip().lower() == 'close':
+                    cerrar = True
+            await lector.readexactly(largo)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            codigos[int(estado.split()[1])] += 1
+            if cerrar:
+                escritor.close()
+                escritor = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+            codigos['error'] += 1
+            if escritor is not None:
+                escritor.close()
+            escritor = None
+            await asyncio.sleep(0.05)
+    if escritor is not None:
+        escritor.close()
+
+
+async def cargar(puerto, token):
+    peticion = (f'GET {opciones.ruta} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n'
+                f'Connection: keep-alive\r\n\r\n').encode()
+    tiempos, codigos = [], Counter()
+    fin = time.monotonic() + opciones.segundos
+    await asyncio.gather(*(conexion(puerto, peticion, fin, tiempos, codigos) for _ in range(opciones.conexiones)))
+    return tiempos, codigos
+
+
+def medir(modo, token):
+    puerto = puerto_libre()
+    proceso = subprocess.Popen(SERVIDORES[modo](puerto), cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_servidor(puerto, proceso)
+        time.sleep(1)
+        reposo = rss_mb(proceso.pid)
+        maximo, detener = [reposo], threading.Event()
+
+        def muestrear():
+            while not detener.wait(0.25):
+                maximo.append(rss_mb(proceso.pid))
+
+        muestreo = threading.Thread(target=muestrear, daemon=True)
+        muestreo.start()
+        inicio = time.perf_counter()
+        tiempos, codigos = asyncio.run(cargar(puerto, token))
+        duracion = time.perf_counter() - inicio
+        detener.set()
+        muestreo.join()
+    finally:
+        proceso.terminate()
+        proceso.wait(10)
+
+    tiempos.sort()
+    p99 = tiempos[int(len(tiempos) * 0.99) - 1] if tiempos else 0
+    ok = codigos.get(200, 0)
+    otros = ' '.join(f'{codigo}x{total}' for codigo, total in codigos.items() if codigo != 200) or '-'
+    print(f"{modo:6} {ok / duracion:>9.0f} {statistics.median(tiempos) if tiempos else 0:>9.1f} {p99:>9.1f} "
+          f"{reposo:>10.1f} {max(maximo):>10.1f}  {otros}")
+
+
+def main():
+    # Una conexión por descriptor, más los del proceso
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(duro, max(blando, opciones.conexiones * 2 + 256)), duro))
+    token = sembrar()
+    print(f"{opciones.conexiones} conexiones, {opciones.segundos:.0f} s, GET {opciones.ruta}, "
+          f"{opciones.workers} worker(s), {opciones.horarios} horarios")
+    print(f"{'modo':6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RSS rep.':>10} {'RSS máx':>10}  otros")
+    for modo in opciones.modos.split(','):
+        medir(modo, token)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_busqueda.py
+"""
+Compara la latencia de GET /api/horarios/buscar (índice FTS5) contra un
+filtro LIKE '%texto%' equivalente sobre 100.000 horarios.
+
+Uso:
+    python benchmarks/bench_busqueda.py [--filas 100000] [--repeticiones 50]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from datetime import time as hora
+
+# Base de datos temporal para no tocar la local
+os.environ["MYSQL_URI"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["ESQUEMA_AUTO_MIGRAR"] = "1"
+os.environ.setdefault("PERIODO_ACTIVO", "2026-2")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+logging.disable(logging.INFO)
+
+from sqlalchemy import insert
+from main import app
+from config.database import engine, SessionLocal
+from models.horario_model import Horario
+from repositories.busqueda_repository import BusquedaRepository, reconstruir_indice_busqueda, terminos_busqueda
+
+engine.echo = False
+
+CONSULTAS = ['mate', 'jose', 'perez calc', 'lab 1', 'quimica organica']
+MATERIAS = ['Matemáticas', 'Cálculo', 'Física', 'Química Orgánica', 'Biología', 'Programación', 'Economía']
+DOCENTES = ['José Pérez', 'Ana Gómez', 'María Núñez', 'Luis Ramírez', 'Sofía Peña']
+
+
+def sembrar(filas: int):
+    db = SessionLocal()
+    dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+    db.execute(insert(Horario), [
+        {
+            'materia': f'{MATERIAS[i % len(MATERIAS)]} {i % 97}',
+            'docente': f'{DOCENTES[i % len(DOCENTES)]} {i % 311}',
+            'dia': dias[i % len(dias)],
+            'hora_inicio': hora(7 + i % 10, 0),
+            'hora_fin': hora(9 + i % 10, 0),
+            'salon': f'Lab {i % 80}' if i % 3 else f'Aula {i % 120}',
+            'user_id': None,
+            'version': 0,
+        }
+        for i in range(filas)
+    ])
+    db.commit()
+    db.close()
+    # La inserción masiva no pasa por el repositorio: se reconstruye el índice
+    with engine.begin() as conn:
+        reconstruir_indice_busqueda(conn)
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), max(tiempos)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__)
+    argumentos.add_argument('--filas', type=int, default=100000)
+    argumentos.add_argument('--repeticiones', type=int, default=50)
+    opciones = argumentos.parse_args()
+
+    sembrar(opciones.filas)
+    cliente = app.test_client()
+    cliente.post('/api/registry', json={'email': 'bench@test.com', 'password': 'bench', 'role': 'admin'})
+    token = cliente.post('/api/login', json={'email': 'bench@test.com', 'password': 'bench'}).get_json()['access_token']
+    auth = {'Authorization': f'Bearer {token}'}
+
+    db = SessionLocal()
+    busqueda = BusquedaRepository(db)
+    print(f"Búsqueda sobre {opciones.filas} horarios ({opciones.repeticiones} repeticiones)")
+    print(f"{'consulta':20} {'resultados':>10} {'FTS ms':>10} {'LIKE ms':>10} {'endpoint ms':>12}")
+    for consulta in CONSULTAS:
+        terminos = terminos_busqueda(consulta)
+        resultados = len(busqueda.buscar(consulta, 50))
+        fts, _ = medir(lambda: busqueda.buscar(consulta, 50), opciones.repeticiones)
+        like, _ = medir(lambda: busqueda._consulta_like(terminos).limit(50).all(), opciones.repeticiones)
+        endpoint, _ = medir(lambda: cliente.get(f'/api/horarios/buscar?q={consulta}', headers=auth), opciones.repeticiones)
+        print(f"{consulta:20} {resultados:>10} {fts:>10.2f} {like:>10.2f} {endpoint:>12.2f}")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
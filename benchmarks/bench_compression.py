@@ -0,0 +1,89 @@
+# benchmarks/bench_compression.py
+"""
+Compara bytes transferidos y latencia de GET /api/horarios con 10.000 filas
+sin compresión, con gzip y con brotli (si está instalado).
+
+Uso:
+    python benchmarks/bench_compression.py [--filas 10000] [--repeticiones 20]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from datetime import time as hora
+
+# Base de datos temporal para no tocar la local
+os.environ["MYSQL_URI"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["ESQUEMA_AUTO_MIGRAR"] = "1"
+os.environ.setdefault("PERIODO_ACTIVO", "2026-2")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+logging.disable(logging.INFO)
+
+from sqlalchemy import insert
+from main import app
+from config.database import engine, SessionLocal
+from config.compression import brotli
+from models.horario_model import Horario
+
+engine.echo = False
+
+
+def sembrar(filas: int):
+    db = SessionLocal()
+    dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+    db.execute(insert(Horario), [
+        {
+            'materia': f'Materia {i % 120}',
+            'docente': f'Docente {i % 300}',
+            'dia': dias[i % len(dias)],
+            'hora_inicio': hora(7 + i % 10, 0),
+            'hora_fin': hora(9 + i % 10, 0),
+            'salon': f'S{i % 80:03d}',
+            'user_id': None,
+            'version': 0,
+        }
+        for i in range(filas)
+    ])
+    db.commit()
+    db.close()
+
+
+def medir(cliente, headers, repeticiones):
+    tiempos, tamano = [], 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        respuesta = cliente.get('/api/horarios', headers=headers)
+        tamano = len(respuesta.data)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tamano, statistics.median(tiempos), max(tiempos)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__)
+    argumentos.add_argument('--filas', type=int, default=10000)
+    argumentos.add_argument('--repeticiones', type=int, default=20)
+    opciones = argumentos.parse_args()
+
+    sembrar(opciones.filas)
+    cliente = app.test_client()
+    cliente.post('/api/registry', json={'email': 'bench@test.com', 'password': 'bench', 'role': 'admin'})
+    token = cliente.post('/api/login', json={'email': 'bench@test.com', 'password': 'bench'}).get_json()['access_token']
+    auth = {'Authorization': f'Bearer {token}'}
+
+    variantes = [('identity', {}), ('gzip', {'Accept-Encoding': 'gzip'})]
+    if brotli is not None:
+        variantes.append(('br', {'Accept-Encoding': 'br'}))
+
+    print(f"GET /api/horarios con {opciones.filas} filas ({opciones.repeticiones} repeticiones)")
+    print(f"{'encoding':10} {'bytes':>12} {'mediana ms':>12} {'máx ms':>10}")
+    for nombre, headers in variantes:
+        tamano, mediana, maximo = medir(cliente, {**auth, **headers}, opciones.repeticiones)
+        print(f"{nombre:10} {tamano:>12} {mediana:>12.1f} {maximo:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_failover.py
+"""
+Prueba de caída de la base principal con un sustituto local (BaseSimulada):
+mide la latencia y los códigos de GET /api/horarios y POST /api/horarios
+mientras la base responde, se cuelga, rechaza conexiones y se recupera.
+
+Uso:
+    python benchmarks/bench_failover.py [--peticiones 20] [--timeout 0.5] [--sin-respaldo]
+
+Sin respaldo las lecturas reciben 503 mientras el interruptor está abierto.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from collections import Counter
+
+argumentos = argparse.ArgumentParser(description=__doc__)
+argumentos.add_argument('--peticiones', type=int, default=20, help='lecturas por fase')
+argumentos.add_argument('--timeout', type=float, default=0.5, help='límite por sentencia y de conexión (s)')
+argumentos.add_argument('--sin-respaldo', action='store_true')
+opciones = argumentos.parse_args()
+
+# Base de datos temporal y configuración antes de importar la app
+directorio = tempfile.mkdtemp()
+os.environ["MYSQL_URI"] = f"sqlite:///{directorio}/principal.db"
+os.environ["ESQUEMA_AUTO_MIGRAR"] = "1"
+os.environ.setdefault("PERIODO_ACTIVO", "2026-2")
+os.environ["RATE_LIMIT_ACTIVO"] = "0"
+os.environ["DB_REINTENTO"] = "1"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+logging.disable(logging.CRITICAL)
+
+from main import app
+from config import database
+from config.salud_bd import BaseSimulada, BaseDatosMonitoreada, crear_engine_respaldo
+from commands.respaldo_command import generar_respaldo
+
+database.engine.echo = False
+HORARIO = {'materia': 'Cálculo', 'docente': 'Pérez', 'dia': 'Lunes', 'hora_inicio': '08:00',
+           'hora_fin': '10:00', 'salon': 'A1'}
+
+
+def preparar(cliente):
+    cliente.post('/api/registry', json={'email': 'admin@bench.local', 'password': 'bench', 'role': 'admin'})
+    token = cliente.post('/api/login', json={'email': 'admin@bench.local', 'password': 'bench'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    for _ in range(50):
+        cliente.post('/api/horarios', headers=headers, json=HORARIO)
+    return headers
+
+
+def fase(cliente, headers, nombre):
+    tiempos, codigos, solo_lectura = [], Counter(), 0
+    for _ in range(opciones.peticiones):
+        inicio = time.perf_counter()
+        respuesta = cliente.get('/api/horarios', headers=headers)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        codigos[respuesta.status_code] += 1
+        solo_lectura += respuesta.headers.get('X-Solo-Lectura') == '1'
+    inicio = time.perf_counter()
+    escritura = cliente.post('/api/horarios', headers=headers, json=HORARIO).status_code
+    ms_escritura = (time.perf_counter() - inicio) * 1000
+    salud = cliente.get('/api/salud').get_json()['estado']
+    codigos_texto = ' '.join(f'{codigo}x{total}' for codigo, total in sorted(codigos.items()))
+    print(f"{nombre:12} {codigos_texto:16} {solo_lectura:>6} {statistics.median(tiempos):>8.1f} {max(tiempos):>8.1f} "
+          f"{escritura:>6} {ms_escritura:>8.1f}  {salud}")
+
+
+def main():
+    cliente = app.test_client()
+    headers = preparar(cliente)
+
+    # La app pasa a usar el sustituto sobre el mismo archivo (y el respaldo, si corresponde)
+    respaldo = None
+    if not opciones.sin_respaldo:
+        ruta_respaldo = os.path.join(directorio, 'respaldo.db')
+        generar_respaldo(database.engine, ruta_respaldo)
+        respaldo = crear_engine_respaldo(ruta_respaldo)
+    simulada = BaseSimulada(database.engine.url.database, timeout_conexion=opciones.timeout)
+    database.bd = BaseDatosMonitoreada(simulada.engine(), respaldo, tiempo_limite=opciones.timeout, intervalo=1)
+
+    print(f"Límite por sentencia {opciones.timeout} s, respaldo {'no' if respaldo is None else 'sí'}, "
+          f"{opciones.peticiones} lecturas por fase")
+    print(f"{'fase':12} {'códigos':16} {'ro':>6} {'p50 ms':>8} {'máx ms':>8} {'POST':>6} {'POST ms':>8}  salud")
+    fase(cliente, headers, 'normal')
+    simulada.modo = 'colgada'
+    fase(cliente, headers, 'colgada')
+    simulada.modo = 'rechaza'
+    fase(cliente, headers, 'rechaza')
+    simulada.modo = 'normal'
+    # El monitor hace ping cada segundo; se espera a que cierre el interruptor
+    limite = time.monotonic() + 5
+    while database.bd.interruptor.abierto and time.monotonic() < limite:
+        time.sleep(0.1)
+    fase(cliente, headers, 'recuperada')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_login_flood.py
+"""
+Prueba de carga: mide la latencia de GET /api/horarios antes y durante una
+avalancha de logins con contraseña incorrecta (bcrypt en cada intento),
+simulando muchas IPs con X-Forwarded-For.
+
+Uso:
+    python benchmarks/bench_login_flood.py [--hilos 16] [--segundos 10] [--sin-limites]
+
+Con --sin-limites se desactiva el control de admisión para comparar.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+import urllib.request
+import urllib.error
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as hora
+
+argumentos = argparse.ArgumentParser(description=__doc__)
+argumentos.add_argument('--hilos', type=int, default=16, help='hilos enviando logins')
+argumentos.add_argument('--segundos', type=float, default=10)
+argumentos.add_argument('--usuarios', type=int, default=200)
+argumentos.add_argument('--sin-limites', action='store_true')
+opciones = argumentos.parse_args()
+
+# Base de datos temporal y configuración antes de importar la app
+os.environ["MYSQL_URI"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["ESQUEMA_AUTO_MIGRAR"] = "1"
+os.environ.setdefault("PERIODO_ACTIVO", "2026-2")
+os.environ["RATE_LIMIT_CONFIAR_PROXY"] = "1"
+if opciones.sin_limites:
+    os.environ["RATE_LIMIT_ACTIVO"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+logging.disable(logging.WARNING)
+
+import bcrypt
+from sqlalchemy import insert
+from werkzeug.serving import make_server
+from main import app
+from config.database import engine, SessionLocal
+from models.horario_model import Horario
+from models.user_model import User
+
+engine.echo = False
+
+
+def sembrar():
+    db = SessionLocal()
+    # Un solo hash para todos: sembrar no debe costar un bcrypt por usuario
+    clave = bcrypt.hashpw(b'correcta', bcrypt.gensalt()).decode('utf-8')
+    db.execute(insert(User), [
+        {'email': f'victima{i}@test.com', 'password': clave, 'role': 'user'} for i in range(opciones.usuarios)
+    ] + [{'email': 'lector@test.com', 'password': clave, 'role': 'admin'}])
+    dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes']
+    db.execute(insert(Horario), [
+        {'materia': f'Materia {i}', 'docente': f'Docente {i % 20}', 'dia': dias[i % 5],
+         'hora_inicio': hora(8, 0), 'hora_fin': hora(10, 0), 'salon': f'S{i % 30}', 'version': 0}
+        for i in range(200)
+    ])
+    db.commit()
+    db.close()
+
+
+def peticion(url, metodo='GET', cuerpo=None, headers=None):
+    datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else None
+    req = urllib.request.Request(url, data=datos, method=metodo, headers={'Content-Type': 'application/json', **(headers or {})})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as respuesta:
+            return respuesta.status, respuesta.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def medir_lecturas(base, token, segundos):
+    tiempos = []
+    fin = time.monotonic() + segundos
+    while time.monotonic() < fin:
+        inicio = time.perf_counter()
+        peticion(f'{base}/api/horarios', headers={'Authorization': f'Bearer {token}'})
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def inundar(base, detener, estados):
+    while not detener.is_set():
+        ip = f'10.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}'
+        estado, _ = peticion(f'{base}/api/login', 'POST',
+                             {'email': f'victima{random.randrange(opciones.usuarios)}@test.com', 'password': 'incorrecta'},
+                             {'X-Forwarded-For': ip})
+        estados[estado] += 1
+
+
+def resumen(nombre, tiempos):
+    tiempos = sorted(tiempos)
+    p95 = tiempos[int(len(tiempos) * 0.95) - 1] if tiempos else 0
+    print(f"{nombre:22} {len(tiempos):>8} {statistics.median(tiempos):>10.1f} {p95:>10.1f} {tiempos[-1]:>10.1f}")
+
+
+def main():
+    sembrar()
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{servidor.server_port}'
+    _, cuerpo = peticion(f'{base}/api/login', 'POST', {'email': 'lector@test.com', 'password': 'correcta'})
+    token = json.loads(cuerpo)['access_token']
+
+    print(f"Control de admisión: {'desactivado' if opciones.sin_limites else 'activo'}, "
+          f"{opciones.hilos} hilos de login, {opciones.segundos:.0f} s por fase")
+    print(f"{'fase':22} {'lecturas':>8} {'p50 ms':>10} {'p95 ms':>10} {'máx ms':>10}")
+    resumen('sin carga', medir_lecturas(base, token, opciones.segundos))
+
+    detener, estados = threading.Event(), Counter()
+    with ThreadPoolExecutor(max_workers=opciones.hilos) as pool:
+        for _ in range(opciones.hilos):
+            pool.submit(inundar, base, detener, estados)
+        resumen('durante avalancha', medir_lecturas(base, token, opciones.segundos))
+        detener.set()
+    servidor.shutdown()
+    print("Respuestas a los logins: " + ', '.join(f'{estado}={total}' for estado, total in sorted(estados.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+# benchmarks/bench_sobrecarga.py
+"""
+Prueba de saturación: muchos clientes piden GET /api/horarios a gunicorn con
+más carga de la que puede atender y abandonan la petición si no reciben
+respuesta en `--espera-cliente` segundos (y envían ese plazo en X-Plazo-Ms).
+Compara el servidor sin plazos ni control de admisión con el servidor con
+ambos: respuestas útiles por segundo, 503, abandonos y CPU del servidor por
+respuesta útil (el trabajo que se desperdicia en respuestas que nadie lee).
+
+Uso:
+    python benchmarks/bench_sobrecarga.py [--clientes 200] [--segundos 15] [--hilos 32]
+                                          [--espera-cliente 1] [--horarios 1000]
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+import statistics
+from collections import Counter
+
+argumentos = argparse.ArgumentParser(description=__doc__)
+argumentos.add_argument('--clientes', type=int, default=200)
+argumentos.add_argument('--segundos', type=float, default=15)
+argumentos.add_argument('--hilos', type=int, default=32, help='--threads de gunicorn')
+argumentos.add_argument('--espera-cliente', type=float, default=1.0, help='segundos que espera cada cliente')
+argumentos.add_argument('--horarios', type=int, default=1000)
+opciones = argumentos.parse_args()
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["MYSQL_URI"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["ESQUEMA_AUTO_MIGRAR"] = "1"
+os.environ.setdefault("PERIODO_ACTIVO", "2026-2")
+os.environ["RATE_LIMIT_ACTIVO"] = "0"
+os.environ["DB_ECHO"] = "0"
+os.environ.setdefault("JWT_SECRET_KEY", os.urandom(32).hex())
+sys.path.insert(0, RAIZ)
+
+import logging
+logging.disable(logging.WARNING)
+
+from datetime import time as hora
+from sqlalchemy import insert
+from flask_jwt_extended import create_access_token
+from main import app
+from config.database import SessionLocal
+from models.horario_model import Horario
+from models.user_model import User
+
+# Entorno del servidor en cada modo
+MODOS = {
+    'sin control': {'PLAZO_PETICION_MS': '0', 'SOBRECARGA_EN_CURSO': '0'},
+    'con control': {'PLAZO_PETICION_MS': str(int(opciones.espera_cliente * 1000))},
+}
+
+
+def sembrar():
+    db = SessionLocal()
+    db.execute(insert(User), [{'email': 'lector@bench.local', 'password': 'x', 'role': 'admin'}])
+    dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes']
+    db.execute(insert(Horario), [
+        {'materia': f'Materia {i}', 'docente': f'Docente {i % 20}', 'dia': dias[i % 5], 'hora_inicio': hora(8, 0),
+         'hora_fin': hora(10, 0), 'salon': f'S{i % 30}', 'user_id': 1, 'version': 0}
+        for i in range(opciones.horarios)
+    ])
+    db.commit()
+    db.close()
+    with app.app_context():
+        return create_access_token(identity='1')
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def cpu_segundos(pid):
+    """CPU (usuario + sistema) del proceso y de sus hijos directos, en segundos."""
+    total = 0
+    for entrada in os.listdir('/proc'):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entrada}/stat') as f:
+                campos = f.read().rsplit(')', 1)[1].split()
+            if int(entrada) == pid or int(campos[1]) == pid:
+                total += int(campos[11]) + int(campos[12])
+        except (OSError, ValueError, IndexError):
+            continue
+    return total / os.sysconf('SC_CLK_TCK')
+
+
+def esperar_servidor(puerto, proceso, limite=30):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al iniciar (código {proceso.returncode})")
+        try:
+            with socket.create_connection(('127.0.0.1', puerto), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+async def pedir(puerto, peticion):
+    lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+    try:
+        escritor.write(peticion)
+        estado = await lector.readline()
+        largo = 0
+        while (linea := await lector.readline()) not in (b'\r\n', b''):
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            if nombre.lower() == 'content-length':
+                largo = int(valor)
+        await lector.readexactly(largo)
+        return int(estado.split()[1])
+    finally:
+        escritor.close()
+
+
+async def cliente(puerto, peticion, fin, tiempos, codigos):
+    """Repite la petición hasta `fin`; la abandona (cierra la conexión) si no llega a tiempo."""
+    while time.monotonic() < fin:
+        inicio = time.perf_counter()
+        try:
+            codigo = await asyncio.wait_for(pedir(puerto, peticion), opciones.espera_cliente)
+        except asyncio.TimeoutError:
+            codigos['abandonada'] += 1
+            continue
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            codigos['error'] += 1
+            await asyncio.sleep(0.05)
+            continue
+        codigos[codigo] += 1
+        if codigo == 200:
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        else:
+            # Un 503 trae Retry-After: el cliente no reintenta en el acto
+            await asyncio.sleep(0.2)
+
+
+async def cargar(puerto, token):
+    peticion = (f'GET /api/horarios HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n'
+                f'X-Plazo-Ms: {int(opciones.espera_cliente * 1000)}\r\nConnection: close\r\n\r\n').encode()
+    tiempos, codigos = [], Counter()
+    fin = time.monotonic() + opciones.segundos
+    await asyncio.gather(*(cliente(puerto, peticion, fin, tiempos, codigos) for _ in range(opciones.clientes)))
+    return tiempos, codigos
+
+
+def medir(modo, token):
+    puerto = puerto_libre()
+    entorno = dict(os.environ, **MODOS[modo])
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{puerto}', '--workers', '1',
+         '--threads', str(opciones.hilos), '--backlog', str(opciones.clientes * 2), 'main:app'],
+        cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_servidor(puerto, proceso)
+        time.sleep(1)
+        cpu_inicial = cpu_segundos(proceso.pid)
+        inicio = time.perf_counter()
+        tiempos, codigos = asyncio.run(cargar(puerto, token))
+        duracion = time.perf_counter() - inicio
+        # El servidor sigue trabajando en lo que los clientes abandonaron
+        time.sleep(opciones.espera_cliente * 2)
+        cpu = cpu_segundos(proceso.pid) - cpu_inicial
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(10)
+        except subprocess.TimeoutExpired:
+            # Saturado, gunicorn espera a terminar lo pendiente antes de salir
+            proceso.kill()
+            proceso.wait()
+
+    utiles = codigos.get(200, 0)
+    p50 = statistics.median(tiempos) if tiempos else 0
+    print(f"{modo:12} {utiles / duracion:>8.1f} {p50:>8.0f} {codigos.get(503, 0):>7} {codigos.get('abandonada', 0):>11} "
+          f"{cpu * 1000 / utiles if utiles else float('inf'):>14.1f}")
+
+
+def main():
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(duro, max(blando, opciones.clientes * 2 + 256)), duro))
+    token = sembrar()
+    print(f"{opciones.clientes} clientes, {opciones.segundos:.0f} s, {opciones.hilos} hilos, "
+          f"{opciones.horarios} horarios, los clientes esperan {opciones.espera_cliente:g} s")
+    print(f"{'modo':12} {'útiles/s':>8} {'p50 ms':>8} {'503':>7} {'abandonadas':>11} {'CPU ms/útil':>14}")
+    for modo in MODOS:
+        medir(modo, token)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+from commands.static_command import build_static
+from commands.seed_command import seed
+from commands.db_command import db
+from commands.periodos_command import periodos
+from commands.respaldo_command import respaldo
+from commands.usuarios_command import usuarios
+from commands.instituciones_command import instituciones
+
+
+def register_commands(app):
+    """Registra los comandos de `flask <comando>` en la aplicación."""
+    app.cli.add_command(build_static)
+    app.cli.add_command(seed)
+    app.cli.add_command(db)
+    app.cli.add_command(periodos)
+    app.cli.add_command(respaldo)
+    app.cli.add_command(usuarios)
+    app.cli.add_command(instituciones)
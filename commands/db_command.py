@@ -0,0 +1,76 @@
+# commands/db_command.py
+import sys
+import click
+from alembic import command
+
+from config.migraciones import configuracion_alembic, revisiones_pendientes
+from commands.planes_command import planes
+
+
+def ejecutando_comando_db():
+    """
+    True mientras la CLI de Flask carga la app para un `flask db ...`: esos
+    comandos son los que migran, así que no se verifica el esquema. La app se
+    importa antes de que click resuelva el subcomando, por eso se mira sys.argv.
+    """
+    if click.get_current_context(silent=True) is None:
+        return False
+    return 'db' in sys.argv[1:]
+
+
+@click.group('db')
+def db():
+    """Migraciones del esquema (Alembic)."""
+
+
+@db.command('upgrade')
+@click.argument('revision', default='heads')
+@click.option('--sql', is_flag=True, help='Solo imprime el SQL (para revisarlo o aplicarlo a mano)')
+def upgrade(revision, sql):
+    """Aplica las migraciones hasta REVISION (por defecto, la última)."""
+    command.upgrade(configuracion_alembic(), revision, sql=sql)
+
+
+@db.command('downgrade')
+@click.argument('revision')
+@click.option('--sql', is_flag=True, help='Solo imprime el SQL')
+def downgrade(revision, sql):
+    """Revierte las migraciones hasta REVISION (por ejemplo -1 o 0001)."""
+    command.downgrade(configuracion_alembic(), revision, sql=sql)
+
+
+@db.command('estado')
+def estado():
+    """Muestra la revisión actual y las pendientes; termina con código 1 si hay pendientes."""
+    from config.database import engine
+    config = configuracion_alembic()
+    command.current(config)
+    pendientes = revisiones_pendientes(engine)
+    if pendientes:
+        click.echo(f"Migraciones pendientes: {', '.join(pendientes)}")
+        sys.exit(1)
+    click.echo("El esquema está al día.")
+
+
+@db.command('revision')
+@click.option('-m', '--mensaje', required=True, help='Descripción de la revisión')
+@click.option('--autogenerate', is_flag=True, help='Compara los modelos con la base de datos')
+def revision(mensaje, autogenerate):
+    """Crea una nueva revisión en migrations/versions."""
+    command.revision(configuracion_alembic(), message=mensaje, autogenerate=autogenerate)
+
+
+@db.command('stamp')
+@click.argument('revision')
+def stamp(revision):
+    """Marca la base de datos en REVISION sin ejecutar migraciones."""
+    command.stamp(configuracion_alembic(), revision)
+
+
+@db.command('historial')
+def historial():
+    """Lista las revisiones disponibles."""
+    command.history(configuracion_alembic())
+
+
+db.add_command(planes)
@@ -0,0 +1,244 @@
+# commands/instituciones_command.py
+import os
+import time
+import functools
+import click
+from sqlalchemy import create_engine, select, insert, delete, func
+
+# Tablas que no se copian al mover una institución: el catálogo solo vive en la base principal
+TABLAS_SIN_COPIA = ('instituciones',)
+# Tablas a las que las migraciones les insertan filas: no indican que el destino tenga datos
+TABLAS_SEMBRADAS = ('contador_versiones',)
+
+
+def opcion_institucion(funcion):
+    """Agrega --institucion a un comando: sus sesiones (sesion_de()) y eventos son de esa institución."""
+    @click.option('--institucion', default=None, help='Institución sobre la que se trabaja (por defecto, '
+                                                      'INSTITUCION_POR_DEFECTO)')
+    @functools.wraps(funcion)
+    def envoltura(*args, institucion=None, **kwargs):
+        from config.instituciones import usar_institucion
+        with usar_institucion(institucion):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+def _engine_en(shard: str, institucion: str):
+    """Engine propio (sin tiempo límite por sentencia) de la base de la institución en `shard`."""
+    from config.database import engine_sin_limite, enrutador
+    from config.instituciones import SHARD_PRINCIPAL
+
+    if shard == SHARD_PRINCIPAL:
+        return engine_sin_limite()
+    url = enrutador.url(shard, institucion)
+    destino = create_engine(url)
+    if destino.dialect.name == 'sqlite' and destino.url.database:
+        # SQLite crea el archivo pero no su carpeta
+        os.makedirs(os.path.dirname(os.path.abspath(destino.url.database)), exist_ok=True)
+    return destino
+
+
+def _preparar_base(destino):
+    """Aplica las migraciones (esquema e índice de búsqueda) en la base de una institución."""
+    from config.migraciones import migrar
+
+    with destino.connect() as conn:
+        migrar(conexion=conn)
+
+
+def _tablas():
+    from models.db import Base
+    return [tabla for tabla in Base.metadata.sorted_tables if tabla.name not in TABLAS_SIN_COPIA]
+
+
+def _contar(engine):
+    with engine.connect() as conn:
+        return {tabla.name: conn.execute(select(func.count()).select_from(tabla)).scalar() for tabla in _tablas()}
+
+
+def copiar_institucion(origen, destino, lote: int = 5000):
+    """
+    Copia todas las tablas de la institución de `origen` a `destino` (ya
+    migrada), en orden de llaves foráneas y conservando IDs y versiones, y
+    reconstruye el índice de búsqueda. La lectura es una sola transacción y
+    la escritura otra: si algo falla, el destino queda como estaba. Retorna
+    {tabla: filas}.
+    """
+    from repositories.busqueda_repository import reconstruir_indice_busqueda
+
+    tablas = _tablas()
+    filas = {}
+    with origen.connect() as lectura, lectura.begin(), destino.begin() as escritura:
+        for tabla in reversed(tablas):
+            escritura.execute(delete(tabla))
+        for tabla in tablas:
+            filas[tabla.name] = 0
+            resultado = lectura.execution_options(stream_results=True).execute(select(tabla))
+            for parte in resultado.mappings().partitions(lote):
+                escritura.execute(insert(tabla), [dict(fila) for fila in parte])
+                filas[tabla.name] += len(parte)
+        reconstruir_indice_busqueda(escritura)
+    return filas
+
+
+@click.group('instituciones')
+def instituciones():
+    """Instituciones (facultades) y los shards donde vive la base de cada una."""
+
+
+@instituciones.command('listar')
+def listar():
+    """Catálogo de instituciones y shards configurados."""
+    from config.database import SessionLocal, enrutador
+    from config.instituciones import INSTITUCION_POR_DEFECTO, SHARD_PRINCIPAL
+    from repositories.institucion_repository import InstitucionRepository
+
+    db = SessionLocal()
+    try:
+        catalogo = {nombre: (shard, estado) for nombre, shard, estado in InstitucionRepository(db).listar()}
+    finally:
+        db.close()
+    catalogo.setdefault(INSTITUCION_POR_DEFECTO, (SHARD_PRINCIPAL, 'activa'))
+    click.echo(f"Shards: {', '.join(enrutador.shards) or '(ninguno: DB_SHARDS vacío)'}")
+    click.echo(f"{'institución':20} {'shard':15} estado")
+    for nombre, (shard, estado) in sorted(catalogo.items()):
+        marca = '  (por defecto)' if nombre == INSTITUCION_POR_DEFECTO else ''
+        click.echo(f"{nombre:20} {shard:15} {estado}{marca}")
+
+
+@instituciones.command('crear')
+@click.argument('nombre')
+@click.option('--shard', required=True, help='Shard de DB_SHARDS donde se crea la base')
+def crear(nombre, shard):
+    """Registra una institución nueva y crea su base (migrada y vacía) en SHARD."""
+    from config.database import SessionLocal, enrutador
+    from config.instituciones import NOMBRE_VALIDO, INSTITUCION_POR_DEFECTO
+    from repositories.institucion_repository import InstitucionRepository
+
+    if not NOMBRE_VALIDO.match(nombre):
+        raise click.BadParameter("solo minúsculas, dígitos y '_' (máximo 40)", param_hint='NOMBRE')
+    if nombre == INSTITUCION_POR_DEFECTO:
+        raise click.ClickException(f"'{nombre}' es la institución por defecto; para llevarla a un shard usa `mover`")
+    if shard not in enrutador.shards:
+        raise click.BadParameter(f"no está en DB_SHARDS ({', '.join(enrutador.shards) or 'vacío'})", param_hint='--shard')
+
+    db = SessionLocal()
+    try:
+        repository = InstitucionRepository(db)
+        if repository.obtener(nombre) is not None:
+            raise click.ClickException(f"La institución '{nombre}' ya existe")
+        destino = _engine_en(shard, nombre)
+        try:
+            _preparar_base(destino)
+        finally:
+            destino.dispose()
+        repository.crear(nombre, shard)
+    finally:
+        db.close()
+    click.echo(f"Institución '{nombre}' creada en el shard '{shard}' ({enrutador.url(shard, nombre)})")
+
+
+@instituciones.command('migrar')
+def migrar_instituciones():
+    """Aplica las migraciones pendientes a la base de cada institución que vive en un shard."""
+    from config.database import SessionLocal, enrutador
+    from config.instituciones import SHARD_PRINCIPAL
+    from config.migraciones import revisiones_pendientes
+    from repositories.institucion_repository import InstitucionRepository
+
+    db = SessionLocal()
+    try:
+        catalogo = InstitucionRepository(db).listar()
+    finally:
+        db.close()
+    for nombre, shard, _ in catalogo:
+        if shard == SHARD_PRINCIPAL:
+            continue  # La base principal la migra `flask db upgrade`
+        destino = _engine_en(shard, nombre)
+        try:
+            pendientes = revisiones_pendientes(destino)
+            if pendientes:
+                _preparar_base(destino)
+            click.echo(f"{nombre} ({shard}): {', '.join(pendientes) if pendientes else 'al día'}")
+        finally:
+            destino.dispose()
+
+
+@instituciones.command('mover')
+@click.argument('nombre')
+@click.argument('destino')
+@click.option('--lote', default=5000, show_default=True, help='Filas por INSERT al copiar')
+@click.option('--espera', default=None, type=float,
+              help='Segundos entre bloquear las escrituras y copiar (por defecto, caché del catálogo + plazo por petición)')
+@click.option('--reemplazar', is_flag=True, help='Borra los datos que ya tenga la base de destino')
+def mover(nombre, destino, lote, espera, reemplazar):
+    """
+    Mueve la institución NOMBRE al shard DESTINO: bloquea sus escrituras
+    (las lecturas siguen desde el shard actual), espera a que todos los
+    workers lo vean, copia sus tablas, verifica las filas y cambia el
+    catálogo. La base de origen se conserva para borrarla a mano.
+    """
+    from config.database import SessionLocal, enrutador
+    from config.instituciones import INSTITUCION_POR_DEFECTO, SHARD_PRINCIPAL, INSTITUCIONES_CACHE_SEGUNDOS
+    from config.sobrecarga import PLAZO_PETICION_MS
+    from repositories.institucion_repository import InstitucionRepository
+
+    if destino != SHARD_PRINCIPAL and destino not in enrutador.shards:
+        raise click.BadParameter(f"no está en DB_SHARDS ({', '.join(enrutador.shards) or 'vacío'})", param_hint='DESTINO')
+    if destino == SHARD_PRINCIPAL and nombre != INSTITUCION_POR_DEFECTO:
+        raise click.ClickException("La base principal solo aloja a la institución por defecto")
+
+    db = SessionLocal()
+    repository = InstitucionRepository(db)
+    try:
+        institucion = repository.obtener(nombre)
+        if institucion is None:
+            if nombre != INSTITUCION_POR_DEFECTO:
+                raise click.ClickException(f"La institución '{nombre}' no existe")
+            # La institución por defecto entra al catálogo la primera vez que se mueve
+            repository.crear(nombre, SHARD_PRINCIPAL)
+            institucion = repository.obtener(nombre)
+        origen = institucion.shard
+        if origen == destino:
+            raise click.ClickException(f"La institución '{nombre}' ya está en el shard '{destino}'")
+        if institucion.estado == 'moviendo' and not reemplazar:
+            raise click.ClickException(f"La institución '{nombre}' ya se está moviendo (un movimiento anterior "
+                                       f"falló a medias: repítelo con --reemplazar)")
+
+        motor_origen, motor_destino = _engine_en(origen, nombre), _engine_en(destino, nombre)
+        try:
+            _preparar_base(motor_destino)
+            ocupadas = [tabla for tabla, filas in _contar(motor_destino).items() if filas and tabla not in TABLAS_SEMBRADAS]
+            if ocupadas and not reemplazar:
+                raise click.ClickException(f"La base de destino ya tiene datos ({', '.join(ocupadas)}); "
+                                           f"usa --reemplazar para sobrescribirlos")
+
+            repository.actualizar(nombre, estado='moviendo')
+            if espera is None:
+                espera = INSTITUCIONES_CACHE_SEGUNDOS + PLAZO_PETICION_MS / 1000
+            click.echo(f"Escrituras de '{nombre}' bloqueadas; esperando {espera:g} s a que todos los workers lo vean...")
+            time.sleep(espera)
+
+            inicio = time.perf_counter()
+            try:
+                filas = copiar_institucion(motor_origen, motor_destino, lote)
+                copiadas = _contar(motor_destino)
+                distintas = [tabla for tabla, total in filas.items() if copiadas.get(tabla) != total]
+                if distintas:
+                    raise click.ClickException(f"La copia no coincide en: {', '.join(distintas)}")
+            except Exception:
+                # El origen sigue intacto: se desbloquean las escrituras allí
+                repository.actualizar(nombre, estado='activa')
+                raise
+            repository.actualizar(nombre, shard=destino, estado='activa')
+        finally:
+            for motor in (motor_origen, motor_destino):
+                motor.dispose()
+    finally:
+        db.close()
+
+    resumen = ', '.join(f"{tabla}: {total}" for tabla, total in filas.items() if total)
+    click.echo(f"Institución '{nombre}' movida de '{origen}' a '{destino}' en {time.perf_counter() - inicio:.1f} s "
+               f"({resumen or 'sin filas'})")
+    click.echo(f"Los workers la atienden desde '{destino}' en menos de {INSTITUCIONES_CACHE_SEGUNDOS:g} s. "
+               f"La base de origen no se borró.")
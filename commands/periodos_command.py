@@ -0,0 +1,77 @@
+# commands/periodos_command.py
+import os
+import time
+import click
+from sqlalchemy import create_engine
+from commands.instituciones_command import opcion_institucion
+
+
+@click.group('periodos')
+def periodos():
+    """Periodos académicos: resumen y archivo de periodos pasados."""
+
+
+@periodos.command('listar')
+@opcion_institucion
+def listar():
+    """Horarios vigentes y archivados por periodo."""
+    from config.database import sesion_de
+    from config.periodos import PERIODO_ACTIVO
+    from repositories.periodo_repository import PeriodoRepository
+
+    db = sesion_de(tiempo_limite=0)
+    try:
+        resumen = PeriodoRepository(db).resumen()
+    finally:
+        db.close()
+    click.echo(f"{'periodo':12} {'horarios':>10} {'archivados':>11}")
+    for periodo, (vigentes, archivados) in resumen.items():
+        marca = '  (activo)' if periodo == PERIODO_ACTIVO else ''
+        click.echo(f"{periodo:12} {vigentes:>10} {archivados:>11}{marca}")
+
+
+@periodos.command('archivar')
+@click.argument('periodo')
+@click.option('--archivo', type=click.Path(dir_okay=False), default=None,
+              help='Archivo SQLite de destino (por defecto, la tabla horarios_historicos de la misma base)')
+@click.option('--lote', default=5000, show_default=True, help='Horarios movidos por transacción')
+@opcion_institucion
+def archivar(periodo, archivo, lote):
+    """
+    Mueve los horarios de PERIODO fuera de la tabla de horarios. Se hace por
+    lotes para no bloquear la tabla mientras la app sigue atendiendo.
+    """
+    from config.database import sesion_de
+    from config.periodos import PERIODO_ACTIVO, validar_periodo
+    from models.horario_model import HorarioHistorico
+    from repositories.periodo_repository import PeriodoRepository
+
+    try:
+        validar_periodo(periodo)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='PERIODO')
+    if periodo == PERIODO_ACTIVO:
+        raise click.ClickException(f"{periodo} es el periodo activo; solo se archivan periodos pasados")
+
+    destino = None
+    if archivo:
+        destino = create_engine(f"sqlite:///{os.path.abspath(archivo)}")
+        HorarioHistorico.__table__.create(destino, checkfirst=True)
+
+    inicio = time.perf_counter()
+    total = 0
+    db = sesion_de(tiempo_limite=0)
+    try:
+        repository = PeriodoRepository(db)
+        while True:
+            movidos = repository.archivar_lote(periodo, lote, destino)
+            if not movidos:
+                break
+            total += movidos
+            click.echo(f"  {total} horarios archivados...")
+    finally:
+        db.close()
+        if destino is not None:
+            destino.dispose()
+    lugar = archivo or 'horarios_historicos'
+    click.echo(f"Periodo {periodo}: {total} horarios archivados en {lugar} ({time.perf_counter() - inicio:.1f} s)")
@@ -0,0 +1,312 @@
+# commands/planes_command.py
+"""
+Verificación de planes de consulta: ejecuta cada consulta de
+HorarioRepository, PeriodoRepository, AuditoriaRepository,
+InstitucionRepository, UserRepository y UserService sobre una base SQLite
+temporal sembrada, captura su EXPLAIN QUERY PLAN y falla si alguna hace
+SCAN sobre una tabla grande sin estar en ESCANEOS_PERMITIDOS.
+
+La base tiene el periodo activo, uno histórico del mismo tamaño y un evento
+de auditoría por horario.
+
+    flask --app main db planes [--horarios 20000] [--usuarios 2000] [--detalle]
+"""
+import os
+import re
+import shutil
+import tempfile
+import click
+from sqlalchemy import create_engine, event, select, func, text, insert, literal
+from sqlalchemy.orm import sessionmaker
+
+# Escaneos intencionales: (consulta, tabla) -> motivo. Agregar aquí solo lo que
+# deba leer la tabla completa por diseño, nunca para silenciar un índice faltante.
+ESCANEOS_PERMITIDOS = {
+    ('AuditoriaRepository.listar', 'auditoria'): 'Recorre la llave primaria hacia atrás y se detiene en el LIMIT de la página',
+    ('PeriodoRepository.resumen', 'horarios'): 'Conteo por periodo de `flask periodos listar` (recorre solo el índice)',
+    ('UserRepository.get_all_users', 'users'): 'Listado completo de usuarios del panel de administración',
+    ('UserService.listar_usuarios', 'users'): 'Listado completo de usuarios (GET /api/users)',
+}
+# Una tabla se considera grande desde este número de filas en la base sembrada
+UMBRAL_FILAS = 1000
+# Periodo pasado que se siembra junto al activo, para que el historial pese en los planes
+PERIODO_HISTORICO = '2000-1'
+
+_ESCANEO = re.compile(r'^SCAN (\w+)(?: AS (\w+))?(.*)$')
+_SENTENCIAS = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'WITH')
+
+
+def _eliminar_usuario(db, user_id, politica=None, reasignar_a=None):
+    """
+    Caso de UserService.eliminar_usuario. Confirma la eliminación, así que
+    cada política usa un usuario propio con horarios: sin horarios que
+    afectar no se ejecutaría la sentencia de la política.
+    """
+    from services.user_service import UserService
+
+    user, afectados = UserService(db).eliminar_usuario(user_id, politica, reasignar_a)
+    if user is None or not afectados:
+        raise click.ClickException(f"eliminar_usuario({politica or 'por defecto'}) no afectó horarios del usuario "
+                                   f"{user_id}: revisa la muestra de la base sembrada")
+
+
+def _casos(muestra):
+    """
+    Consultas a revisar: (nombre, función que recibe la sesión). `muestra`
+    trae IDs y valores reales de la base sembrada.
+    """
+    from models.horario_model import Horario
+    from repositories.horario_repository import HorarioRepository
+    from repositories.user_repository import UserRepository
+    from repositories.periodo_repository import PeriodoRepository
+    from repositories.auditoria_repository import AuditoriaRepository
+    from repositories.institucion_repository import InstitucionRepository
+    from services.user_service import UserService
+    from repositories import async_repository as consultas_async
+
+    h, u = muestra['horario_id'], muestra['user_id']
+    propietarios = muestra['propietarios']
+    return [
+        ('HorarioRepository.get_version_actual', lambda db: HorarioRepository(db).get_version_actual()),
+        ('HorarioRepository.get_cambios_desde', lambda db: HorarioRepository(db).get_cambios_desde(muestra['version'])),
+        ('HorarioRepository.get_all_horarios', lambda db: HorarioRepository(db).get_all_horarios()),
+        ('HorarioRepository.get_horario_by_id', lambda db: HorarioRepository(db).get_horario_by_id(h)),
+        ('HorarioRepository.get_horarios_by_ids', lambda db: HorarioRepository(db).get_horarios_by_ids(muestra['horario_ids'])),
+        ('HorarioRepository.get_horarios_by_user', lambda db: HorarioRepository(db).get_horarios_by_user(u)),
+        ('HorarioRepository.buscar_horarios', lambda db: HorarioRepository(db).buscar_horarios('calc', 50)),
+        ('HorarioRepository.buscar_horarios(user_id)', lambda db: HorarioRepository(db).buscar_horarios('calc', 50, u)),
+        ('HorarioRepository.create_horario', lambda db: HorarioRepository(db).create_horario(
+            'Plan de consultas', 'Docente Plan', 'Lunes', '08:00', '10:00', 'A101', u)),
+        ('HorarioRepository.update_horario', lambda db: HorarioRepository(db).update_horario(h, salon='A102')),
+        ('HorarioRepository.patch_horario', lambda db: HorarioRepository(db).patch_horario(h, {'materia': 'Plan'}, u)),
+        ('HorarioRepository.bulk_update_horarios(ids)', lambda db: HorarioRepository(db).bulk_update_horarios(
+            {'salon': 'A103'}, ids=muestra['horario_ids'])),
+        ('HorarioRepository.bulk_update_horarios(user_id)', lambda db: HorarioRepository(db).bulk_update_horarios(
+            {'docente': 'Docente Plan'}, filtros={'user_id': u})),
+        ('HorarioRepository.bulk_delete_horarios(salon)', lambda db: HorarioRepository(db).bulk_delete_horarios(
+            filtros={'salon': muestra['salon']})),
+        ('HorarioRepository.delete_horario', lambda db: HorarioRepository(db).delete_horario(h)),
+        ('HorarioRepository.aplicar_politica_usuario(desasignar)', lambda db: HorarioRepository(db).aplicar_politica_usuario(
+            Horario.user_id == u, 'desasignar')),
+        ('HorarioRepository.aplicar_politica_usuario(eliminar)', lambda db: HorarioRepository(db).aplicar_politica_usuario(
+            Horario.user_id == u, 'eliminar')),
+        ('HorarioRepository.aplicar_politica_usuario(huerfanos)', lambda db: HorarioRepository(db).aplicar_politica_usuario(
+            HorarioRepository.condicion_huerfanos(), 'desasignar')),
+        ('HorarioRepository.contar_huerfanos', lambda db: HorarioRepository(db).contar_huerfanos()),
+
+        ('PeriodoRepository.resumen', lambda db: PeriodoRepository(db).resumen()),
+        ('PeriodoRepository.archivar_lote', lambda db: PeriodoRepository(db).archivar_lote(PERIODO_HISTORICO, 100)),
+
+        ('AuditoriaRepository.listar', lambda db: AuditoriaRepository(db).listar(50)),
+        ('AuditoriaRepository.listar(entidad)', lambda db: AuditoriaRepository(db).listar(
+            50, muestra['auditoria_id'], 'horario', h)),
+        ('AuditoriaRepository.listar(actor_id)', lambda db: AuditoriaRepository(db).listar(
+            50, muestra['auditoria_id'], actor_id=u)),
+
+        ('InstitucionRepository.listar', lambda db: InstitucionRepository(db).listar()),
+        ('InstitucionRepository.obtener', lambda db: InstitucionRepository(db).obtener('planes')),
+
+        # Sentencias del modo ASGI (las mismas que ejecuta AsyncSession)
+        ('async_repository.consulta_horarios_con_email', lambda db: db.execute(
+            consultas_async.consulta_horarios_con_email()).all()),
+        ('async_repository.consulta_horarios_por_ids', lambda db: db.execute(
+            consultas_async.consulta_horarios_por_ids(muestra['horario_ids'])).all()),
+        ('async_repository.consulta_horarios_de_usuario', lambda db: db.scalars(
+            consultas_async.consulta_horarios_de_usuario(u)).all()),
+
+        ('UserRepository.get_all_users', lambda db: UserRepository(db).get_all_users()),
+        ('UserRepository.get_user_by_id', lambda db: UserRepository(db).get_user_by_id(u)),
+        ('UserRepository.get_users_by_ids', lambda db: UserRepository(db).get_users_by_ids(muestra['user_ids'])),
+        ('UserRepository.get_user_by_email', lambda db: UserRepository(db).get_user_by_email(muestra['email'])),
+        ('UserRepository.count_admins', lambda db: UserRepository(db).count_admins()),
+        ('UserRepository.authenticate', lambda db: UserRepository(db).authenticate(muestra['email'], 'incorrecta')),
+        ('UserRepository.create_user', lambda db: UserRepository(db).create_user('plan.repo@planes.local', 'plan')),
+        ('UserRepository.update_user', lambda db: UserRepository(db).update_user(u, role='user')),
+        ('UserRepository.delete_user', lambda db: UserRepository(db).delete_user(muestra['user_ids'][1])),
+        ('UserRepository.get_emails_existentes',
+         lambda db: UserRepository(db).get_emails_existentes([muestra['email'], 'plan.lote@planes.local'])),
+        ('UserRepository.insert_users_lote', lambda db: UserRepository(db).insert_users_lote(
+            [{'email': 'plan.lote@planes.local', 'password': 'plan', 'role': 'user'}])),
+
+        ('UserService.crear_usuario', lambda db: UserService(db).crear_usuario('plan.servicio@planes.local', 'plan')),
+        ('UserService.autenticar_usuario', lambda db: UserService(db).autenticar_usuario(muestra['email'], 'incorrecta')),
+        ('UserService.listar_usuarios', lambda db: UserService(db).listar_usuarios()),
+        ('UserService.contar_admins', lambda db: UserService(db).contar_admins()),
+        ('UserService.obtener_usuario_por_id', lambda db: UserService(db).obtener_usuario_por_id(u)),
+        ('UserService.obtener_usuarios_por_ids', lambda db: UserService(db).obtener_usuarios_por_ids(muestra['user_ids'])),
+        ('UserService.actualizar_usuario', lambda db: UserService(db).actualizar_usuario(
+            u, email=muestra['email'], role='admin')),
+        ('UserService.actualizar_usuario_parcial', lambda db: UserService(db).actualizar_usuario_parcial(
+            u, {'email': muestra['email'], 'role': 'user'})),
+        ('UserService.eliminar_usuario', lambda db: _eliminar_usuario(db, propietarios[0])),
+        ('UserService.eliminar_usuario(eliminar)', lambda db: _eliminar_usuario(db, propietarios[1], 'eliminar')),
+        ('UserService.eliminar_usuario(reasignar)', lambda db: _eliminar_usuario(db, propietarios[2], 'reasignar', u)),
+    ]
+
+
+def _muestra(conn):
+    """Valores reales de la base sembrada para parametrizar las consultas."""
+    from models.horario_model import Horario
+    from models.user_model import User
+    from models.auditoria_model import EventoAuditoria
+
+    user_ids = list(conn.execute(select(User.id).order_by(User.id).limit(3)).scalars())
+    # Usuarios con horarios que los casos de eliminar_usuario borran (uno por política)
+    propietarios = list(conn.execute(
+        select(Horario.user_id).where(Horario.user_id.is_not(None), Horario.user_id.not_in(user_ids))
+        .group_by(Horario.user_id).order_by(Horario.user_id).limit(3)
+    ).scalars())
+    horario_id, user_id = conn.execute(
+        select(Horario.id, Horario.user_id).where(Horario.user_id == user_ids[0]).order_by(Horario.id).limit(1)
+    ).first()
+    return {
+        'user_id': user_id,
+        'user_ids': user_ids,
+        'propietarios': propietarios,
+        'email': conn.execute(select(User.email).where(User.id == user_id)).scalar(),
+        'horario_id': horario_id,
+        'horario_ids': list(conn.execute(select(Horario.id).order_by(Horario.id.desc()).limit(20)).scalars()),
+        'salon': conn.execute(select(Horario.salon).order_by(Horario.id.desc()).limit(1)).scalar(),
+        'version': conn.execute(select(func.max(Horario.version))).scalar() - 1,
+        'auditoria_id': conn.execute(select(func.max(EventoAuditoria.id))).scalar(),
+    }
+
+
+def _sembrar_auditoria(engine):
+    """Un evento 'crear' por horario sembrado, con un solo INSERT ... SELECT."""
+    from datetime import datetime
+    from models.auditoria_model import EventoAuditoria
+    from models.horario_model import Horario
+
+    with engine.begin() as conn:
+        conn.execute(insert(EventoAuditoria).from_select(
+            ['ocurrido_en', 'actor_id', 'accion', 'entidad', 'entidad_id'],
+            select(literal(datetime.utcnow()), Horario.user_id, literal('crear'), literal('horario'), Horario.id)
+        ))
+
+
+def _filas_por_tabla(conn):
+    tablas = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE '%VIRTUAL%'"
+    )).scalars().all()
+    return {tabla: conn.execute(text(f'SELECT COUNT(*) FROM "{tabla}"')).scalar() for tabla in tablas}
+
+
+def escaneos(detalles, alias):
+    """Tablas recorridas completas según las líneas de EXPLAIN QUERY PLAN (índices de recorrido incluidos)."""
+    tablas = []
+    for detalle in detalles:
+        coincidencia = _ESCANEO.match(detalle)
+        if not coincidencia or 'VIRTUAL TABLE' in coincidencia.group(3):
+            continue
+        nombre = coincidencia.group(1)
+        tablas.append(alias.get(nombre, nombre))
+    return tablas
+
+
+def _alias(sentencia):
+    """Alias de tabla de la sentencia (`FROM horarios AS horarios_1`) -> nombre real."""
+    return {a: t for t, a in re.findall(r'\b(?:FROM|JOIN) (\w+) AS (\w+)\b', sentencia)}
+
+
+def explicar(conn, sentencia, parametros):
+    filas = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sentencia}', parametros).fetchall()
+    return [fila[-1] for fila in filas]
+
+
+def revisar_planes(engine, umbral=UMBRAL_FILAS, permitidos=ESCANEOS_PERMITIDOS, informar=None):
+    """
+    Ejecuta los casos y retorna (consultas revisadas, violaciones, permisos
+    sin usar). Cada violación es (consulta, tabla, sentencia, plan).
+    """
+    informar = informar or (lambda *args: None)
+    with engine.connect() as conn:
+        filas = _filas_por_tabla(conn)
+        muestra = _muestra(conn)
+    grandes = {tabla for tabla, total in filas.items() if total >= umbral}
+
+    capturadas = []
+
+    def capturar(conn, cursor, sentencia, parametros, contexto, executemany):
+        if not executemany and sentencia.lstrip().upper().startswith(_SENTENCIAS):
+            capturadas.append((sentencia, parametros))
+
+    Sesion = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    casos = _casos(muestra)
+    violaciones, usados = [], set()
+    event.listen(engine, 'before_cursor_execute', capturar)
+    try:
+        for nombre, funcion in casos:
+            del capturadas[:]
+            db = Sesion()
+            try:
+                funcion(db)
+            finally:
+                db.close()
+            sentencias = list(capturadas)
+            with engine.connect() as conn:
+                for sentencia, parametros in sentencias:
+                    plan = explicar(conn, sentencia, parametros)
+                    problemas = []
+                    for tabla in escaneos(plan, _alias(sentencia)):
+                        if tabla not in grandes:
+                            continue
+                        if (nombre, tabla) in permitidos:
+                            usados.add((nombre, tabla))
+                        else:
+                            problemas.append(tabla)
+                    violaciones.extend((nombre, tabla, sentencia, plan) for tabla in problemas)
+                    informar(nombre, sentencia, plan, problemas)
+    finally:
+        event.remove(engine, 'before_cursor_execute', capturar)
+    return len(casos), violaciones, [clave for clave in permitidos if clave not in usados]
+
+
+def _una_linea(sentencia):
+    return ' '.join(sentencia.split())
+
+
+@click.command('planes')
+@click.option('--horarios', default=20000, show_default=True, help='Horarios a sembrar en la base temporal')
+@click.option('--usuarios', default=2000, show_default=True, help='Usuarios a sembrar en la base temporal')
+@click.option('--umbral', default=UMBRAL_FILAS, show_default=True, help='Filas desde las que una tabla es grande')
+@click.option('--detalle', is_flag=True, help='Imprime el plan de todas las sentencias')
+def planes(horarios, usuarios, umbral, detalle):
+    """Falla (código 1) si una consulta de los repositorios recorre completa una tabla grande."""
+    import logging
+    from config.migraciones import migrar
+    from commands.seed_command import sembrar
+
+    directorio = tempfile.mkdtemp(prefix='planes-')
+    engine = create_engine(f"sqlite:///{os.path.join(directorio, 'planes.db')}")
+    # Los repositorios registran cada llamada en INFO; aquí solo interesa el resultado
+    nivel = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        with engine.connect() as conn:
+            migrar(conexion=conn)
+        sembrar(engine, usuarios, horarios, semilla=7, lote=20000, password='planes')
+        sembrar(engine, usuarios, horarios, semilla=8, lote=20000, password='planes', periodo=PERIODO_HISTORICO)
+        _sembrar_auditoria(engine)
+
+        def informar(nombre, sentencia, plan, problemas):
+            if detalle or problemas:
+                marca = 'SCAN' if problemas else 'ok'
+                click.echo(f"[{marca}] {nombre}: {_una_linea(sentencia)}")
+                for linea in plan:
+                    click.echo(f"        {linea}")
+
+        revisadas, violaciones, sin_usar = revisar_planes(engine, umbral, informar=informar)
+    finally:
+        logging.getLogger().setLevel(nivel)
+        engine.dispose()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    for consulta, tabla in sin_usar:
+        click.echo(f"Aviso: el permiso de escaneo ({consulta}, {tabla}) ya no se usa; quítalo de ESCANEOS_PERMITIDOS")
+    if violaciones:
+        click.echo(f"{len(violaciones)} consultas recorren completa una tabla grande:", err=True)
+        for consulta, tabla, _, _ in violaciones:
+            click.echo(f"  {consulta}: SCAN {tabla}", err=True)
+        raise SystemExit(1)
+    click.echo(f"Planes de consulta correctos ({revisadas} consultas revisadas).")
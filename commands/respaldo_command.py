@@ -0,0 +1,64 @@
+# commands/respaldo_command.py
+import os
+import time
+import click
+from sqlalchemy import create_engine, select, insert, delete
+
+# Tablas que necesitan las lecturas en modo solo lectura (login, listados, búsqueda, cambios)
+TABLAS_RESPALDO = ('users', 'horarios', 'contador_versiones', 'horarios_eliminados')
+
+
+def generar_respaldo(origen, destino: str, lote: int = 5000):
+    """
+    Copia las tablas de lectura de `origen` a un archivo SQLite nuevo con el
+    esquema de las migraciones y el índice de búsqueda. Se escribe en un
+    archivo temporal y se reemplaza de forma atómica, así que la app nunca ve
+    una copia a medias. Las tablas se leen en una sola transacción para que
+    la copia sea consistente. Retorna {tabla: filas}.
+    """
+    from config.migraciones import migrar
+    from models.db import Base
+    from repositories.busqueda_repository import reconstruir_indice_busqueda
+
+    temporal = f"{destino}.tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    copia = create_engine(f"sqlite:///{os.path.abspath(temporal)}")
+    filas = {}
+    try:
+        with copia.connect() as conn:
+            migrar(conexion=conn)
+        with origen.connect() as lectura, lectura.begin(), copia.begin() as escritura:
+            for nombre in TABLAS_RESPALDO:
+                tabla = Base.metadata.tables[nombre]
+                escritura.execute(delete(tabla))
+                filas[nombre] = 0
+                resultado = lectura.execution_options(stream_results=True).execute(select(tabla))
+                for parte in resultado.mappings().partitions(lote):
+                    escritura.execute(insert(tabla), [dict(fila) for fila in parte])
+                    filas[nombre] += len(parte)
+            reconstruir_indice_busqueda(escritura)
+    finally:
+        copia.dispose()
+    os.replace(temporal, destino)
+    return filas
+
+
+@click.command('respaldo')
+@click.option('--destino', type=click.Path(dir_okay=False), default=None,
+              help='Archivo SQLite de destino (por defecto, DB_RESPALDO_RUTA)')
+def respaldo(destino):
+    """
+    Genera la copia de solo lectura que la app sirve mientras la base
+    principal no responde. Conviene programarlo (cron) cada pocos minutos.
+    """
+    from config.database import engine_sin_limite
+    from config.salud_bd import DB_RESPALDO_RUTA
+
+    destino = destino or DB_RESPALDO_RUTA
+    if not destino:
+        raise click.UsageError("Indica --destino o define DB_RESPALDO_RUTA")
+    inicio = time.perf_counter()
+    filas = generar_respaldo(engine_sin_limite(), destino)
+    resumen = ', '.join(f"{tabla}: {cantidad}" for tabla, cantidad in filas.items())
+    click.echo(f"Respaldo generado en {destino} ({resumen}) en {time.perf_counter() - inicio:.1f} s")
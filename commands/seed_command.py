@@ -0,0 +1,165 @@
+# commands/seed_command.py
+import time
+import random
+import logging
+import unicodedata
+from datetime import time as hora, datetime
+import bcrypt
+import click
+from sqlalchemy import insert, select, update, func
+
+logger = logging.getLogger(__name__)
+
+DOMINIO = 'seed.local'
+NOMBRES = ['Ana', 'Luis', 'María', 'José', 'Carlos', 'Lucía', 'Sofía', 'Andrés', 'Camila', 'Jorge',
+           'Valentina', 'Diego', 'Paula', 'Felipe', 'Daniela', 'Juan', 'Laura', 'Miguel', 'Sara', 'Tomás']
+APELLIDOS = ['Gómez', 'Pérez', 'Rodríguez', 'Martínez', 'García', 'López', 'Hernández', 'Díaz', 'Torres',
+             'Ramírez', 'Núñez', 'Castro', 'Vargas', 'Rojas', 'Moreno', 'Jiménez', 'Ortiz', 'Peña', 'Ruiz', 'Suárez']
+MATERIAS = ['Cálculo', 'Álgebra Lineal', 'Física', 'Química', 'Programación', 'Bases de Datos', 'Estadística',
+            'Economía', 'Contabilidad', 'Biología', 'Redes', 'Sistemas Operativos', 'Inglés', 'Ética',
+            'Ecuaciones Diferenciales', 'Estructuras de Datos', 'Termodinámica', 'Microeconomía']
+NIVELES = ['I', 'II', 'III']
+# Días con su peso relativo: la semana concentra la carga, el sábado tiene poca
+DIAS = [('Lunes', 20), ('Martes', 21), ('Miércoles', 21), ('Jueves', 20), ('Viernes', 14), ('Sábado', 4)]
+# Horas de inicio con su peso: picos en la mañana y al final de la tarde
+HORAS_INICIO = [(7, 12), (8, 14), (9, 11), (10, 12), (11, 8), (12, 3), (13, 4), (14, 9),
+                (15, 7), (16, 8), (17, 5), (18, 6), (19, 4), (20, 2)]
+DURACIONES = [(1, 3), (2, 6), (3, 1)]
+BLOQUES = 'ABCDEFGH'
+PROPORCION_SIN_ASIGNAR = 0.2
+
+
+def _sin_tildes(texto: str):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def _pesos(opciones):
+    return [valor for valor, _ in opciones], [peso for _, peso in opciones]
+
+
+def generar_usuarios(azar: random.Random, cantidad: int, semilla: int, password_hash: str):
+    """Usuarios con emails únicos por semilla y el mismo hash precalculado."""
+    for i in range(cantidad):
+        nombre, apellido = _sin_tildes(azar.choice(NOMBRES)), _sin_tildes(azar.choice(APELLIDOS))
+        yield {'email': f'{nombre}.{apellido}.{i}.s{semilla}@{DOMINIO}', 'password': password_hash, 'role': 'user'}
+
+
+def generar_horarios(azar: random.Random, cantidad: int, user_ids: list, version: int, ahora: datetime, periodo: str):
+    """
+    Horarios con distribuciones realistas: días y franjas con pesos, salones
+    y docentes con popularidad desigual (pocos concentran muchas clases).
+    """
+    dias, pesos_dias = _pesos(DIAS)
+    horas, pesos_horas = _pesos(HORAS_INICIO)
+    duraciones, pesos_duraciones = _pesos(DURACIONES)
+    docentes = [f'{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}'
+                for _ in range(max(10, cantidad // 40))]
+    salones = [f'{bloque}{piso}{aula:02d}' for bloque in BLOQUES for piso in range(1, 5) for aula in range(1, 16)]
+    materias = [f'{materia} {nivel}' for materia in MATERIAS for nivel in NIVELES]
+    # Pesos tipo Zipf: el elemento k tiene peso 1/(k+1)
+    pesos_docentes = [1 / (k + 1) for k in range(len(docentes))]
+    pesos_salones = [1 / (k + 1) ** 0.6 for k in range(len(salones))]
+
+    # Se eligen en bloque (choices con k) para no pagar una llamada por campo y fila
+    columnas = zip(
+        azar.choices(dias, pesos_dias, k=cantidad),
+        azar.choices(horas, pesos_horas, k=cantidad),
+        azar.choices(duraciones, pesos_duraciones, k=cantidad),
+        azar.choices(materias, k=cantidad),
+        azar.choices(docentes, pesos_docentes, k=cantidad),
+        azar.choices(salones, pesos_salones, k=cantidad),
+        azar.choices(user_ids or [None], k=cantidad),
+        (azar.random() for _ in range(cantidad)),
+    )
+    for dia, inicio, duracion, materia, docente, salon, user_id, sorteo in columnas:
+        yield {
+            'materia': materia,
+            'docente': docente,
+            'dia': dia,
+            'hora_inicio': hora(inicio, 0),
+            'hora_fin': hora(min(inicio + duracion, 23), 0),
+            'salon': salon,
+            'user_id': None if sorteo < PROPORCION_SIN_ASIGNAR else user_id,
+            'version': version,
+            'updated_at': ahora,
+            'periodo': periodo,
+        }
+
+
+def _en_lotes(filas, tamano):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def sembrar(engine, usuarios: int, horarios: int, semilla: int, lote: int, password: str, periodo: str = None):
+    """Inserta los datos de prueba en `periodo` (por defecto, el activo). Retorna (usuarios, horarios, versión asignada)."""
+    from config.periodos import PERIODO_ACTIVO, validar_periodo
+    from models.user_model import User
+    from models.horario_model import Horario
+    from models.sync_model import ContadorVersion
+    from repositories.busqueda_repository import reconstruir_indice_busqueda
+
+    periodo = validar_periodo(periodo or PERIODO_ACTIVO)
+    azar = random.Random(semilla)
+    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    sufijo = f'.s{semilla}@{DOMINIO}'
+
+    with engine.connect() as conn:
+        sincronizacion = None
+        if conn.dialect.name == 'sqlite':
+            # Sin fsync durante la carga; el PRAGMA debe ir fuera de la transacción y se restaura al terminar
+            sincronizacion = conn.exec_driver_sql('PRAGMA synchronous').scalar()
+            conn.exec_driver_sql('PRAGMA synchronous = OFF')
+            conn.commit()
+        try:
+            with conn.begin():
+                if conn.execute(select(User.id).where(User.email.like(f'%{sufijo}')).limit(1)).first():
+                    raise click.ClickException(f'Ya existen usuarios sembrados con la semilla {semilla}; usa otra --semilla')
+
+                for filas in _en_lotes(generar_usuarios(azar, usuarios, semilla, password_hash), lote):
+                    conn.execute(insert(User.__table__), filas)
+                user_ids = list(conn.execute(select(User.id).where(User.email.like(f'%{sufijo}')).order_by(User.id)).scalars())
+
+                # Una sola versión para toda la carga: los clientes la reciben como un cambio por lote
+                conn.execute(update(ContadorVersion).where(ContadorVersion.nombre == 'horarios')
+                             .values(valor=ContadorVersion.valor + 1))
+                version = conn.execute(select(ContadorVersion.valor).where(ContadorVersion.nombre == 'horarios')).scalar()
+
+                for filas in _en_lotes(generar_horarios(azar, horarios, user_ids, version, datetime.utcnow(), periodo), lote):
+                    conn.execute(insert(Horario.__table__), filas)
+                # Las inserciones masivas no pasan por el repositorio: el índice de búsqueda se reconstruye
+                reconstruir_indice_busqueda(conn)
+                total = conn.execute(select(func.count()).select_from(Horario.__table__).where(Horario.version == version)).scalar()
+        finally:
+            if sincronizacion is not None:
+                conn.exec_driver_sql(f'PRAGMA synchronous = {int(sincronizacion)}')
+                conn.commit()
+    return len(user_ids), total, version
+
+
+@click.command('seed')
+@click.option('--usuarios', default=1000, show_default=True, help='Usuarios a generar')
+@click.option('--horarios', default=10000, show_default=True, help='Horarios a generar')
+@click.option('--semilla', default=42, show_default=True, help='Semilla del generador (mismos datos para la misma semilla)')
+@click.option('--lote', default=20000, show_default=True, help='Filas por INSERT')
+@click.option('--password', default='seed1234', show_default=True, help='Contraseña de todos los usuarios generados')
+@click.option('--periodo', default=None, help='Periodo de los horarios (por defecto, PERIODO_ACTIVO)')
+def seed(usuarios, horarios, semilla, lote, password, periodo):
+    """Genera usuarios y horarios sintéticos para pruebas de carga."""
+    from config.database import engine_sin_limite
+    from services.horario_service import publicar_evento
+
+    inicio = time.perf_counter()
+    try:
+        total_usuarios, total_horarios, version = sembrar(engine_sin_limite(), usuarios, horarios, semilla, lote, password, periodo)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--periodo')
+    publicar_evento('lote_actualizado', version, user_ids=None, total=total_horarios)
+    click.echo(f"Usuarios: {total_usuarios}  Horarios: {total_horarios}  Versión: {version}  "
+               f"({time.perf_counter() - inicio:.1f} s)")
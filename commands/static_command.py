@@ -0,0 +1,85 @@
+# commands/static_command.py
+import os
+import re
+import glob
+import gzip
+import json
+import hashlib
+import logging
+import click
+
+try:
+    import brotli  # Opcional: pip install Brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ORIGEN = os.path.join('static', 'index.html')
+DESTINO = os.path.join('static', 'dist')
+
+_ESTILO = re.compile(r'<style>(.*?)</style>', re.DOTALL)
+_SCRIPT = re.compile(r'<script>(.*?)</script>', re.DOTALL)
+
+
+def _huella(contenido: bytes):
+    return hashlib.sha256(contenido).hexdigest()[:12]
+
+
+def _escribir(ruta: str, contenido: bytes):
+    """Escribe el archivo y sus variantes precomprimidas (.gz y, si hay brotli, .br)."""
+    with open(ruta, 'wb') as f:
+        f.write(contenido)
+    with open(ruta + '.gz', 'wb') as f:
+        # mtime=0 para que el build sea reproducible
+        f.write(gzip.compress(contenido, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(ruta + '.br', 'wb') as f:
+            f.write(brotli.compress(contenido, quality=11))
+
+
+def construir_estaticos(origen: str = ORIGEN, destino: str = DESTINO):
+    """
+    Extrae el CSS y el JS en línea de index.html a archivos con huella de
+    contenido (app.<hash>.css / app.<hash>.js), reescribe el HTML para
+    referenciarlos y genera las variantes precomprimidas. Retorna el manifiesto.
+    """
+    with open(origen, encoding='utf-8') as f:
+        html = f.read()
+
+    os.makedirs(destino, exist_ok=True)
+    for anterior in glob.glob(os.path.join(destino, '*')):
+        os.remove(anterior)
+
+    manifiesto = {}
+    for patron, extension, etiqueta in (
+        (_ESTILO, 'css', '<link rel="stylesheet" href="/assets/{}">'),
+        (_SCRIPT, 'js', '<script src="/assets/{}"></script>'),
+    ):
+        coincidencia = patron.search(html)
+        if not coincidencia:
+            continue
+        contenido = coincidencia.group(1).strip().encode('utf-8')
+        nombre = f"app.{_huella(contenido)}.{extension}"
+        _escribir(os.path.join(destino, nombre), contenido)
+        manifiesto[f"app.{extension}"] = nombre
+        html = html[:coincidencia.start()] + etiqueta.format(nombre) + html[coincidencia.end():]
+
+    contenido_html = html.encode('utf-8')
+    _escribir(os.path.join(destino, 'index.html'), contenido_html)
+    manifiesto['index.html'] = 'index.html'
+    manifiesto['etag'] = _huella(contenido_html)
+    with open(os.path.join(destino, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2)
+    return manifiesto
+
+
+@click.command('build-static')
+@click.option('--origen', default=ORIGEN, show_default=True, help='HTML de entrada')
+@click.option('--destino', default=DESTINO, show_default=True, help='Directorio de salida')
+def build_static(origen, destino):
+    """Genera los estáticos con huella de contenido y precomprimidos (gzip/brotli)."""
+    manifiesto = construir_estaticos(origen, destino)
+    for archivo in sorted(os.listdir(destino)):
+        click.echo(f"{archivo:40} {os.path.getsize(os.path.join(destino, archivo)):>10} bytes")
+    click.echo(f"Manifiesto: {json.dumps(manifiesto)}")
@@ -0,0 +1,92 @@
+# commands/usuarios_command.py
+import csv
+import time
+import click
+from commands.instituciones_command import opcion_institucion
+
+
+@click.group('usuarios')
+def usuarios():
+    """Administración de usuarios desde la línea de comandos."""
+
+
+@usuarios.command('importar')
+@click.argument('archivo', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--lote', default=None, type=click.IntRange(min=1),
+              help='Usuarios insertados por transacción (por defecto, APROVISIONAMIENTO_LOTE)')
+@click.option('--hilos', default=None, type=click.IntRange(min=1),
+              help='Hilos que calculan los hashes (por defecto, APROVISIONAMIENTO_HILOS: un hilo por núcleo)')
+@opcion_institucion
+def importar(archivo, lote, hilos):
+    """
+    Crea usuarios normales desde un CSV con columnas `email,password`. Los
+    emails ya registrados o repetidos en el archivo se saltan; las filas
+    inválidas se informan con su número de línea.
+    """
+    from config.database import sesion_de
+    from services.user_service import UserService, APROVISIONAMIENTO_LOTE, APROVISIONAMIENTO_HILOS
+
+    lector = csv.DictReader(archivo)
+    faltantes = {'email', 'password'} - set(lector.fieldnames or ())
+    if faltantes:
+        raise click.ClickException(f"Al CSV le faltan las columnas: {', '.join(sorted(faltantes))}")
+    filas = [{'email': fila['email'], 'password': fila['password']} for fila in lector]
+    lote, hilos = lote or APROVISIONAMIENTO_LOTE, hilos or APROVISIONAMIENTO_HILOS
+    click.echo(f"{len(filas)} filas leídas; {hilos} hilos, {lote} usuarios por transacción")
+
+    inicio = time.perf_counter()
+    db = sesion_de(tiempo_limite=0)
+    try:
+        resultado = UserService(db).crear_usuarios_lote(filas, lote=lote, hilos=hilos)
+    finally:
+        db.close()
+    duracion = time.perf_counter() - inicio
+
+    creados = len(resultado['creados'])
+    click.echo(f"{creados} usuarios creados en {duracion:.1f} s ({creados / duracion if duracion else 0:.0f}/s)")
+    click.echo(f"{len(resultado['duplicados'])} ya registrados, {len(resultado['repetidos'])} repetidos en el archivo")
+    for invalido in resultado['invalidos']:
+        # +2: la cabecera es la línea 1
+        click.echo(f"  línea {invalido['indice'] + 2}: {invalido['error']}", err=True)
+
+
+@usuarios.command('huerfanos')
+@click.option('--politica', type=click.Choice(['desasignar', 'reasignar', 'eliminar']), default='desasignar',
+              show_default=True, help='Qué hacer con los horarios de usuarios que ya no existen')
+@click.option('--reasignar-a', type=int, default=None, help='Usuario que recibe los horarios (con --politica reasignar)')
+@click.option('--simular', is_flag=True, help='Solo cuenta los horarios huérfanos, sin modificarlos')
+@opcion_institucion
+def huerfanos(politica, reasignar_a, simular):
+    """
+    Limpieza única de los horarios que quedaron apuntando a usuarios
+    eliminados antes de que la eliminación aplicara una política. Se hace
+    con una sola sentencia y una sola transacción.
+    """
+    from config.database import sesion_de
+    from models.user_model import User
+    from repositories.horario_repository import HorarioRepository
+    from services.horario_service import publicar_evento
+
+    if politica == 'reasignar' and reasignar_a is None:
+        raise click.BadParameter("indica el usuario destino", param_hint='--reasignar-a')
+
+    db = sesion_de(tiempo_limite=0)
+    try:
+        repository = HorarioRepository(db)
+        total = repository.contar_huerfanos()
+        click.echo(f"{total} horarios de usuarios eliminados")
+        if simular or not total:
+            return
+        if politica == 'reasignar' and db.get(User, reasignar_a) is None:
+            raise click.ClickException(f"El usuario destino {reasignar_a} no existe")
+        try:
+            afectados = repository.aplicar_politica_usuario(repository.condicion_huerfanos(), politica, reasignar_a)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    finally:
+        db.close()
+    publicar_evento('lote_eliminado' if politica == 'eliminar' else 'lote_actualizado',
+                    repository.ultima_version, user_ids=None, total=afectados)
+    click.echo(f"{afectados} horarios con '{politica}'")
@@ -0,0 +1,150 @@
+# config/compression.py
+import os
+import gzip
+import zlib
+import logging
+from flask import request, send_from_directory
+
+try:
+    import brotli  # Opcional: pip install Brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Tamaño mínimo (bytes) para comprimir una respuesta; por debajo no compensa
+COMPRESION_MIN_BYTES = int(os.getenv("COMPRESION_MIN_BYTES", "1024"))
+COMPRESION_NIVEL_GZIP = int(os.getenv("COMPRESION_NIVEL_GZIP", "6"))
+COMPRESION_NIVEL_BROTLI = int(os.getenv("COMPRESION_NIVEL_BROTLI", "5"))
+COMPRESION_STREAMING = os.getenv("COMPRESION_STREAMING", "1") == "1"
+
+TIPOS_COMPRIMIBLES = (
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/calendar',
+    'text/event-stream',
+)
+
+# Extensiones de los archivos precomprimidos por `flask build-static`
+EXTENSIONES = {'br': '.br', 'gzip': '.gz'}
+
+
+def negociar_encoding(accept_encoding: str):
+    """Elige 'br' o 'gzip' según el header Accept-Encoding (respetando q=0)."""
+    aceptados = {}
+    for parte in (accept_encoding or '').split(','):
+        partes = parte.strip().split(';')
+        nombre = partes[0].strip().lower()
+        if not nombre:
+            continue
+        q = 1.0
+        for parametro in partes[1:]:
+            clave, _, valor = parametro.strip().partition('=')
+            if clave == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        aceptados[nombre] = q
+    if brotli is not None and aceptados.get('br', 0) > 0:
+        return 'br'
+    if aceptados.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def _comprimir(datos: bytes, encoding: str):
+    if encoding == 'br':
+        return brotli.compress(datos, quality=COMPRESION_NIVEL_BROTLI)
+    return gzip.compress(datos, compresslevel=COMPRESION_NIVEL_GZIP)
+
+
+def _comprimir_stream(iterable, encoding: str):
+    """Comprime un stream por partes, vaciando el compresor en cada fragmento."""
+    if encoding == 'br':
+        compresor = brotli.Compressor(quality=COMPRESION_NIVEL_BROTLI)
+        procesar, vaciar, terminar = compresor.process, compresor.flush, compresor.finish
+    else:
+        compresor = zlib.compressobj(COMPRESION_NIVEL_GZIP, zlib.DEFLATED, 31)
+        procesar, terminar = compresor.compress, compresor.flush
+        vaciar = lambda: compresor.flush(zlib.Z_SYNC_FLUSH)
+    try:
+        for fragmento in iterable:
+            if isinstance(fragmento, str):
+                fragmento = fragmento.encode('utf-8')
+            # Se vacía en cada fragmento para que el cliente reciba los datos sin esperar
+            yield procesar(fragmento) + vaciar()
+        yield terminar()
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def comprimir_respuesta(response):
+    """after_request: comprime con gzip/brotli las respuestas que lo justifican."""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or request.method == 'HEAD'
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in TIPOS_COMPRIMIBLES):
+        return response
+    encoding = negociar_encoding(request.headers.get('Accept-Encoding', ''))
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        if not COMPRESION_STREAMING:
+            return response
+        response.response = _comprimir_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    if response.direct_passthrough:
+        return response
+    datos = response.get_data()
+    if len(datos) < COMPRESION_MIN_BYTES:
+        return response
+    response.set_data(_comprimir(datos, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        # La representación comprimida no es idéntica byte a byte: el ETag pasa a ser débil
+        etag, _ = response.get_etag()
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def servir_precomprimido(directorio: str, nombre: str, cache_control: str):
+    """
+    Sirve un archivo generado por `flask build-static`, eligiendo la variante
+    .br o .gz según Accept-Encoding.
+    """
+    encoding = negociar_encoding(request.headers.get('Accept-Encoding', ''))
+    archivo = nombre
+    if encoding and os.path.exists(os.path.join(directorio, nombre + EXTENSIONES[encoding])):
+        archivo = nombre + EXTENSIONES[encoding]
+    else:
+        encoding = None
+    response = send_from_directory(directorio, archivo, mimetype=_mimetype(nombre), etag=True, max_age=None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def _mimetype(nombre: str):
+    if nombre.endswith('.js'):
+        return 'application/javascript'
+    if nombre.endswith('.css'):
+        return 'text/css'
+    return 'text/html'
+
+
+def init_compression(app):
+    """Registra la compresión de respuestas en la aplicación."""
+    app.after_request(comprimir_respuesta)
+    logger.info(f"Compresión de respuestas activa (mínimo {COMPRESION_MIN_BYTES} bytes, brotli: {brotli is not None})")
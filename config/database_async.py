@@ -0,0 +1,75 @@
+#config/database_async.py
+import os
+import logging
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from config import database
+from config.salud_bd import DB_TIMEOUT_CONEXION
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Conexiones del pool async por proceso (cada una atiende una consulta a la vez)
+DB_ASYNC_POOL = int(os.getenv("DB_ASYNC_POOL", "10"))
+DB_ASYNC_POOL_EXTRA = int(os.getenv("DB_ASYNC_POOL_EXTRA", "20"))
+
+# Driver async equivalente a cada driver síncrono
+DRIVERS_ASYNC = {
+    'sqlite': 'sqlite+aiosqlite',
+    'mysql': 'mysql+asyncmy',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def url_async(url):
+    """Misma URL del engine síncrono con el driver async (sqlite+pysqlite -> sqlite+aiosqlite)."""
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise ValueError(f"No hay driver async para '{backend}'")
+    return url.set(drivername=DRIVERS_ASYNC[backend])
+
+
+def argumentos_conexion_async(url, tiempo_limite: float):
+    """
+    Timeouts del lado del servidor para los drivers async. El límite de cada
+    consulta lo pone el handler con asyncio.timeout; esto solo hace que el
+    servidor no siga trabajando en una consulta que ya nadie espera.
+    """
+    backend = url.get_backend_name()
+    if backend == 'mysql':
+        argumentos = {'connect_timeout': int(DB_TIMEOUT_CONEXION)}
+        if tiempo_limite:
+            argumentos['init_command'] = f"SET SESSION max_execution_time = {int(tiempo_limite * 1000)}"
+        return argumentos
+    if backend == 'postgresql':
+        argumentos = {'timeout': DB_TIMEOUT_CONEXION}
+        if tiempo_limite:
+            argumentos['server_settings'] = {'statement_timeout': str(int(tiempo_limite * 1000))}
+        return argumentos
+    return {}
+
+
+def crear_engine_async(engine=None):
+    """
+    Engine async sobre la misma base que eligió config.database (MySQL o el
+    SQLite local). Sus errores alimentan el interruptor de `database.bd`, así
+    que una caída detectada por cualquiera de los dos modos los afecta a ambos.
+    """
+    engine = engine or database.engine
+    url = url_async(engine.url)
+    engine_async = create_async_engine(
+        url,
+        echo=engine.echo,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=DB_ASYNC_POOL,
+        max_overflow=DB_ASYNC_POOL_EXTRA,
+        pool_pre_ping=url.get_backend_name() != 'sqlite',
+        connect_args=argumentos_conexion_async(url, database.TIEMPO_LIMITE),
+    )
+    database.bd.vigilar(engine_async.sync_engine)
+    logger.info(f"Engine async creado con {url.drivername}")
+    return engine_async
+
+
+engine_async = crear_engine_async()
+SesionAsync = async_sessionmaker(engine_async, expire_on_commit=False, autoflush=False)
@@ -0,0 +1,195 @@
+# config/instituciones.py
+import os
+import re
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request, jsonify, has_request_context
+from flask_jwt_extended import get_jwt
+from config.salud_bd import BaseDatosNoDisponible, METODOS_LECTURA, RUTAS_SIN_ESCRITURA
+from repositories.institucion_repository import InstitucionRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _leer_shards(texto: str):
+    """'a=sqlite:///shards/a/{institucion}.db,b=mysql+pymysql://u:p@host-b/{institucion}' -> {shard: plantilla}."""
+    shards = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        nombre, _, plantilla = parte.partition('=')
+        if '{institucion}' not in plantilla:
+            raise ValueError(f"La URL del shard '{nombre.strip()}' debe incluir {{institucion}} (una base por institución)")
+        shards[nombre.strip()] = plantilla.strip()
+    return shards
+
+
+# Shards disponibles: nombre -> URL con {institucion}. Vacío: todo en la base principal
+DB_SHARDS = _leer_shards(os.getenv("DB_SHARDS", ""))
+# Institución de los tokens sin claim y de las peticiones que no indican ninguna
+INSTITUCION_POR_DEFECTO = os.getenv("INSTITUCION_POR_DEFECTO", "principal")
+# Segundos que un worker reutiliza el catálogo (lo que tarda en ver un `flask instituciones mover`)
+INSTITUCIONES_CACHE_SEGUNDOS = float(os.getenv("INSTITUCIONES_CACHE_SEGUNDOS", "5"))
+
+# La base principal (MYSQL_URI) como shard: solo aloja a la institución por defecto
+SHARD_PRINCIPAL = 'principal'
+CLAIM_INSTITUCION = 'institucion'
+# El nombre va en URLs y nombres de archivo
+NOMBRE_VALIDO = re.compile(r'^[a-z0-9_]{1,40}$')
+
+# Institución elegida explícitamente (login, registro, comandos de la CLI); None: la de la petición
+institucion_elegida = ContextVar('institucion_elegida', default=None)
+
+
+class InstitucionDesconocida(Exception):
+    def __init__(self, nombre: str):
+        super().__init__(f"La institución '{nombre}' no existe")
+        self.nombre = nombre
+
+
+class InstitucionEnMovimiento(BaseDatosNoDisponible):
+    """La institución se está copiando a otro shard: mientras tanto solo se atienden lecturas."""
+
+
+def institucion_actual():
+    """
+    Institución de la operación en curso: la del JWT verificado (los tokens
+    sin claim son de la institución por defecto), la elegida con
+    `usar_institucion` o, en rutas sin JWT (feed iCal), la de X-Institucion
+    o ?institucion=.
+    """
+    if has_request_context():
+        try:
+            claims = get_jwt()
+        except RuntimeError:
+            # Ruta sin JWT verificado
+            claims = None
+        if claims:
+            return claims.get(CLAIM_INSTITUCION, INSTITUCION_POR_DEFECTO)
+    elegida = institucion_elegida.get()
+    if elegida is not None:
+        return elegida
+    if has_request_context():
+        return request.headers.get('X-Institucion') or request.args.get('institucion') or INSTITUCION_POR_DEFECTO
+    return INSTITUCION_POR_DEFECTO
+
+
+@contextmanager
+def usar_institucion(nombre: str):
+    """Fija la institución de lo que se ejecute dentro (login, registro, comandos de la CLI)."""
+    token = institucion_elegida.set(nombre or INSTITUCION_POR_DEFECTO)
+    try:
+        yield
+    finally:
+        institucion_elegida.reset(token)
+
+
+def _es_escritura():
+    return (has_request_context() and request.method not in METODOS_LECTURA
+            and request.endpoint not in RUTAS_SIN_ESCRITURA)
+
+
+class Enrutador:
+    """
+    Institución -> base de datos. Cada institución tiene su propia base
+    dentro de un shard (DB_SHARDS); el catálogo de la base principal dice en
+    qué shard está cada una y se relee cada INSTITUCIONES_CACHE_SEGUNDOS.
+    Sin DB_SHARDS todo va a la base principal y el catálogo no se consulta.
+
+    Cada base de un shard tiene su propio BaseDatosMonitoreada (timeouts e
+    interruptor): la caída de un shard solo afecta a sus instituciones. El
+    respaldo de solo lectura es solo de la base principal.
+    """
+    def __init__(self, principal, crear_base, shards: dict = DB_SHARDS, ttl: float = INSTITUCIONES_CACHE_SEGUNDOS):
+        self.principal = principal
+        self.crear_base = crear_base
+        self.shards = shards
+        self.ttl = ttl
+        self._catalogo = {}
+        self._expira = 0.0
+        self._bases = {}
+        self._lock_catalogo = threading.Lock()
+        self._lock_bases = threading.Lock()
+
+    @property
+    def activo(self):
+        return bool(self.shards)
+
+    def url(self, shard: str, institucion: str):
+        return self.shards[shard].format(institucion=institucion)
+
+    def catalogo(self):
+        """nombre -> (shard, estado); se relee de la base principal al vencer la caché."""
+        if time.monotonic() >= self._expira:
+            with self._lock_catalogo:
+                if time.monotonic() >= self._expira:
+                    self._releer()
+        return self._catalogo
+
+    def _releer(self):
+        try:
+            db = self.principal.Sesion()
+            try:
+                self._catalogo = {nombre: (shard, estado) for nombre, shard, estado in InstitucionRepository(db).listar()}
+            finally:
+                db.close()
+        except Exception as e:
+            # Sin la base principal se sigue con el último catálogo conocido
+            logger.warning(f"No se pudo releer el catálogo de instituciones: {str(e)}")
+        self._expira = time.monotonic() + self.ttl
+
+    def invalidar(self):
+        """El próximo acceso relee el catálogo (después de cambiarlo desde este proceso)."""
+        self._expira = 0.0
+
+    def ubicacion(self, institucion: str):
+        """(shard, estado) de la institución. Lanza InstitucionDesconocida si no está en el catálogo."""
+        if self.activo:
+            encontrada = self.catalogo().get(institucion)
+            if encontrada is not None:
+                return encontrada
+        if institucion == INSTITUCION_POR_DEFECTO:
+            return SHARD_PRINCIPAL, 'activa'
+        raise InstitucionDesconocida(institucion)
+
+    def base(self, institucion: str):
+        """BaseDatosMonitoreada de la institución."""
+        shard, _ = self.ubicacion(institucion)
+        return self.base_en(shard, institucion)
+
+    def base_en(self, shard: str, institucion: str):
+        """Base de la institución en `shard` (se crea la primera vez; una por URL y proceso)."""
+        if shard == SHARD_PRINCIPAL:
+            return self.principal
+        if shard not in self.shards:
+            raise BaseDatosNoDisponible(f"El shard '{shard}' de la institución '{institucion}' no está configurado")
+        url = self.url(shard, institucion)
+        base = self._bases.get(url)
+        if base is None:
+            with self._lock_bases:
+                base = self._bases.get(url)
+                if base is None:
+                    base = self._bases[url] = self.crear_base(url)
+                    logger.info(f"Base de la institución '{institucion}' abierta en el shard '{shard}'")
+        return base
+
+    def sesion(self, institucion: str):
+        """Sesión sobre la base de la institución; mientras se mueve de shard, solo para lecturas."""
+        shard, estado = self.ubicacion(institucion)
+        if estado == 'moviendo' and _es_escritura():
+            raise InstitucionEnMovimiento(
+                f"La institución '{institucion}' se está moviendo de shard; intenta de nuevo en unos segundos", self.ttl)
+        return self.base_en(shard, institucion).sesion()
+
+    def estado(self):
+        """Interruptor de cada base de shard abierta en este proceso (para /api/salud)."""
+        return {base.engine.url.render_as_string(hide_password=True): 'abierto' if base.interruptor.abierto else 'cerrado'
+                for base in list(self._bases.values())}
+
+
+def init_instituciones(app):
+    @app.errorhandler(InstitucionDesconocida)
+    def handle_institucion_desconocida(e):
+        logger.warning(f"Institución desconocida en {request.method} {request.path}: {e.nombre}")
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
@@ -0,0 +1,86 @@
+# config/migraciones.py
+import os
+import logging
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Aplicar las migraciones pendientes al iniciar en lugar de fallar (útil en desarrollo)
+ESQUEMA_AUTO_MIGRAR = os.getenv("ESQUEMA_AUTO_MIGRAR", "0") == "1"
+# Segundos que una migración espera un bloqueo antes de fallar (no deja en cola al tráfico)
+MIGRACION_LOCK_TIMEOUT = int(os.getenv("MIGRACION_LOCK_TIMEOUT", "5"))
+
+# Tablas que no maneja el metadata de los modelos (índice FTS5 y sus tablas internas)
+TABLAS_EXCLUIDAS = ('alembic_version', 'horarios_fts')
+
+
+def configuracion_alembic():
+    """Config de Alembic con rutas absolutas, para poder ejecutarla desde cualquier directorio."""
+    config = Config(os.path.join(RAIZ, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(RAIZ, 'migrations'))
+    return config
+
+
+def incluir_objeto(objeto, nombre, tipo, reflejado, comparado_con):
+    """Filtro de autogenerate: ignora las tablas del índice de búsqueda."""
+    if tipo == 'table' and nombre and nombre.startswith(TABLAS_EXCLUIDAS):
+        return False
+    return True
+
+
+def limitar_bloqueos(conexion):
+    """Timeout de bloqueos por sesión: una migración bloqueada falla rápido en vez de frenar la app."""
+    dialecto = conexion.dialect.name
+    if dialecto == 'mysql':
+        conexion.execute(text(f"SET SESSION lock_wait_timeout = {MIGRACION_LOCK_TIMEOUT}"))
+    elif dialecto == 'postgresql':
+        conexion.execute(text(f"SET lock_timeout = '{MIGRACION_LOCK_TIMEOUT}s'"))
+    elif dialecto == 'sqlite':
+        conexion.execute(text(f"PRAGMA busy_timeout = {MIGRACION_LOCK_TIMEOUT * 1000}"))
+
+
+def revisiones_pendientes(engine):
+    """Revisiones que faltan aplicar, de la más antigua a la más nueva."""
+    script = ScriptDirectory.from_config(configuracion_alembic())
+    with engine.connect() as conexion:
+        actuales = MigrationContext.configure(conexion).get_current_heads()
+    if set(actuales) == set(script.get_heads()):
+        return []
+    try:
+        pendientes = list(script.iterate_revisions('heads', actuales or 'base'))
+    except Exception as e:
+        raise RuntimeError(f"La base de datos está en una revisión desconocida ({', '.join(actuales)}): {str(e)}")
+    return [revision.revision for revision in reversed(pendientes)]
+
+
+def migrar(revision: str = 'heads', conexion=None):
+    """Aplica las migraciones; con `conexion`, sobre esa base en lugar de la de la app."""
+    config = configuracion_alembic()
+    config.attributes['connection'] = conexion
+    command.upgrade(config, revision)
+
+
+def verificar_esquema(engine, migrar_si_falta: bool = ESQUEMA_AUTO_MIGRAR):
+    """
+    Falla el arranque si el esquema no está en la última revisión, para no
+    servir peticiones con columnas o índices faltantes.
+    """
+    pendientes = revisiones_pendientes(engine)
+    if not pendientes:
+        return
+    if migrar_si_falta:
+        logger.info(f"Aplicando migraciones pendientes en {engine.url.render_as_string(hide_password=True)}: "
+                    f"{', '.join(pendientes)}")
+        with engine.connect() as conexion:
+            migrar(conexion=conexion)
+        return
+    raise RuntimeError(
+        f"El esquema de {engine.url.render_as_string(hide_password=True)} está atrasado ({len(pendientes)} "
+        f"migraciones pendientes: {', '.join(pendientes)}). Ejecuta `flask --app main db upgrade` "
+        f"(y `flask --app main instituciones migrar` para los shards) o define ESQUEMA_AUTO_MIGRAR=1."
+    )
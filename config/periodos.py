@@ -0,0 +1,46 @@
+# config/periodos.py
+import os
+import re
+from datetime import date
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Formato de un periodo académico: año y término, por ejemplo 2026-1, 2026-2 o 2026-verano
+PATRON_PERIODO = re.compile(r'^\d{4}-[A-Za-z0-9]{1,15}$')
+
+
+def validar_periodo(valor):
+    """Retorna el periodo si tiene el formato AAAA-término; si no, lanza ValueError."""
+    if not isinstance(valor, str) or not PATRON_PERIODO.match(valor):
+        raise ValueError(f"Periodo inválido: {valor!r} (formato AAAA-término, por ejemplo 2026-1)")
+    return valor
+
+
+def fechas_de_periodo(periodo: str, inicio: str = None, fin: str = None):
+    """
+    (inicio, fin) de un periodo: las fechas indicadas (AAAA-MM-DD) o, en los
+    semestres, enero-junio para AAAA-1 y julio-diciembre para AAAA-2. Los
+    demás términos deben indicarlas. Lanza ValueError si faltan o no son válidas.
+    """
+    anio, _, termino = periodo.partition('-')
+    semestres = {'1': (date(int(anio), 1, 1), date(int(anio), 6, 30)),
+                 '2': (date(int(anio), 7, 1), date(int(anio), 12, 31))}
+    por_defecto = semestres.get(termino, (None, None))
+    inicio = date.fromisoformat(inicio) if inicio else por_defecto[0]
+    fin = date.fromisoformat(fin) if fin else por_defecto[1]
+    if inicio is None or fin is None:
+        raise ValueError(f"El periodo {periodo} no es un semestre: indica PERIODO_INICIO y PERIODO_FIN")
+    if fin < inicio:
+        raise ValueError(f"El periodo {periodo} termina ({fin}) antes de empezar ({inicio})")
+    return inicio, fin
+
+
+# Periodo al que se limitan por defecto las consultas de horarios. Es obligatorio:
+# si se tomara de la fecha de arranque, un reinicio al cambiar de semestre ocultaría
+# todos los horarios y dos workers arrancados en días distintos no coincidirían.
+if not os.getenv("PERIODO_ACTIVO"):
+    raise RuntimeError("PERIODO_ACTIVO no está definido: indica el periodo académico activo (por ejemplo PERIODO_ACTIVO=2026-2)")
+PERIODO_ACTIVO = validar_periodo(os.getenv("PERIODO_ACTIVO"))
+# Fechas del periodo activo (feed iCal: primera y última semana de clases)
+PERIODO_INICIO, PERIODO_FIN = fechas_de_periodo(PERIODO_ACTIVO, os.getenv("PERIODO_INICIO"), os.getenv("PERIODO_FIN"))
@@ -0,0 +1,157 @@
+# config/rate_limit.py
+import os
+import math
+import time
+import logging
+import threading
+from functools import wraps
+from flask import request, jsonify
+
+logger = logging.getLogger(__name__)
+
+# Permite desactivar los límites (por ejemplo, para cargar datos de prueba)
+RATE_LIMIT_ACTIVO = os.getenv("RATE_LIMIT_ACTIVO", "1") == "1"
+# Token bucket por IP y por email: capacidad (ráfaga) y recarga por minuto
+RATE_LIMIT_IP_CAPACIDAD = float(os.getenv("RATE_LIMIT_IP_CAPACIDAD", "20"))
+RATE_LIMIT_IP_POR_MINUTO = float(os.getenv("RATE_LIMIT_IP_POR_MINUTO", "10"))
+RATE_LIMIT_EMAIL_CAPACIDAD = float(os.getenv("RATE_LIMIT_EMAIL_CAPACIDAD", "5"))
+RATE_LIMIT_EMAIL_POR_MINUTO = float(os.getenv("RATE_LIMIT_EMAIL_POR_MINUTO", "5"))
+# Tomar la IP del cliente de X-Forwarded-For (solo detrás de un proxy de confianza)
+RATE_LIMIT_CONFIAR_PROXY = os.getenv("RATE_LIMIT_CONFIAR_PROXY", "0") == "1"
+# Backend compartido entre workers (opcional)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Peticiones de autenticación (bcrypt) simultáneas por proceso y espera máxima por un cupo
+AUTH_MAX_CONCURRENTES = int(os.getenv("AUTH_MAX_CONCURRENTES", str(max(2, (os.cpu_count() or 2) // 2))))
+AUTH_ESPERA_MAX = float(os.getenv("AUTH_ESPERA_MAX", "0.5"))
+
+MAX_CLAVES_MEMORIA = 100000
+
+
+class BackendMemoria:
+    """Token buckets del proceso: clave -> (tokens, instante de la última recarga)."""
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, clave: str, capacidad: float, por_segundo: float, costo: float = 1):
+        """Retorna (permitido, segundos hasta que haya tokens suficientes)."""
+        ahora = time.monotonic()
+        with self._lock:
+            tokens, ultimo = self._buckets.get(clave, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - ultimo) * por_segundo)
+            if tokens >= costo:
+                self._buckets[clave] = (tokens - costo, ahora)
+                permitido, espera = True, 0.0
+            else:
+                self._buckets[clave] = (tokens, ahora)
+                permitido, espera = False, (costo - tokens) / por_segundo
+            if len(self._buckets) > MAX_CLAVES_MEMORIA:
+                self._purgar(ahora, capacidad, por_segundo)
+        return permitido, espera
+
+    def _purgar(self, ahora, capacidad, por_segundo):
+        # Un bucket que ya se habría recargado por completo equivale a no tenerlo
+        llenos = [clave for clave, (tokens, ultimo) in self._buckets.items()
+                  if tokens + (ahora - ultimo) * por_segundo >= capacidad]
+        for clave in llenos:
+            del self._buckets[clave]
+
+
+class BackendRedis:
+    """Token buckets compartidos entre workers; el script Lua hace la recarga y el consumo atómicos."""
+    SCRIPT = """
+        local datos = redis.call('HMGET', KEYS[1], 'tokens', 'ultimo')
+        local capacidad = tonumber(ARGV[1])
+        local por_segundo = tonumber(ARGV[2])
+        local ahora = tonumber(ARGV[3])
+        local costo = tonumber(ARGV[4])
+        local tokens = tonumber(datos[1]) or capacidad
+        local ultimo = tonumber(datos[2]) or ahora
+        tokens = math.min(capacidad, tokens + math.max(0, ahora - ultimo) * por_segundo)
+        local permitido = 0
+        local espera = 0
+        if tokens >= costo then
+            tokens = tokens - costo
+            permitido = 1
+        else
+            espera = (costo - tokens) / por_segundo
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ultimo', ahora)
+        redis.call('PEXPIRE', KEYS[1], math.ceil(capacidad / por_segundo * 1000) + 1000)
+        return {permitido, tostring(espera)}
+    """
+
+    def __init__(self, url):
+        import redis
+        self.cliente = redis.Redis.from_url(url)
+        self.cliente.ping()
+        self.script = self.cliente.register_script(self.SCRIPT)
+
+    def consumir(self, clave: str, capacidad: float, por_segundo: float, costo: float = 1):
+        permitido, espera = self.script(keys=[f'rate:{clave}'], args=[capacidad, por_segundo, time.time(), costo])
+        return bool(permitido), float(espera)
+
+
+def crear_backend():
+    """Backend de los límites: Redis si RATE_LIMIT_REDIS_URL está definido, si no memoria del proceso."""
+    if RATE_LIMIT_REDIS_URL:
+        try:
+            backend = BackendRedis(RATE_LIMIT_REDIS_URL)
+            logger.info("Límites de peticiones compartidos en Redis")
+            return backend
+        except Exception as e:
+            logger.warning(f"No se pudo conectar a Redis para los límites, se usará memoria local: {str(e)}")
+    return BackendMemoria()
+
+
+backend = crear_backend()
+# Cupos de autenticación del proceso: bcrypt ocupa CPU y no debe dejar sin workers a las lecturas
+cupos_autenticacion = threading.BoundedSemaphore(AUTH_MAX_CONCURRENTES)
+
+
+def ip_cliente():
+    if RATE_LIMIT_CONFIAR_PROXY and request.headers.get('X-Forwarded-For'):
+        return request.headers['X-Forwarded-For'].split(',')[0].strip()
+    return request.remote_addr or 'desconocida'
+
+
+def _rechazar(status: int, mensaje: str, espera: float):
+    segundos = max(1, math.ceil(espera))
+    return jsonify({'error': mensaje, 'reintentar_en': segundos}), status, {'Retry-After': str(segundos)}
+
+
+def limitar_autenticacion(nombre: str):
+    """
+    Decorador para rutas con bcrypt (login/registro). Aplica, en orden:
+    token bucket por IP, token bucket por email (429 con Retry-After) y un
+    cupo global de peticiones simultáneas (503 si no se libera a tiempo).
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not RATE_LIMIT_ACTIVO:
+                return fn(*args, **kwargs)
+            ip = ip_cliente()
+            permitido, espera = backend.consumir(f'{nombre}:ip:{ip}', RATE_LIMIT_IP_CAPACIDAD, RATE_LIMIT_IP_POR_MINUTO / 60)
+            if not permitido:
+                logger.warning(f"Límite por IP alcanzado en {nombre}: {ip}")
+                return _rechazar(429, 'Demasiados intentos desde esta IP. Intenta más tarde.', espera)
+
+            datos = request.get_json(silent=True)
+            # Un cuerpo que no es un objeto JSON no tiene email: la ruta responde su propio 400
+            email = str(datos.get('email') or '').strip().lower() if isinstance(datos, dict) else ''
+            if email:
+                permitido, espera = backend.consumir(f'{nombre}:email:{email}', RATE_LIMIT_EMAIL_CAPACIDAD, RATE_LIMIT_EMAIL_POR_MINUTO / 60)
+                if not permitido:
+                    logger.warning(f"Límite por email alcanzado en {nombre}: {email}")
+                    return _rechazar(429, 'Demasiados intentos para este email. Intenta más tarde.', espera)
+
+            if not cupos_autenticacion.acquire(timeout=AUTH_ESPERA_MAX):
+                logger.warning(f"Sin cupos de autenticación disponibles en {nombre}")
+                return _rechazar(503, 'Servidor ocupado. Intenta de nuevo en unos segundos.', 1)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                cupos_autenticacion.release()
+        return wrapper
+    return decorator
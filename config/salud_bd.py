@@ -0,0 +1,377 @@
+# config/salud_bd.py
+import os
+import time
+import sqlite3
+import logging
+import threading
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import sessionmaker
+from config.sobrecarga import plazo_peticion, vencido, PlazoVencido
+
+logger = logging.getLogger(__name__)
+
+# Segundos para establecer una conexión y para cada sentencia (0 desactiva el de sentencia)
+DB_TIMEOUT_CONEXION = float(os.getenv("DB_TIMEOUT_CONEXION", "5"))
+DB_TIMEOUT_SENTENCIA = float(os.getenv("DB_TIMEOUT_SENTENCIA", "10"))
+# Fallas seguidas de la base principal que abren el interruptor
+DB_FALLOS_PARA_ABRIR = int(os.getenv("DB_FALLOS_PARA_ABRIR", "3"))
+# Segundos entre pings a la base principal mientras el interruptor está abierto
+DB_REINTENTO = float(os.getenv("DB_REINTENTO", "5"))
+# Copia SQLite de solo lectura que se sirve mientras la principal no responde (opcional)
+DB_RESPALDO_RUTA = os.getenv("DB_RESPALDO_RUTA")
+# Métodos que se atienden desde el respaldo de solo lectura
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+# Rutas POST que solo leen la base (se permiten en modo solo lectura)
+RUTAS_SIN_ESCRITURA = ('users.login', 'users.refresh', 'users.logout')
+
+# Errores de bloqueo: la base responde, solo hay contención; no cuentan como falla
+_ERRORES_DE_BLOQUEO = ('locked', 'deadlock', 'lock wait')
+# Instrucciones de SQLite entre revisiones del tiempo límite
+_PASOS_PROGRESO = 10000
+
+
+class BaseDatosNoDisponible(Exception):
+    """La base principal no responde y no hay respaldo para la operación pedida."""
+    def __init__(self, mensaje, reintentar_en: float = DB_REINTENTO):
+        super().__init__(mensaje)
+        self.reintentar_en = reintentar_en
+
+
+def argumentos_conexion(uri: str, tiempo_limite: float = DB_TIMEOUT_SENTENCIA):
+    """
+    connect_args con los timeouts de cada driver. En MySQL read_timeout corta
+    un socket colgado y max_execution_time hace que el servidor cancele la
+    consulta; en PostgreSQL se usa statement_timeout. SQLite no tiene socket:
+    su límite por sentencia lo pone aplicar_tiempo_limite.
+    """
+    if uri.startswith('mysql'):
+        argumentos = {'connect_timeout': int(DB_TIMEOUT_CONEXION)}
+        if tiempo_limite:
+            argumentos.update(read_timeout=int(tiempo_limite), write_timeout=int(tiempo_limite),
+                              init_command=f"SET SESSION max_execution_time = {int(tiempo_limite * 1000)}")
+        return argumentos
+    if uri.startswith('postgresql'):
+        argumentos = {'connect_timeout': int(DB_TIMEOUT_CONEXION)}
+        if tiempo_limite:
+            argumentos['options'] = f"-c statement_timeout={int(tiempo_limite * 1000)}"
+        return argumentos
+    return {}
+
+
+def plazo_sentencia(tiempo_limite: float = DB_TIMEOUT_SENTENCIA):
+    """
+    Instante (time.monotonic) en que debe cortarse una sentencia que empieza
+    ahora: el límite por sentencia o lo que le queda a la petición, lo que
+    llegue antes. None si no hay ninguno. Lanza PlazoVencido si la petición
+    ya no tiene tiempo: la sentencia no llega a la base.
+    """
+    ahora = time.monotonic()
+    plazo = ahora + tiempo_limite if tiempo_limite else None
+    fin_peticion = plazo_peticion.get()
+    if fin_peticion is not None:
+        if fin_peticion <= ahora:
+            raise PlazoVencido('consulta a la base de datos')
+        plazo = fin_peticion if plazo is None else min(plazo, fin_peticion)
+    return plazo
+
+
+def aplicar_tiempo_limite(engine, tiempo_limite: float = DB_TIMEOUT_SENTENCIA):
+    """
+    Límite por sentencia, acotado por el plazo de la petición en curso
+    (config/sobrecarga.py). En SQLite cada sentencia anota su plazo en la
+    conexión y un progress handler la interrumpe ('interrupted') si lo pasa.
+    En MySQL los SELECT llevan el hint MAX_EXECUTION_TIME y en PostgreSQL se
+    fija statement_timeout para la transacción, solo cuando la petición
+    tiene menos tiempo que el límite de la sesión (argumentos_conexion).
+    """
+    if engine.dialect.name == 'mysql':
+        _acotar_mysql(engine, tiempo_limite)
+        return
+    if engine.dialect.name == 'postgresql':
+        _acotar_postgresql(engine, tiempo_limite)
+        return
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _al_conectar(dbapi_connection, registro):
+        info = registro.info
+        dbapi_connection.set_progress_handler(
+            lambda: 1 if info.get('plazo') and time.monotonic() > info['plazo'] else 0, _PASOS_PROGRESO
+        )
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _antes_de_ejecutar(conn, cursor, sentencia, parametros, contexto, varias):
+        conn.connection.info['plazo'] = plazo_sentencia(tiempo_limite)
+
+    @event.listens_for(engine, 'checkin')
+    def _al_devolver(dbapi_connection, registro):
+        registro.info.pop('plazo', None)
+
+    # Las conexiones que ya están en el pool (la de prueba de get_engine) no
+    # pasaron por 'connect' con el handler: se descartan
+    engine.dispose()
+
+
+def _ms_de_la_peticion(tiempo_limite: float):
+    """Milisegundos para la sentencia si la petición tiene menos tiempo que el límite de la sesión; si no, None."""
+    plazo = plazo_sentencia(0)
+    if plazo is None:
+        return None
+    ms = max(1, int((plazo - time.monotonic()) * 1000))
+    return ms if not tiempo_limite or ms < tiempo_limite * 1000 else None
+
+
+def _acotar_mysql(engine, tiempo_limite: float):
+    @event.listens_for(engine, 'before_cursor_execute', retval=True)
+    def _antes_de_ejecutar(conn, cursor, sentencia, parametros, contexto, varias):
+        ms = _ms_de_la_peticion(tiempo_limite)
+        if ms is not None and sentencia.lstrip()[:6].upper() == 'SELECT':
+            inicio = len(sentencia) - len(sentencia.lstrip())
+            sentencia = f"{sentencia[:inicio + 6]} /*+ MAX_EXECUTION_TIME({ms}) */{sentencia[inicio + 6:]}"
+        return sentencia, parametros
+
+
+def _acotar_postgresql(engine, tiempo_limite: float):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _antes_de_ejecutar(conn, cursor, sentencia, parametros, contexto, varias):
+        ms = _ms_de_la_peticion(tiempo_limite)
+        if ms is not None:
+            # SET LOCAL dura hasta el fin de la transacción; cada sentencia lo vuelve a acotar
+            cursor.execute(f"SET LOCAL statement_timeout = {ms}")
+
+
+def es_falla_de_servidor(contexto):
+    """True si el error indica que la base no responde (desconexión, timeout o conexión rechazada)."""
+    if contexto.is_disconnect:
+        return True
+    dbapi = contexto.dialect.loaded_dbapi if contexto.dialect is not None else None
+    original = contexto.original_exception
+    if dbapi is None or not isinstance(original, dbapi.OperationalError):
+        return False
+    mensaje = str(original).lower()
+    return not any(patron in mensaje for patron in _ERRORES_DE_BLOQUEO)
+
+
+class Interruptor:
+    """
+    Circuit breaker sobre la base principal. Se abre tras `umbral` fallas
+    seguidas; abierto, las peticiones no esperan a la base (van al respaldo
+    o reciben 503) y solo el monitor la prueba hasta que vuelve a responder.
+    """
+    def __init__(self, umbral: int = DB_FALLOS_PARA_ABRIR, al_abrir=None):
+        self.umbral = umbral
+        self.al_abrir = al_abrir
+        self.fallos = 0
+        self.abierto_desde = None
+        self._lock = threading.Lock()
+
+    @property
+    def abierto(self):
+        return self.abierto_desde is not None
+
+    def registrar_exito(self):
+        if self.fallos:
+            with self._lock:
+                self.fallos = 0
+
+    def registrar_fallo(self):
+        with self._lock:
+            self.fallos += 1
+            if self.abierto or self.fallos < self.umbral:
+                return
+            self.abierto_desde = time.monotonic()
+        logger.error(f"Base de datos principal sin respuesta tras {self.fallos} fallas: interruptor abierto")
+        if self.al_abrir is not None:
+            self.al_abrir()
+
+    def cerrar(self):
+        with self._lock:
+            abierto_hace = time.monotonic() - self.abierto_desde if self.abierto else 0
+            self.abierto_desde = None
+            self.fallos = 0
+        logger.info(f"Base de datos principal disponible de nuevo ({abierto_hace:.1f} s sin servicio)")
+
+
+def crear_engine_respaldo(ruta: str = DB_RESPALDO_RUTA):
+    """Engine de solo lectura sobre la copia SQLite (None si no hay respaldo configurado)."""
+    if not ruta:
+        return None
+    ruta = os.path.abspath(ruta)
+    # mode=ro: cualquier escritura falla en el driver aunque se cuele una
+    # pool_recycle: las conexiones nuevas ven el archivo que deja `flask respaldo`
+    return create_engine(f"sqlite:///file:{ruta}?mode=ro&uri=true", pool_recycle=60)
+
+
+class BaseDatosMonitoreada:
+    """
+    Capa sobre el engine principal: timeouts de conexión y de sentencia,
+    interruptor alimentado por los errores del engine y un monitor que, con
+    el interruptor abierto, hace ping cada DB_REINTENTO segundos hasta que la
+    base vuelve. Mientras tanto las sesiones se abren sobre el respaldo de
+    solo lectura, si existe.
+    """
+    def __init__(self, engine, respaldo=None, tiempo_limite: float = DB_TIMEOUT_SENTENCIA,
+                 umbral: int = DB_FALLOS_PARA_ABRIR, intervalo: float = DB_REINTENTO):
+        self.engine = engine
+        self.respaldo = respaldo
+        self.intervalo = intervalo
+        self.interruptor = Interruptor(umbral, al_abrir=self._iniciar_monitor)
+        self.Sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.SesionRespaldo = sessionmaker(autocommit=False, autoflush=False, bind=respaldo) if respaldo else None
+        self.latencia_ms = None
+        self._monitor = None
+        self._lock = threading.Lock()
+        aplicar_tiempo_limite(engine, tiempo_limite)
+        self.vigilar(engine)
+
+    def vigilar(self, engine):
+        """Los errores y sentencias de `engine` alimentan el interruptor (la principal y, p. ej., su engine async)."""
+        event.listen(engine, 'handle_error', self._al_fallar)
+        event.listen(engine, 'after_cursor_execute', self._al_ejecutar)
+
+    def _al_fallar(self, contexto):
+        # Una sentencia cortada porque la petición agotó su plazo no dice nada de la base
+        if vencido():
+            return
+        if es_falla_de_servidor(contexto):
+            self.interruptor.registrar_fallo()
+
+    def _al_ejecutar(self, conn, cursor, sentencia, parametros, contexto, varias):
+        self.interruptor.registrar_exito()
+
+    @property
+    def solo_lectura(self):
+        """True mientras se atiende desde el respaldo."""
+        return self.interruptor.abierto and self.SesionRespaldo is not None
+
+    def sesion(self):
+        """Sesión sobre la principal o, con el interruptor abierto, sobre el respaldo."""
+        if not self.interruptor.abierto:
+            return self.Sesion()
+        if self.SesionRespaldo is None:
+            raise BaseDatosNoDisponible("La base de datos no está disponible", self.intervalo)
+        return self.SesionRespaldo()
+
+    def ping(self):
+        """SELECT 1 contra la principal; retorna la latencia en ms o None si falló."""
+        inicio = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"Ping a la base de datos principal fallido: {str(e)}")
+            return None
+        self.latencia_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        return self.latencia_ms
+
+    def _iniciar_monitor(self):
+        with self._lock:
+            if self._monitor is not None and self._monitor.is_alive():
+                return
+            self._monitor = threading.Thread(target=self._monitorear, name='salud-bd', daemon=True)
+            self._monitor.start()
+
+    def _monitorear(self):
+        # Las conexiones del pool pueden haber quedado colgadas: se descartan
+        self.engine.dispose()
+        while self.interruptor.abierto:
+            time.sleep(self.intervalo)
+            if self.ping() is not None:
+                self.interruptor.cerrar()
+
+    def estado(self):
+        abierto_desde = self.interruptor.abierto_desde
+        respaldo = None
+        if self.respaldo is not None:
+            ruta = self.respaldo.url.database.split('?')[0].removeprefix('file:')
+            respaldo = {
+                'generado_en': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(os.path.getmtime(ruta)))
+                if os.path.exists(ruta) else None
+            }
+        return {
+            'estado': 'ok' if abierto_desde is None else ('solo_lectura' if respaldo else 'sin_servicio'),
+            'principal': {
+                'interruptor': 'abierto' if abierto_desde is not None else 'cerrado',
+                'fallos': self.interruptor.fallos,
+                'abierto_hace_s': round(time.monotonic() - abierto_desde, 1) if abierto_desde is not None else None,
+                'latencia_ms': self.latencia_ms,
+            },
+            'respaldo': respaldo,
+        }
+
+
+class BaseSimulada:
+    """
+    Sustituto local de una base principal que se cuelga o rechaza conexiones,
+    para probar timeouts, interruptor y respaldo sin un servidor real (como
+    CanalLocal con Redis). Entrega conexiones SQLite a `ruta` y su `modo` se
+    cambia en caliente:
+    - 'normal': responde como la base real.
+    - 'colgada': las sentencias no terminan (solo las corta el límite por
+      sentencia) y conectar tarda DB_TIMEOUT_CONEXION antes de fallar.
+    - 'rechaza': conectar y ejecutar fallan al instante.
+    """
+    CONSULTA_SIN_FIN = "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) SELECT max(i) FROM r"
+
+    def __init__(self, ruta: str, timeout_conexion: float = DB_TIMEOUT_CONEXION):
+        self.ruta = ruta
+        self.timeout_conexion = timeout_conexion
+        self.modo = 'normal'
+
+    def conectar(self):
+        if self.modo == 'rechaza':
+            raise sqlite3.OperationalError("connection refused")
+        if self.modo == 'colgada':
+            time.sleep(self.timeout_conexion)
+            raise sqlite3.OperationalError("timed out while connecting")
+        return _ConexionSimulada(sqlite3.connect(self.ruta, check_same_thread=False), self)
+
+    def engine(self, **opciones):
+        return create_engine('sqlite://', creator=self.conectar, poolclass=QueuePool, **opciones)
+
+
+class _ConexionSimulada:
+    def __init__(self, conexion, base):
+        self._conexion = conexion
+        self._base = base
+
+    def __getattr__(self, nombre):
+        return getattr(self._conexion, nombre)
+
+    def cursor(self, *args):
+        return _CursorSimulado(self._conexion.cursor(*args), self._base)
+
+    def commit(self):
+        if self._base.modo == 'rechaza':
+            raise sqlite3.OperationalError("server closed the connection")
+        self._conexion.commit()
+
+
+class _CursorSimulado:
+    def __init__(self, cursor, base):
+        self._cursor = cursor
+        self._base = base
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _simular(self):
+        if self._base.modo == 'rechaza':
+            raise sqlite3.OperationalError("server closed the connection")
+        if self._base.modo == 'colgada':
+            self._cursor.execute(BaseSimulada.CONSULTA_SIN_FIN)
+
+    def execute(self, sentencia, parametros=()):
+        self._simular()
+        self._cursor.execute(sentencia, parametros)
+        return self
+
+    def executemany(self, sentencia, parametros):
+        self._simular()
+        self._cursor.executemany(sentencia, parametros)
+        return self
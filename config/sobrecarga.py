@@ -0,0 +1,297 @@
+# config/sobrecarga.py
+import os
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request, jsonify, g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+def _leer_plazos(texto: str):
+    """'horario_bp.get_horarios=3000,users.login=5000' -> {endpoint: ms}."""
+    plazos = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        endpoint, _, ms = parte.partition('=')
+        plazos[endpoint.strip()] = float(ms)
+    return plazos
+
+
+# Plazo por defecto de cada petición en ms (0: sin plazo). Cuenta desde que el
+# worker la recibe, o desde X-Request-Start si PLAZO_DESDE_PROXY=1
+PLAZO_PETICION_MS = float(os.getenv("PLAZO_PETICION_MS", "10000"))
+# Plazos por endpoint que reemplazan al de por defecto (0: sin plazo)
+PLAZOS_POR_RUTA = {
+    'users.create_users_lote': 0,
+    'perfilador_bp.resultado_perfilado': 0,
+    **_leer_plazos(os.getenv("PLAZOS_POR_RUTA", "")),
+}
+# Tomar el inicio de la petición del proxy (nginx: proxy_set_header X-Request-Start "t=${msec}")
+PLAZO_DESDE_PROXY = os.getenv("PLAZO_DESDE_PROXY", "0") == "1"
+# Segundos entre intentos de tomar cupo de una petición async que espera turno (modo ASGI)
+_PAUSA_ASYNC = 0.005
+# Peticiones que el proceso atiende a la vez (0 desactiva el control de admisión)
+# y cuántas pueden esperar turno antes de responder 503 al instante
+SOBRECARGA_EN_CURSO = int(os.getenv("SOBRECARGA_EN_CURSO", str(4 * (os.cpu_count() or 1))))
+SOBRECARGA_COLA = int(os.getenv("SOBRECARGA_COLA", str(SOBRECARGA_EN_CURSO)))
+
+# Endpoints fuera del control de admisión y sin plazo: salud (balanceadores),
+# SSE (conexiones de larga duración) y el perfilador (diagnóstico bajo carga)
+EXENTAS = ('salud_bp.get_salud', 'horario_bp.stream_horarios', 'perfilador_bp.iniciar_perfilado',
+           'perfilador_bp.estado_perfilado', 'perfilador_bp.detener_perfilado', 'perfilador_bp.resultado_perfilado')
+
+# Instante (time.monotonic) en que vence la petición en curso; None sin plazo
+plazo_peticion = ContextVar('plazo_peticion', default=None)
+
+
+class PlazoVencido(Exception):
+    """La petición agotó su plazo antes de un paso costoso: el cliente ya no espera la respuesta."""
+    def __init__(self, paso: str):
+        super().__init__(f"La petición superó su plazo antes de: {paso}")
+        self.paso = paso
+
+
+def restante():
+    """Segundos que le quedan a la petición en curso (None si no tiene plazo)."""
+    plazo = plazo_peticion.get()
+    return None if plazo is None else plazo - time.monotonic()
+
+
+def vencido():
+    plazo = plazo_peticion.get()
+    return plazo is not None and time.monotonic() >= plazo
+
+
+def verificar_plazo(paso: str):
+    """Punto de control antes de un paso costoso. Lanza PlazoVencido si ya no hay tiempo; sin plazo no hace nada."""
+    if vencido():
+        raise PlazoVencido(paso)
+
+
+@contextmanager
+def sin_plazo():
+    """Lo que se ejecute dentro no se corta por el plazo de la petición (registro de algo que ya ocurrió)."""
+    token = plazo_peticion.set(None)
+    try:
+        yield
+    finally:
+        plazo_peticion.reset(token)
+
+
+@event.listens_for(Session, 'after_flush')
+def _anotar_escritura_orm(sesion, contexto):
+    sesion.info['escribio'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _anotar_escritura_dml(estado):
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        estado.session.info['escribio'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _escritura_confirmada(sesion):
+    """
+    Con una escritura ya confirmada, la petición deja de tener plazo: cortar
+    lo que sigue no deshace el cambio, solo le quita la respuesta al cliente
+    y lo lleva a repetir algo que ya ocurrió. Las sesiones con
+    info['conserva_plazo'] (reservas de Idempotency-Key) no cuentan.
+    """
+    if sesion.info.pop('escribio', False) and not sesion.info.get('conserva_plazo'):
+        plazo_peticion.set(None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _escritura_descartada(sesion):
+    sesion.info.pop('escribio', None)
+
+
+class ControlCarga:
+    """
+    Control de admisión del proceso: a lo sumo `en_curso` peticiones a la vez
+    y `cola` esperando turno. Con la cola llena se responde 503 sin tocar la
+    base; una petición que espera turno se descarta si vence su plazo
+    mientras espera. Así, con el servidor saturado, no se gasta trabajo en
+    respuestas que el cliente ya abandonó.
+    """
+    def __init__(self, en_curso: int = SOBRECARGA_EN_CURSO, cola: int = SOBRECARGA_COLA):
+        self.en_curso = en_curso
+        self.cola = cola
+        self._cupos = threading.BoundedSemaphore(en_curso) if en_curso else None
+        self._lock = threading.Lock()
+        self.esperando = 0
+        self.atendiendo = 0
+        self.rechazadas = 0
+        self.vencidas = 0
+
+    @property
+    def activo(self):
+        return self._cupos is not None
+
+    def entrar(self, plazo: float = None):
+        """True si la petición obtuvo cupo; False si hay que rechazarla."""
+        if self._cupos.acquire(blocking=False):
+            with self._lock:
+                self.atendiendo += 1
+            return True
+        if not self._hacer_cola():
+            return False
+        obtuvo = False
+        try:
+            espera = None if plazo is None else max(0, plazo - time.monotonic())
+            obtuvo = self._cupos.acquire(timeout=espera)
+        finally:
+            self._salir_de_la_cola(obtuvo)
+        return obtuvo
+
+    async def entrar_async(self, plazo: float = None):
+        """
+        Como entrar(), para los handlers async (asgi.py): comparten los cupos
+        con las peticiones de la app Flask. La espera de turno no bloquea el
+        event loop; si el cliente se va mientras espera, no se toma el cupo.
+        """
+        if self._cupos.acquire(blocking=False):
+            with self._lock:
+                self.atendiendo += 1
+            return True
+        if not self._hacer_cola():
+            return False
+        obtuvo = False
+        try:
+            while not obtuvo and (plazo is None or time.monotonic() < plazo):
+                await asyncio.sleep(_PAUSA_ASYNC)
+                obtuvo = self._cupos.acquire(blocking=False)
+        finally:
+            self._salir_de_la_cola(obtuvo)
+        return obtuvo
+
+    def _hacer_cola(self):
+        with self._lock:
+            if self.esperando >= self.cola:
+                self.rechazadas += 1
+                return False
+            self.esperando += 1
+        return True
+
+    def _salir_de_la_cola(self, obtuvo: bool):
+        with self._lock:
+            self.esperando -= 1
+            if obtuvo:
+                self.atendiendo += 1
+            else:
+                self.vencidas += 1
+
+    def salir(self):
+        with self._lock:
+            self.atendiendo -= 1
+        self._cupos.release()
+
+    def contar_vencida(self):
+        with self._lock:
+            self.vencidas += 1
+
+    def estado(self):
+        return {
+            'en_curso': self.atendiendo,
+            'en_cola': self.esperando,
+            'max_en_curso': self.en_curso,
+            'max_cola': self.cola,
+            'rechazadas': self.rechazadas,
+            'vencidas': self.vencidas,
+        }
+
+
+control = ControlCarga()
+
+
+def _inicio_segun_proxy(cabeceras):
+    """Instante monotónico en que el proxy recibió la petición (X-Request-Start), o None."""
+    valor = cabeceras.get('X-Request-Start', '').removeprefix('t=')
+    try:
+        inicio = float(valor)
+    except ValueError:
+        return None
+    # nginx envía segundos con decimales; otros proxies, milisegundos o microsegundos
+    if inicio > 1e14:
+        inicio /= 1e6
+    elif inicio > 1e11:
+        inicio /= 1e3
+    demora = time.time() - inicio
+    # Relojes desfasados: una demora negativa o absurda no se descuenta
+    return time.monotonic() - demora if 0 <= demora < 300 else None
+
+
+def plazo_de(endpoint: str, cabeceras):
+    """
+    Instante en que vence una petición a `endpoint` (nombre del endpoint de
+    la app Flask) con estas cabeceras, o None si no tiene plazo. Lo usan
+    init_sobrecarga y los handlers async de asgi.py.
+    """
+    ms = PLAZOS_POR_RUTA.get(endpoint, PLAZO_PETICION_MS)
+    # El cliente puede acortar el plazo (cuánto está dispuesto a esperar), nunca alargarlo
+    try:
+        pedido = float(cabeceras.get('X-Plazo-Ms') or 0)
+    except ValueError:
+        pedido = 0
+    if pedido > 0:
+        ms = min(ms, pedido) if ms else pedido
+    if not ms:
+        return None
+    inicio = (_inicio_segun_proxy(cabeceras) if PLAZO_DESDE_PROXY else None) or time.monotonic()
+    return inicio + ms / 1000
+
+
+# Respuesta 503 de una petición rechazada o abandonada: (cuerpo, código, headers)
+RECHAZO_REINTENTAR_EN = 1
+CABECERAS_RECHAZO = {'Content-Type': 'application/json; charset=utf-8', 'Retry-After': str(RECHAZO_REINTENTAR_EN)}
+MENSAJE_VENCIDA_EN_COLA = 'La petición superó su plazo esperando en la cola del servidor'
+MENSAJE_OCUPADO = 'Servidor ocupado. Intenta de nuevo en unos segundos.'
+
+
+def _rechazar(mensaje: str):
+    return jsonify({'error': mensaje, 'reintentar_en': RECHAZO_REINTENTAR_EN}), 503, CABECERAS_RECHAZO
+
+
+def respuesta_plazo_vencido(e: PlazoVencido):
+    """503 para una petición que se abandonó en un punto de control o a mitad de una consulta."""
+    control.contar_vencida()
+    logger.warning(f"Petición abandonada por plazo vencido ({e.paso}): {request.method} {request.path}")
+    return _rechazar(str(e))
+
+
+def init_sobrecarga(app):
+    """
+    Plazo por petición y control de admisión. Va antes que los demás
+    before_request: una petición rechazada no verifica el JWT ni abre una
+    sesión de base de datos.
+    """
+    @app.before_request
+    def admitir_peticion():
+        if request.endpoint is None or request.blueprint is None or request.endpoint in EXENTAS:
+            return
+        plazo = plazo_de(request.endpoint, request.headers)
+        plazo_peticion.set(plazo)
+        if plazo is not None:
+            if time.monotonic() >= plazo:
+                control.contar_vencida()
+                return _rechazar(MENSAJE_VENCIDA_EN_COLA)
+        if control.activo:
+            if not control.entrar(plazo):
+                logger.warning(f"Petición descartada por sobrecarga: {request.method} {request.path} "
+                               f"({control.atendiendo} en curso, {control.esperando} en cola)")
+                return _rechazar(MENSAJE_OCUPADO)
+            g.con_cupo = True
+
+    @app.teardown_request
+    def liberar_peticion(error=None):
+        # El hilo atiende otras peticiones después: el plazo no debe quedar puesto
+        plazo_peticion.set(None)
+        if g.pop('con_cupo', False):
+            control.salir()
+
+    app.register_error_handler(PlazoVencido, respuesta_plazo_vencido)
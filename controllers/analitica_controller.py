@@ -0,0 +1,123 @@
+#controllers/analitica_controller.py
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from config.database import get_db_session
+from services.snapshot_service import snapshots, a_minutos, indice_dia
+from config.instituciones import institucion_actual
+
+# Inicializar Blueprint
+analitica_bp = Blueprint('analitica_bp', __name__)
+
+JSON = {'Content-Type': 'application/json; charset=utf-8'}
+# Parámetro ?por= -> columna del snapshot
+AGRUPACIONES = {'salon': 'salon', 'docente': 'docente', 'usuario': 'user_id'}
+
+
+def _snapshot_actualizado():
+    """Carga o sincroniza el snapshot de la institución antes de responder una consulta."""
+    snapshot = snapshots.de(institucion_actual())
+    db = next(get_db_session())
+    try:
+        snapshot.asegurar_actualizado(db)
+    finally:
+        db.close()
+    return snapshot
+
+
+def _leer_dia():
+    dia = request.args.get('dia', '')
+    if indice_dia(dia) < 0:
+        raise ValueError("Parámetro 'dia' inválido (Lunes a Domingo)")
+    return dia
+
+
+def _leer_minutos(nombre):
+    try:
+        return a_minutos(request.args[nombre])
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"Parámetro '{nombre}' inválido (formato HH:MM)")
+
+
+# ---------------------------------------------------------------------
+# GET - Ocupación de salones por día
+# ---------------------------------------------------------------------
+@analitica_bp.route('/analitica/ocupacion', methods=['GET'])
+@jwt_required()
+def get_ocupacion():
+    try:
+        return jsonify(_snapshot_actualizado().ocupacion()), 200, JSON
+    except Exception as e:
+        logger.error(f"Error al calcular ocupación: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error al calcular ocupación: {str(e)}'}), 500, JSON
+
+
+# ---------------------------------------------------------------------
+# GET - Horarios que se cruzan (?por=salon|docente|usuario)
+# ---------------------------------------------------------------------
+@analitica_bp.route('/analitica/solapamientos', methods=['GET'])
+@jwt_required()
+def get_solapamientos():
+    por = request.args.get('por', 'salon')
+    if por not in AGRUPACIONES:
+        return jsonify({'error': "Parámetro 'por' inválido (salon, docente o usuario)"}), 400, JSON
+    try:
+        return jsonify(_snapshot_actualizado().solapamientos(AGRUPACIONES[por])), 200, JSON
+    except Exception as e:
+        logger.error(f"Error al calcular solapamientos: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error al calcular solapamientos: {str(e)}'}), 500, JSON
+
+
+# ---------------------------------------------------------------------
+# GET - Salones libres en una franja (?dia=&inicio=HH:MM&fin=HH:MM)
+# ---------------------------------------------------------------------
+@analitica_bp.route('/analitica/salones-libres', methods=['GET'])
+@jwt_required()
+def get_salones_libres():
+    try:
+        dia, inicio, fin = _leer_dia(), _leer_minutos('inicio'), _leer_minutos('fin')
+        if fin <= inicio:
+            raise ValueError("'fin' debe ser posterior a 'inicio'")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, JSON
+    try:
+        return jsonify(_snapshot_actualizado().salones_libres(dia, inicio, fin)), 200, JSON
+    except Exception as e:
+        logger.error(f"Error al buscar salones libres: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error al buscar salones libres: {str(e)}'}), 500, JSON
+
+
+# ---------------------------------------------------------------------
+# GET - Huecos libres de un salón en un día (?salon=&dia=)
+# ---------------------------------------------------------------------
+@analitica_bp.route('/analitica/huecos', methods=['GET'])
+@jwt_required()
+def get_huecos():
+    salon = request.args.get('salon')
+    try:
+        if not salon:
+            raise ValueError("Falta el parámetro 'salon'")
+        dia = _leer_dia()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, JSON
+    try:
+        return jsonify(_snapshot_actualizado().huecos(salon, dia)), 200, JSON
+    except Exception as e:
+        logger.error(f"Error al calcular huecos: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error al calcular huecos: {str(e)}'}), 500, JSON
+
+
+# ---------------------------------------------------------------------
+# GET - Estado del snapshot (filas, memoria, versión)
+# ---------------------------------------------------------------------
+@analitica_bp.route('/analitica/snapshot', methods=['GET'])
+@jwt_required()
+def get_estado_snapshot():
+    try:
+        return jsonify(_snapshot_actualizado().estado()), 200, JSON
+    except Exception as e:
+        logger.error(f"Error al leer el snapshot: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error al leer el snapshot: {str(e)}'}), 500, JSON
@@ -0,0 +1,23 @@
+#controllers/auditoria.py
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from flask_jwt_extended import get_jwt_identity
+from services.auditoria_service import auditoria
+from config.instituciones import institucion_actual
+
+
+def auditar(accion: str, entidad: str, entidad_id: int = None, **detalle):
+    """
+    Registra una escritura hecha por el usuario del token actual. Solo encola
+    el evento: la ruta no espera a la base de datos. Va después de confirmar
+    la escritura; las contraseñas nunca se pasan en `detalle`.
+    """
+    try:
+        actor_id = get_jwt_identity()
+    except RuntimeError:
+        # Rutas sin JWT verificado (p. ej. registro público)
+        actor_id = None
+    actor_id = int(actor_id) if isinstance(actor_id, str) else actor_id
+    auditoria.registrar(accion, entidad, entidad_id, actor_id, detalle or None, institucion_actual())
@@ -0,0 +1,59 @@
+#controllers/auditoria_controller.py
+import json
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from flask import Blueprint, request, jsonify
+from config.database import get_db_session
+from controllers.user_controller import role_required
+from services.auditoria_service import AuditoriaService, ENTIDADES
+
+# Inicializar Blueprint
+auditoria_bp = Blueprint('auditoria_bp', __name__)
+
+# Máximo de eventos por página
+MAX_EVENTOS_PAGINA = 200
+
+# ---------------------------------------------------------------------
+# GET - Registro de auditoría (solo admin)
+# ---------------------------------------------------------------------
+@auditoria_bp.route('/auditoria', methods=['GET'])
+@role_required('admin')
+def get_auditoria():
+    """
+    Eventos de auditoría, los más recientes primero. La paginación es por
+    keyset: la siguiente página se pide con `antes_de=<siguiente>` de la
+    respuesta anterior. Filtros opcionales: entidad, entidad_id y actor_id.
+    """
+    limite = request.args.get('limite', 50, type=int)
+    antes_de = request.args.get('antes_de', type=int)
+    entidad = request.args.get('entidad')
+    entidad_id = request.args.get('entidad_id', type=int)
+    actor_id = request.args.get('actor_id', type=int)
+    if limite is None or not 1 <= limite <= MAX_EVENTOS_PAGINA:
+        return jsonify({'error': f"'limite' debe estar entre 1 y {MAX_EVENTOS_PAGINA}"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    if entidad is not None and entidad not in ENTIDADES:
+        return jsonify({'error': f"'entidad' debe ser una de: {', '.join(ENTIDADES)}"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    db = next(get_db_session())
+    service = AuditoriaService(db)
+    try:
+        eventos = service.listar_eventos(limite, antes_de, entidad, entidad_id, actor_id)
+        return jsonify({
+            'eventos': [
+                {
+                    'id': e.id,
+                    'ocurrido_en': e.ocurrido_en.isoformat(),
+                    'actor_id': e.actor_id,
+                    'accion': e.accion,
+                    'entidad': e.entidad,
+                    'entidad_id': e.entidad_id,
+                    'detalle': json.loads(e.detalle) if e.detalle else None
+                } for e in eventos
+            ],
+            # Sin más páginas cuando la actual viene incompleta
+            'siguiente': eventos[-1].id if len(eventos) == limite else None
+        }), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
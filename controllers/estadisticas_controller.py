@@ -0,0 +1,33 @@
+#controllers/estadisticas_controller.py
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from flask import Blueprint, jsonify
+from config.database import get_db_session
+from controllers.user_controller import role_required
+from services.estadisticas_service import EstadisticasService, CACHE_TTL
+
+# Inicializar Blueprint
+estadisticas_bp = Blueprint('estadisticas_bp', __name__)
+
+# ---------------------------------------------------------------------
+# GET - Resumen de estadísticas del dashboard (solo admin)
+# ---------------------------------------------------------------------
+@estadisticas_bp.route('/estadisticas', methods=['GET'])
+@role_required('admin')
+def get_estadisticas():
+    """Conteos y agregados calculados en la base de datos con GROUP BY/COUNT/SUM"""
+    db = next(get_db_session())
+    service = EstadisticasService(db)
+    try:
+        resumen = service.obtener_resumen()
+        return jsonify(resumen), 200, {
+            'Content-Type': 'application/json; charset=utf-8',
+            'Cache-Control': f'private, max-age={int(CACHE_TTL)}'
+        }
+    except Exception as e:
+        logger.error(f"Error al calcular estadísticas: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error al calcular estadísticas: {str(e)}'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
@@ -1,63 +1,273 @@
 #controllers/horario_controller.py
+import os
+import json
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from config.database import get_db_session
 from controllers.user_controller import role_required  # Importa el decorador actualizado
-from services.horario_service import HorarioService
+from controllers.idempotencia import idempotente
+from controllers.parametros import leer_ids, ordenar_por_ids
+from controllers.auditoria import auditar
+from services.horario_service import HorarioService, TIPOS_EVENTO, serializar_horario
+from services.ical_service import IcalService
 from services.user_service import UserService
+from services.event_broker import broker
+from repositories.horario_repository import CAMPOS_FILTRO, CAMPOS_EDITABLES, CAMPOS_OBLIGATORIOS
+from config.periodos import PERIODO_ACTIVO, validar_periodo
+from config.sobrecarga import verificar_plazo, PlazoVencido
+from config.instituciones import institucion_actual, usar_institucion, INSTITUCION_POR_DEFECTO
+from sqlalchemy.exc import OperationalError
 
 # Inicializar Blueprint
 horario_bp = Blueprint('horario_bp', __name__)
 
+# Segundos entre comentarios de keep-alive en las conexiones SSE
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+# Segundos que vale un ticket del stream SSE para abrir la conexión
+SSE_TICKET_SEGUNDOS = float(os.getenv("SSE_TICKET_SEGUNDOS", "30"))
+# Máximo de resultados por búsqueda
+MAX_RESULTADOS_BUSQUEDA = 200
+
+
+def _periodo_consultado():
+    """Periodo de `?periodo=` (por defecto, el activo). Lanza ValueError si no es válido."""
+    return validar_periodo(request.args.get('periodo') or PERIODO_ACTIVO)
+
 # ---------------------------------------------------------------------
 # GET - Listar todos los horarios
 # ---------------------------------------------------------------------
 @horario_bp.route('/horarios', methods=['GET'])
 @jwt_required()
 def get_horarios():
+    if 'ids' in request.args:
+        return _get_horarios_por_ids()
     logger.info("Consulta de todos los horarios")
     # Log del header de autorización para debugging
     auth_header = request.headers.get('Authorization', 'No header')
     logger.info(f"Authorization header recibido: {auth_header[:50] if len(auth_header) > 50 else auth_header}...")
+    try:
+        periodo = _periodo_consultado()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
     db = next(get_db_session())
     service = HorarioService(db)
-    user_service = UserService(db)
     try:
-        horarios = service.listar_horarios()
-        resultado = []
-        for h in horarios:
-            usuario_email = 'Sin asignar'
-            if h.user_id:
-                try:
-                    usuario = user_service.obtener_usuario_por_id(h.user_id)
-                    usuario_email = usuario.email if usuario else 'Usuario eliminado'
-                except Exception as e:
-                    logger.warning(f"Error obteniendo usuario {h.user_id}: {str(e)}")
-                    usuario_email = 'Error al obtener usuario'
-            
-            resultado.append({
-                'id': h.id,
-                'materia': h.materia,
-                'docente': h.docente,
-                'dia': h.dia,
-                'hora_inicio': str(h.hora_inicio) if h.hora_inicio else None,
-                'hora_fin': str(h.hora_fin) if h.hora_fin else None,
-                'salon': h.salon,
-                'user_id': h.user_id,
-                'usuario': usuario_email
-            })
-        
-        return jsonify(resultado), 200, {'Content-Type': 'application/json; charset=utf-8'}
+        # La versión se lee antes del listado: lo que cambie después llegará en el próximo delta
+        version = service.obtener_version_actual()
+        verificar_plazo('listado de horarios')
+        # El email del usuario llega en la misma consulta (JOIN), no una consulta por horario
+        filas = service.listar_horarios(periodo)
+        verificar_plazo('serialización del listado')
+        resultado = [
+            dict(serializar_horario(h), usuario=email or ('Usuario eliminado' if h.user_id else 'Sin asignar'))
+            for h, email in filas
+        ]
+        return jsonify(resultado), 200, {'Content-Type': 'application/json; charset=utf-8', 'X-Horarios-Version': str(version),
+                                         'X-Periodo-Activo': PERIODO_ACTIVO}
+    except (PlazoVencido, OperationalError):
+        # 503 con Retry-After (config/sobrecarga.py y controllers/salud_controller.py)
+        raise
     except Exception as e:
         logger.error(f"Error al obtener horarios: {str(e)}", exc_info=True)
         return jsonify({'error': f'Error al obtener horarios: {str(e)}'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
     finally:
         db.close()
 
+
+def _get_horarios_por_ids():
+    """
+    GET /horarios?ids=3,1,2: varios horarios en una sola petición y una sola
+    consulta, en el orden pedido y sin importar el periodo. Los IDs que no
+    existen se informan en `faltantes`.
+    """
+    try:
+        ids = leer_ids(request.args['ids'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    db = next(get_db_session())
+    service = HorarioService(db)
+    try:
+        filas, faltantes = ordenar_por_ids(ids, service.obtener_horarios_por_ids(ids), clave=lambda fila: fila[0].id)
+        logger.info(f"Consulta de {len(ids)} horarios por ID ({len(faltantes)} faltantes)")
+        return jsonify({
+            'horarios': [
+                dict(serializar_horario(h), usuario=email or ('Usuario eliminado' if h.user_id else 'Sin asignar'))
+                for h, email in filas
+            ],
+            'faltantes': faltantes
+        }), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+# ---------------------------------------------------------------------
+# GET - Cambios desde una versión (sincronización incremental)
+# ---------------------------------------------------------------------
+@horario_bp.route('/horarios/cambios', methods=['GET'])
+@jwt_required()
+def get_cambios_horarios():
+    """
+    Retorna solo los horarios creados/modificados y los IDs eliminados con
+    versión mayor a `since`. El cliente aplica los eventos en orden de versión
+    y usa `version` como `since` de la siguiente sincronización. Solo cubre el
+    periodo activo: si `periodo` cambia, el cliente debe recargar el listado.
+    """
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'error': "El parámetro 'since' es obligatorio y debe ser un entero >= 0"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    db = next(get_db_session())
+    service = HorarioService(db)
+    try:
+        cambios, eliminados = service.obtener_cambios(since)
+        version = max([h.version for h, _ in cambios] + [e.version for e in eliminados] + [since])
+        logger.info(f"Cambios desde la versión {since}: {len(cambios)} modificados, {len(eliminados)} eliminados")
+        return jsonify({
+            'version': version,
+            'periodo': PERIODO_ACTIVO,
+            'cambios': [
+                {
+                    'id': h.id,
+                    'materia': h.materia,
+                    'docente': h.docente,
+                    'dia': h.dia,
+                    'hora_inicio': str(h.hora_inicio) if h.hora_inicio else None,
+                    'hora_fin': str(h.hora_fin) if h.hora_fin else None,
+                    'salon': h.salon,
+                    'user_id': h.user_id,
+                    'usuario': email or ('Usuario eliminado' if h.user_id else 'Sin asignar'),
+                    'version': h.version
+                } for h, email in cambios
+            ],
+            'eliminados': [
+                {'id': e.horario_id, 'version': e.version} for e in eliminados
+            ]
+        }), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+# ---------------------------------------------------------------------
+# GET - Búsqueda por materia, docente o salón
+# ---------------------------------------------------------------------
+@horario_bp.route('/horarios/buscar', methods=['GET'])
+@jwt_required()
+def buscar_horarios():
+    """
+    Busca en el índice de texto: cada término se compara como prefijo y sin
+    distinguir tildes ni mayúsculas. Los resultados vienen ordenados por
+    relevancia. Con `?scope=mis-horarios` solo busca en los propios.
+    """
+    texto = request.args.get('q', '').strip()
+    limite = request.args.get('limite', 50, type=int)
+    if not texto:
+        return jsonify({'error': "El parámetro 'q' es obligatorio"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    if limite is None or not 1 <= limite <= MAX_RESULTADOS_BUSQUEDA:
+        return jsonify({'error': f"'limite' debe estar entre 1 y {MAX_RESULTADOS_BUSQUEDA}"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    user_id = None
+    if request.args.get('scope') == 'mis-horarios':
+        user_id = get_jwt_identity()
+        user_id = int(user_id) if isinstance(user_id, str) else user_id
+
+    db = next(get_db_session())
+    service = HorarioService(db)
+    try:
+        horarios = service.buscar_horarios(texto, limite, user_id)
+        return jsonify([serializar_horario(h) for h in horarios]), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    except Exception as e:
+        logger.error(f"Error al buscar horarios: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error al buscar horarios: {str(e)}'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+def _tickets_stream():
+    # El salt separa estos tickets de cualquier otro valor firmado con la misma clave
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt='stream-horarios')
+
+# ---------------------------------------------------------------------
+# POST - Ticket para abrir el stream de cambios
+# ---------------------------------------------------------------------
+@horario_bp.route('/horarios/stream/ticket', methods=['POST'])
+@jwt_required()
+def crear_ticket_stream():
+    """
+    EventSource no permite headers, así que el stream se abre con `?ticket=`.
+    El ticket vence en SSE_TICKET_SEGUNDOS y solo sirve para conectarse al
+    stream: el access token no viaja en la URL (logs de proxies, historial).
+    """
+    current_user_id = get_jwt_identity()
+    current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
+    ticket = _tickets_stream().dumps({'user_id': current_user_id, 'institucion': institucion_actual()})
+    return jsonify({'ticket': ticket, 'expira_en': SSE_TICKET_SEGUNDOS}), 201, {
+        'Content-Type': 'application/json; charset=utf-8', 'Cache-Control': 'no-store'}
+
+# ---------------------------------------------------------------------
+# GET - Stream de cambios en tiempo real (Server-Sent Events)
+# ---------------------------------------------------------------------
+@horario_bp.route('/horarios/stream', methods=['GET'])
+def stream_horarios():
+    """
+    Mantiene abierta una conexión SSE y envía los eventos de HorarioService.
+    Se autentica con `?ticket=` (POST /horarios/stream/ticket). Al reconectar
+    con un ticket vencido responde 401 y el cliente pide otro.
+    Los usuarios que no son admin (o que piden `?scope=mis-horarios`) solo
+    reciben eventos de sus propios horarios.
+    """
+    try:
+        datos_ticket = _tickets_stream().loads(request.args.get('ticket', ''), max_age=SSE_TICKET_SEGUNDOS)
+    except BadSignature:
+        # SignatureExpired es subclase: vencido o alterado responden igual
+        return jsonify({'error': 'Ticket del stream inválido o vencido'}), 401, {'Content-Type': 'application/json; charset=utf-8'}
+    current_user_id = datos_ticket['user_id']
+    institucion = datos_ticket['institucion']
+
+    with usar_institucion(institucion):
+        db = next(get_db_session())
+        try:
+            usuario = UserService(db).obtener_usuario_por_id(current_user_id)
+            es_admin = bool(usuario and usuario.role == 'admin')
+        finally:
+            db.close()
+    if usuario is None:
+        return jsonify({'error': 'Ticket del stream inválido o vencido'}), 401, {'Content-Type': 'application/json; charset=utf-8'}
+
+    solo_propios = not es_admin or request.args.get('scope') == 'mis-horarios'
+
+    def filtro(evento):
+        if evento.get('tipo') not in TIPOS_EVENTO or evento.get('institucion', INSTITUCION_POR_DEFECTO) != institucion:
+            return False
+        return not solo_propios or evento.get('user_ids') is None or current_user_id in evento['user_ids']
+
+    suscripcion = broker.suscribir(filtro)
+    logger.info(f"Usuario {current_user_id} conectado al stream de horarios (solo propios: {solo_propios})")
+
+    def generar():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                evento = suscripcion.siguiente(timeout=SSE_HEARTBEAT)
+                if evento is None:
+                    yield ': ping\n\n'
+                    continue
+                if solo_propios and evento.get('user_ids') is None:
+                    # Cambio que puede afectar al usuario sin saber cuál: solo se pide resincronizar
+                    evento = {'tipo': 'resync', 'version': evento.get('version')}
+                datos = {clave: valor for clave, valor in evento.items() if clave not in ('user_ids', 'institucion')}
+                cabecera = f"id: {evento['version']}\n" if evento.get('version') else ''
+                yield f"{cabecera}event: {evento['tipo']}\ndata: {json.dumps(datos)}\n\n"
+        finally:
+            broker.cancelar(suscripcion)
+            logger.info(f"Usuario {current_user_id} desconectado del stream de horarios")
+
+    return Response(stream_with_context(generar()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 # ---------------------------------------------------------------------
 # GET - Obtener horario por ID
 # ---------------------------------------------------------------------
@@ -90,6 +300,7 @@ def get_horario(horario_id):
 @horario_bp.route('/horarios', methods=['POST'])
 @jwt_required()
 @role_required('admin')
+@idempotente
 def create_horario():
     data = request.get_json()
     materia = data.get('materia')
@@ -99,10 +310,15 @@ def create_horario():
     hora_fin = data.get('hora_fin')
     salon = data.get('salon')
     user_id = data.get('user_id')  # Nuevo: aceptar user_id opcional
+    periodo = data.get('periodo')  # Opcional: por defecto, el periodo activo
 
     if not all([materia, docente, dia, hora_inicio, hora_fin, salon]):
         logger.warning("Intento de crear horario sin datos completos")
         return jsonify({'error': 'Todos los campos son obligatorios'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    try:
+        periodo = validar_periodo(periodo) if periodo is not None else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
 
     db = next(get_db_session())
     service = HorarioService(db)
@@ -118,7 +334,8 @@ def create_horario():
                 return jsonify({'error': f'El usuario con ID {user_id} no existe'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
         
         # Crear horario con el user_id proporcionado (puede ser None)
-        horario = service.crear_horario(materia, docente, dia, hora_inicio, hora_fin, salon, user_id)
+        horario = service.crear_horario(materia, docente, dia, hora_inicio, hora_fin, salon, user_id, periodo)
+        auditar('crear', 'horario', horario.id, user_id=horario.user_id, periodo=horario.periodo)
         logger.info(f"Horario creado: {materia} - {docente} (asignado a usuario: {user_id if user_id else 'Sin asignar'})")
         return jsonify({
             'id': horario.id,
@@ -128,7 +345,8 @@ def create_horario():
             'hora_inicio': str(horario.hora_inicio) if horario.hora_inicio else None,
             'hora_fin': str(horario.hora_fin) if horario.hora_fin else None,
             'salon': horario.salon,
-            'user_id': horario.user_id
+            'user_id': horario.user_id,
+            'periodo': horario.periodo
         }), 201, {'Content-Type': 'application/json; charset=utf-8'}
     except Exception as e:
         logger.error(f"Error al crear horario: {str(e)}", exc_info=True)
@@ -176,6 +394,7 @@ def update_horario(horario_id):
         
         # Actualizar horario con el nuevo user_id
         horario = service.actualizar_horario(horario_id, materia, docente, dia, hora_inicio, hora_fin, salon, user_id)
+        auditar('actualizar', 'horario', horario_id, cambios={k: v for k, v in data.items() if k in CAMPOS_EDITABLES})
         logger.info(f"Horario actualizado por admin: {horario_id} (usuario asignado: {user_id if user_id else 'Sin asignar'})")
         return jsonify({
             'id': horario.id,
@@ -190,6 +409,78 @@ def update_horario(horario_id):
     finally:
         db.close()
 
+# ---------------------------------------------------------------------
+# PATCH - Actualización parcial de horario (solo admin)
+# ---------------------------------------------------------------------
+def _leer_mascara(data, permitidos):
+    """
+    Valida la máscara de campos de un PATCH o de los `cambios` de un lote:
+    solo campos permitidos, valores de texto en los campos de texto,
+    null/"" únicamente en los campos que lo admiten (salon, user_id) y
+    user_id entero.
+    """
+    if not isinstance(data, dict) or not data:
+        raise ValueError("Debe indicar al menos un campo a modificar")
+    no_validos = set(data) - set(permitidos)
+    if no_validos:
+        raise ValueError(f"Campos no editables: {', '.join(sorted(no_validos))}")
+    no_texto = [campo for campo in data
+                if campo != 'user_id' and data[campo] is not None and not isinstance(data[campo], str)]
+    if no_texto:
+        raise ValueError(f"Los campos {', '.join(sorted(no_texto))} deben ser texto")
+    vacios = [campo for campo in CAMPOS_OBLIGATORIOS if campo in data and data[campo] in (None, '')]
+    if vacios:
+        raise ValueError(f"Los campos {', '.join(vacios)} no pueden quedar vacíos")
+    cambios = dict(data)
+    if cambios.get('user_id') == '':
+        # "" desasigna igual que null
+        cambios['user_id'] = None
+    elif cambios.get('user_id') is not None:
+        user_id = cambios['user_id']
+        if isinstance(user_id, bool) or not isinstance(user_id, (int, str)) or not str(user_id).strip().isdigit():
+            raise ValueError("'user_id' debe ser un número entero")
+        cambios['user_id'] = int(user_id)
+    return cambios
+
+
+@horario_bp.route('/horarios/<int:horario_id>', methods=['PATCH'])
+@role_required('admin')
+def patch_horario(horario_id):
+    try:
+        cambios = _leer_mascara(request.get_json(silent=True), CAMPOS_EDITABLES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    db = next(get_db_session())
+    service = HorarioService(db)
+    user_service = UserService(db)
+    try:
+        # Solo se consulta el usuario cuando se reasigna a uno concreto
+        if cambios.get('user_id') is not None:
+            if not user_service.obtener_usuario_por_id(cambios['user_id']):
+                logger.warning(f"Intento de asignar horario a usuario inexistente: {cambios['user_id']}")
+                return jsonify({'error': f"El usuario con ID {cambios['user_id']} no existe"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+        horario = service.actualizar_horario_parcial(horario_id, cambios)
+        if not horario:
+            return jsonify({'error': 'Horario no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+        auditar('actualizar', 'horario', horario_id, cambios=cambios)
+        logger.info(f"Horario {horario_id} actualizado parcialmente por admin: {list(cambios)}")
+        return jsonify({
+            'id': horario.id,
+            'materia': horario.materia,
+            'docente': horario.docente,
+            'dia': horario.dia,
+            'hora_inicio': str(horario.hora_inicio) if horario.hora_inicio else None,
+            'hora_fin': str(horario.hora_fin) if horario.hora_fin else None,
+            'salon': horario.salon,
+            'user_id': horario.user_id
+        }), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
 # ---------------------------------------------------------------------
 # DELETE - Eliminar horario (solo admin)
 # ---------------------------------------------------------------------
@@ -201,6 +492,7 @@ def delete_horario(horario_id):
     try:
         horario = service.eliminar_horario(horario_id)
         if horario:
+            auditar('eliminar', 'horario', horario_id)
             logger.info(f"Horario eliminado: {horario_id}")
             return jsonify({'message': 'Horario eliminado correctamente'}), 200, {'Content-Type': 'application/json; charset=utf-8'}
         logger.warning(f"Horario no encontrado para eliminar: {horario_id}")
@@ -209,6 +501,97 @@ def delete_horario(horario_id):
         db.close()
 
 
+# =====================================================================
+# 📦 OPERACIONES POR LOTE (solo admin)
+# =====================================================================
+def _leer_seleccion_lote(data):
+    """
+    Valida la selección de una operación por lote.
+    Acepta {"ids": [1, 2, ...]} y/o {"filtro": {"user_id": 3, "docente": "..."}}.
+    """
+    ids = data.get('ids')
+    filtros = data.get('filtro') or {}
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise ValueError("'ids' debe ser una lista de enteros")
+    if not isinstance(filtros, dict):
+        raise ValueError("'filtro' debe ser un objeto")
+    no_validos = set(filtros) - set(CAMPOS_FILTRO)
+    if no_validos:
+        raise ValueError(f"Campos de filtro no permitidos: {', '.join(sorted(no_validos))}")
+    if not ids and not filtros:
+        raise ValueError("Debe indicar 'ids' o 'filtro'")
+    return ids, filtros
+
+
+# POST - Actualizar varios horarios con un solo UPDATE
+# =====================================================================
+@horario_bp.route('/horarios/lote/actualizar', methods=['POST'])
+@role_required('admin')
+@idempotente
+def bulk_update_horarios():
+    """Aplica los mismos cambios a todos los horarios seleccionados"""
+    data = request.get_json() or {}
+    cambios = data.get('cambios') or {}
+    try:
+        ids, filtros = _leer_seleccion_lote(data)
+        if not isinstance(cambios, dict) or not cambios:
+            raise ValueError("Debe indicar los 'cambios' a aplicar")
+        # Mismas reglas que el PATCH de un horario: sin campos obligatorios vacíos
+        cambios = _leer_mascara(cambios, CAMPOS_EDITABLES)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    db = next(get_db_session())
+    service = HorarioService(db)
+    user_service = UserService(db)
+    try:
+        # Si se reasignan los horarios, validar que el usuario destino existe
+        if cambios.get('user_id') is not None:
+            if not user_service.obtener_usuario_por_id(cambios['user_id']):
+                logger.warning(f"Intento de reasignar horarios a usuario inexistente: {cambios['user_id']}")
+                return jsonify({'error': f"El usuario con ID {cambios['user_id']} no existe"}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+        actualizados = service.actualizar_horarios_lote(cambios, ids, filtros)
+        auditar('actualizar_lote', 'horario', ids=ids, filtro=filtros, cambios=cambios, afectados=actualizados)
+        logger.info(f"Actualización por lote realizada por admin: {actualizados} horarios")
+        return jsonify({'message': 'Horarios actualizados correctamente', 'actualizados': actualizados}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    except Exception as e:
+        logger.error(f"Error en la actualización por lote: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Error al actualizar horarios'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+
+# POST - Eliminar varios horarios con un solo DELETE
+# =====================================================================
+@horario_bp.route('/horarios/lote/eliminar', methods=['POST'])
+@role_required('admin')
+@idempotente
+def bulk_delete_horarios():
+    """Elimina todos los horarios seleccionados"""
+    data = request.get_json() or {}
+    try:
+        ids, filtros = _leer_seleccion_lote(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    db = next(get_db_session())
+    service = HorarioService(db)
+    try:
+        eliminados = service.eliminar_horarios_lote(ids, filtros)
+        auditar('eliminar_lote', 'horario', ids=ids, filtro=filtros, afectados=eliminados)
+        logger.info(f"Eliminación por lote realizada por admin: {eliminados} horarios")
+        return jsonify({'message': 'Horarios eliminados correctamente', 'eliminados': eliminados}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    except Exception as e:
+        logger.error(f"Error en la eliminación por lote: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Error al eliminar horarios'}), 500, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+
 # =====================================================================
 # 👤 RUTAS PARA USUARIOS (MIS HORARIOS - No requieren admin)
 # =====================================================================
@@ -223,10 +606,14 @@ def get_mis_horarios():
     current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
     
     logger.info(f"Usuario {current_user_id} consultando sus horarios")
+    try:
+        periodo = _periodo_consultado()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
     db = next(get_db_session())
     service = HorarioService(db)
     try:
-        horarios = service.obtener_horarios_por_usuario(current_user_id)
+        horarios = service.obtener_horarios_por_usuario(current_user_id, periodo)
         return jsonify([
             {
                 'id': h.id,
@@ -236,7 +623,8 @@ def get_mis_horarios():
                 'hora_inicio': str(h.hora_inicio) if h.hora_inicio else None,
                 'hora_fin': str(h.hora_fin) if h.hora_fin else None,
                 'salon': h.salon,
-                'user_id': h.user_id
+                'user_id': h.user_id,
+                'periodo': h.periodo
             } for h in horarios
         ]), 200, {'Content-Type': 'application/json; charset=utf-8'}
     finally:
@@ -247,6 +635,7 @@ def get_mis_horarios():
 # =====================================================================
 @horario_bp.route('/mis-horarios', methods=['POST'])
 @jwt_required()
+@idempotente
 def create_mi_horario():
     """Crea un horario para el usuario autenticado"""
     current_user_id = get_jwt_identity()
@@ -269,6 +658,7 @@ def create_mi_horario():
     try:
         # Crear horario asignado al usuario actual
         horario = service.crear_horario(materia, docente, dia, hora_inicio, hora_fin, salon, current_user_id)
+        auditar('crear', 'horario', horario.id, user_id=current_user_id, periodo=horario.periodo)
         logger.info(f"Horario creado por usuario {current_user_id}: {materia} - {docente}")
         return jsonify({
             'id': horario.id,
@@ -320,6 +710,7 @@ def update_mi_horario(horario_id):
         
         # Actualizar horario manteniendo el user_id
         horario_actualizado = service.actualizar_horario(horario_id, materia, docente, dia, hora_inicio, hora_fin, salon, current_user_id)
+        auditar('actualizar', 'horario', horario_id, cambios={k: v for k, v in data.items() if k in CAMPOS_EDITABLES})
         logger.info(f"Horario {horario_id} actualizado por usuario {current_user_id}")
         return jsonify({
             'id': horario_actualizado.id,
@@ -335,6 +726,113 @@ def update_mi_horario(horario_id):
         db.close()
 
 
+# PATCH - Editar parcialmente mi horario
+# =====================================================================
+@horario_bp.route('/mis-horarios/<int:horario_id>', methods=['PATCH'])
+@jwt_required()
+def patch_mi_horario(horario_id):
+    """Edita parcialmente un horario del usuario autenticado en un solo UPDATE"""
+    current_user_id = get_jwt_identity()
+    current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
+
+    # Reasignar o cambiar de periodo es tarea del admin
+    permitidos = [campo for campo in CAMPOS_EDITABLES if campo not in ('user_id', 'periodo')]
+    try:
+        cambios = _leer_mascara(request.get_json(silent=True), permitidos)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+    db = next(get_db_session())
+    service = HorarioService(db)
+    try:
+        # La verificación de propiedad va en el WHERE del UPDATE
+        horario = service.actualizar_horario_parcial(horario_id, cambios, owner_id=current_user_id)
+        if not horario:
+            logger.warning(f"Usuario {current_user_id} intenta editar horario inexistente o ajeno {horario_id}")
+            return jsonify({'error': 'Horario no encontrado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+        auditar('actualizar', 'horario', horario_id, cambios=cambios)
+        logger.info(f"Horario {horario_id} actualizado parcialmente por usuario {current_user_id}")
+        return jsonify({
+            'id': horario.id,
+            'materia': horario.materia,
+            'docente': horario.docente,
+            'dia': horario.dia,
+            'hora_inicio': str(horario.hora_inicio) if horario.hora_inicio else None,
+            'hora_fin': str(horario.hora_fin) if horario.hora_fin else None,
+            'salon': horario.salon,
+            'user_id': horario.user_id
+        }), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+
+# Feed iCalendar de mis horarios
+# =====================================================================
+@horario_bp.route('/mis-horarios/ics-token', methods=['POST'])
+@jwt_required()
+def crear_token_ical():
+    """Genera (o rota) el token del feed iCal; el anterior deja de funcionar"""
+    current_user_id = get_jwt_identity()
+    current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
+
+    db = next(get_db_session())
+    service = IcalService(db)
+    try:
+        token = service.generar_token(current_user_id)
+        # El feed no lleva JWT: la institución va en la URL
+        institucion = institucion_actual()
+        parametro = f"&institucion={institucion}" if institucion != INSTITUCION_POR_DEFECTO else ''
+        return jsonify({
+            'token': token,
+            'url': f"{request.host_url.rstrip('/')}/api/mis-horarios.ics?token={token}{parametro}"
+        }), 201, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+
+@horario_bp.route('/mis-horarios/ics-token', methods=['DELETE'])
+@jwt_required()
+def revocar_token_ical():
+    """Revoca el token del feed iCal del usuario autenticado"""
+    current_user_id = get_jwt_identity()
+    current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
+
+    db = next(get_db_session())
+    service = IcalService(db)
+    try:
+        service.revocar_token(current_user_id)
+        return jsonify({'message': 'Token del feed revocado correctamente'}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    finally:
+        db.close()
+
+
+@horario_bp.route('/mis-horarios.ics', methods=['GET'])
+def get_mis_horarios_ics():
+    """
+    Feed iCalendar para apps de calendario. Se autentica con el token del feed
+    (no con JWT) y se sirve desde caché con ETag/Last-Modified.
+    """
+    token = request.args.get('token', '')
+    if not token:
+        return jsonify({'error': "El parámetro 'token' es obligatorio"}), 401, {'Content-Type': 'application/json; charset=utf-8'}
+
+    db = next(get_db_session())
+    service = IcalService(db)
+    try:
+        feed = service.obtener_feed(token)
+        if feed is None:
+            return jsonify({'error': 'Token del feed inválido o revocado'}), 404, {'Content-Type': 'application/json; charset=utf-8'}
+        response = Response(feed.contenido, mimetype='text/calendar')
+        response.set_etag(feed.etag)
+        response.last_modified = feed.ultima_modificacion
+        response.headers['Cache-Control'] = 'private, max-age=300'
+        return response.make_conditional(request)
+    finally:
+        db.close()
+
+
 # DELETE - Eliminar mi horario
 # =====================================================================
 @horario_bp.route('/mis-horarios/<int:horario_id>', methods=['DELETE'])
@@ -359,6 +857,7 @@ def delete_mi_horario(horario_id):
         
         # Eliminar horario
         service.eliminar_horario(horario_id)
+        auditar('eliminar', 'horario', horario_id)
         logger.info(f"Horario {horario_id} eliminado por usuario {current_user_id}")
         return jsonify({'message': 'Horario eliminado correctamente'}), 200, {'Content-Type': 'application/json; charset=utf-8'}
     finally:
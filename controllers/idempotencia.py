@@ -0,0 +1,73 @@
+#controllers/idempotencia.py
+import logging
+from functools import wraps
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from flask import request, jsonify, make_response
+from flask_jwt_extended import get_jwt_identity
+from config.database import get_db_session
+from config.sobrecarga import sin_plazo
+from services.idempotencia_service import IdempotenciaService, huella_peticion
+
+MAX_LONGITUD_CLAVE = 255
+
+
+def idempotente(fn):
+    """
+    Decorador para rutas de creación y por lote (va después de @jwt_required).
+    Si la petición trae `Idempotency-Key`, la primera ejecución guarda su
+    respuesta y los reintentos con la misma clave la reciben de nuevo sin
+    volver a ejecutar la ruta. Un reintento mientras la original sigue en
+    curso recibe 409 y uno con otro cuerpo recibe 422. Las respuestas 5xx no
+    se guardan, así que esos reintentos se ejecutan otra vez. Guardar o
+    liberar la clave no se corta por el plazo de la petición: una clave que
+    queda 'en_proceso' tras una creación confirmada termina en un duplicado.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        clave = request.headers.get('Idempotency-Key')
+        if not clave:
+            return fn(*args, **kwargs)
+        if len(clave) > MAX_LONGITUD_CLAVE:
+            return jsonify({'error': f'Idempotency-Key no puede superar {MAX_LONGITUD_CLAVE} caracteres'}), 400, {'Content-Type': 'application/json; charset=utf-8'}
+
+        user_id = get_jwt_identity()
+        user_id = int(user_id) if isinstance(user_id, str) else user_id
+        huella = huella_peticion(request.method, request.path, request.get_data())
+
+        db = next(get_db_session())
+        # Reservar la clave no es la escritura de la ruta: no le quita el plazo a la petición
+        db.info['conserva_plazo'] = True
+        service = IdempotenciaService(db)
+        try:
+            existente = service.reservar(clave, user_id, huella)
+            if existente is not None:
+                return _responder_existente(existente, huella)
+            respuesta = None
+            try:
+                respuesta = make_response(fn(*args, **kwargs))
+            finally:
+                with sin_plazo():
+                    if respuesta is None or respuesta.status_code >= 500:
+                        service.liberar(clave, user_id)
+                    else:
+                        service.completar(clave, user_id, respuesta.status_code, respuesta.get_data(as_text=True))
+            return respuesta
+        finally:
+            db.close()
+    return wrapper
+
+
+def _responder_existente(existente, huella):
+    if existente.huella != huella:
+        return jsonify({'error': 'La Idempotency-Key ya se usó con otra petición'}), 422, {'Content-Type': 'application/json; charset=utf-8'}
+    if existente.estado != 'completada':
+        return jsonify({'error': 'La petición original con esta Idempotency-Key sigue en proceso'}), 409, {
+            'Content-Type': 'application/json; charset=utf-8',
+            'Retry-After': '1'
+        }
+    return existente.respuesta, existente.status_code, {
+        'Content-Type': 'application/json; charset=utf-8',
+        'Idempotent-Replayed': 'true'
+    }
@@ -0,0 +1,29 @@
+#controllers/parametros.py
+import os
+
+# Máximo de IDs por consulta con `?ids=` (se resuelven con un solo IN)
+MAX_IDS_POR_CONSULTA = int(os.getenv("MAX_IDS_POR_CONSULTA", "100"))
+
+
+def leer_ids(valor: str):
+    """
+    Convierte `?ids=3,1,2` en una lista de enteros en el orden pedido y sin
+    repetidos. Lanza ValueError si hay valores no numéricos, si está vacía o
+    si supera MAX_IDS_POR_CONSULTA.
+    """
+    partes = [parte.strip() for parte in valor.split(',') if parte.strip()]
+    if not partes:
+        raise ValueError("'ids' debe tener al menos un ID")
+    try:
+        ids = list(dict.fromkeys(int(parte) for parte in partes))
+    except ValueError:
+        raise ValueError("'ids' debe ser una lista de enteros separados por coma")
+    if len(ids) > MAX_IDS_POR_CONSULTA:
+        raise ValueError(f"'ids' admite como máximo {MAX_IDS_POR_CONSULTA} IDs por consulta")
+    return ids
+
+
+def ordenar_por_ids(ids, registros, clave=lambda r: r.id):
+    """Ordena `registros` según `ids` y retorna (encontrados, ids faltantes)."""
+    por_id = {clave(r): r for r in registros}
+    return [por_id[i] for i in ids if i in por_id], [i for i in ids if i not in por_id]
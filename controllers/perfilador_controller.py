@@ -0,0 +1,144 @@
+#controllers/perfilador_controller.py
+import os
+import math
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from flask import Blueprint, request, jsonify, Response
+from controllers.user_controller import role_required
+from config.rate_limit import backend
+from services.perfilador_service import (perfilador, SesionPerfilado, TIPOS, FORMATOS, PERFILADOR_MAX_SEGUNDOS,
+                                         PERFILADOR_MAX_PETICIONES)
+
+# Inicializar Blueprint
+perfilador_bp = Blueprint('perfilador_bp', __name__)
+
+# Sesiones de perfilado que se pueden iniciar seguidas y cuántas se recuperan por hora (por proceso)
+PERFILADOR_SESIONES = float(os.getenv("PERFILADOR_SESIONES", "3"))
+PERFILADOR_SESIONES_POR_HORA = float(os.getenv("PERFILADOR_SESIONES_POR_HORA", "6"))
+METODOS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+ORDENES = ('cumulative', 'tottime', 'ncalls')
+
+
+def _error(mensaje, status=400):
+    return jsonify({'error': mensaje}), status, {'Content-Type': 'application/json; charset=utf-8'}
+
+
+def _leer_sesion(datos):
+    """Valida el cuerpo de POST /perfilador y arma la sesión. Lanza ValueError con el mensaje para el cliente."""
+    tipo = datos.get('tipo', 'muestreo')
+    if tipo not in TIPOS:
+        raise ValueError(f"'tipo' debe ser uno de: {', '.join(TIPOS)}")
+
+    regla = None
+    if datos.get('ruta'):
+        regla = perfilador.buscar_regla(datos['ruta'])
+        if regla is None:
+            raise ValueError(f"La ruta '{datos['ruta']}' no existe (usa el patrón, p. ej. /api/horarios/<int:horario_id>, o el endpoint)")
+    metodo = (datos.get('metodo') or '').upper() or None
+    if metodo is not None and metodo not in METODOS:
+        raise ValueError(f"'metodo' debe ser uno de: {', '.join(METODOS)}")
+
+    peticiones, segundos = datos.get('peticiones'), datos.get('segundos')
+    if peticiones is None and segundos is None:
+        raise ValueError("Indica 'peticiones' (las próximas N) o 'segundos' (todas durante T)")
+    if peticiones is not None and (not isinstance(peticiones, int) or not 1 <= peticiones <= PERFILADOR_MAX_PETICIONES):
+        raise ValueError(f"'peticiones' debe estar entre 1 y {PERFILADOR_MAX_PETICIONES}")
+    if segundos is not None and (not isinstance(segundos, (int, float)) or not 0 < segundos <= PERFILADOR_MAX_SEGUNDOS):
+        raise ValueError(f"'segundos' debe ser mayor que 0 y máximo {PERFILADOR_MAX_SEGUNDOS:g}")
+    intervalo_ms = datos.get('intervalo_ms', 5)
+    if not isinstance(intervalo_ms, (int, float)) or not 1 <= intervalo_ms <= 1000:
+        raise ValueError("'intervalo_ms' debe estar entre 1 y 1000")
+
+    # Con solo 'peticiones', la sesión igual vence a los PERFILADOR_MAX_SEGUNDOS
+    return SesionPerfilado(tipo, regla, metodo, peticiones, segundos or PERFILADOR_MAX_SEGUNDOS, intervalo_ms)
+
+# ---------------------------------------------------------------------
+# POST - Iniciar una sesión de perfilado (solo admin)
+# ---------------------------------------------------------------------
+@perfilador_bp.route('/perfilador', methods=['POST'])
+@role_required('admin')
+def iniciar_perfilado():
+    """
+    Perfila las próximas `peticiones` a `ruta` (opcionalmente con `metodo`),
+    o todas las peticiones durante `segundos`, con `tipo` 'cprofile' o
+    'muestreo'. El resultado se pide en GET /perfilador/resultado.
+    """
+    try:
+        sesion = _leer_sesion(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return _error(str(e))
+    if perfilador.activo:
+        return _error('Ya hay una sesión de perfilado en curso', 409)
+
+    permitido, espera = backend.consumir('perfilador:sesiones', PERFILADOR_SESIONES, PERFILADOR_SESIONES_POR_HORA / 3600)
+    if not permitido:
+        segundos = max(1, math.ceil(espera))
+        return jsonify({'error': 'Demasiadas sesiones de perfilado. Intenta más tarde.', 'reintentar_en': segundos}), 429, {
+            'Content-Type': 'application/json; charset=utf-8', 'Retry-After': str(segundos)}
+    if not perfilador.iniciar(sesion):
+        return _error('Ya hay una sesión de perfilado en curso', 409)
+    return jsonify({'sesion': sesion.resumen()}), 202, {'Content-Type': 'application/json; charset=utf-8'}
+
+# ---------------------------------------------------------------------
+# GET - Estado de la sesión en curso y de la última terminada
+# ---------------------------------------------------------------------
+@perfilador_bp.route('/perfilador', methods=['GET'])
+@role_required('admin')
+def estado_perfilado():
+    activa, ultima = perfilador.sesion, perfilador.ultima
+    return jsonify({
+        'activa': activa.resumen() if activa else None,
+        'ultima': ultima.resumen() if ultima else None
+    }), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+# ---------------------------------------------------------------------
+# DELETE - Terminar la sesión en curso (conserva lo acumulado)
+# ---------------------------------------------------------------------
+@perfilador_bp.route('/perfilador', methods=['DELETE'])
+@role_required('admin')
+def detener_perfilado():
+    sesion = perfilador.detener()
+    if sesion is None:
+        return _error('No hay una sesión de perfilado en curso', 404)
+    return jsonify({'sesion': sesion.resumen()}), 200, {'Content-Type': 'application/json; charset=utf-8'}
+
+# ---------------------------------------------------------------------
+# GET - Resultado de la última sesión
+# ---------------------------------------------------------------------
+@perfilador_bp.route('/perfilador/resultado', methods=['GET'])
+@role_required('admin')
+def resultado_perfilado():
+    """
+    `formato`: 'collapsed' (muestreo), 'pstats' o 'prof' (cprofile). Con
+    `esperar=<s>` espera a que termine la sesión en curso antes de responder.
+    Para cprofile: `orden` (cumulative, tottime, ncalls) y `limite` de funciones.
+    """
+    esperar = request.args.get('esperar', 0, type=float) or 0
+    activa = perfilador.sesion
+    if activa is not None and esperar > 0:
+        activa.terminada.wait(min(esperar, PERFILADOR_MAX_SEGUNDOS))
+    if perfilador.sesion is not None:
+        return _error('La sesión de perfilado sigue en curso', 409)
+    sesion = perfilador.ultima
+    if sesion is None:
+        return _error('Todavía no hay resultados de perfilado', 404)
+
+    formato = request.args.get('formato', FORMATOS[sesion.tipo][0])
+    if formato not in FORMATOS[sesion.tipo]:
+        return _error(f"La sesión de tipo '{sesion.tipo}' se descarga como: {', '.join(FORMATOS[sesion.tipo])}")
+    cabeceras = {'X-Perfilador-Peticiones': str(sesion.perfiladas), 'Cache-Control': 'no-store'}
+    if formato == 'collapsed':
+        return Response(perfilador.collapsed(sesion), mimetype='text/plain', headers=cabeceras)
+    if formato == 'prof':
+        cabeceras['Content-Disposition'] = 'attachment; filename="perfil.prof"'
+        return Response(perfilador.binario_prof(sesion), mimetype='application/octet-stream', headers=cabeceras)
+
+    orden = request.args.get('orden', 'cumulative')
+    limite = request.args.get('limite', 50, type=int)
+    if orden not in ORDENES:
+        return _error(f"'orden' debe ser uno de: {', '.join(ORDENES)}")
+    if limite is None or not 1 <= limite <= 1000:
+        return _error("'limite' debe estar entre 1 y 1000")
+    return Response(perfilador.texto_pstats(sesion, orden, limite), mimetype='text/plain', headers=cabeceras)
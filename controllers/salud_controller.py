@@ -0,0 +1,98 @@
+#controllers/salud_controller.py
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from flask import Blueprint, request, jsonify, g
+from flask_jwt_extended import verify_jwt_in_request
+from sqlalchemy.exc import OperationalError
+from config import database
+from config.database import BaseDatosNoDisponible
+from config.instituciones import institucion_actual
+from config.salud_bd import METODOS_LECTURA, RUTAS_SIN_ESCRITURA
+from config.sobrecarga import control, vencido, PlazoVencido, respuesta_plazo_vencido
+
+# Inicializar Blueprint
+salud_bp = Blueprint('salud_bp', __name__)
+
+
+# ============================================================
+# 🩺 MODO DEGRADADO
+# ============================================================
+def _base_de_la_peticion():
+    """
+    Base de datos de la institución de la petición (con DB_SHARDS cada una
+    tiene su propio interruptor). Si la institución no se puede resolver,
+    la principal: la ruta responde después su propio error.
+    """
+    if 'base_de_datos' not in g:
+        g.base_de_datos = database.bd
+        if database.enrutador.activo:
+            try:
+                # La institución viaja en el JWT; aquí solo se lee, la ruta lo exige después
+                verify_jwt_in_request(optional=True)
+            except Exception:
+                pass
+            try:
+                g.base_de_datos = database.enrutador.base(institucion_actual())
+            except Exception as e:
+                logger.warning(f"No se pudo resolver la base de la petición {request.method} {request.path}: {str(e)}")
+    return g.base_de_datos
+
+
+def register_salud_handlers(app):
+    @app.before_request
+    def rechazar_escrituras_sin_principal():
+        """Con la base de la institución caída, las escrituras fallan de inmediato en vez de esperar timeouts."""
+        if (request.method not in METODOS_LECTURA and request.endpoint not in RUTAS_SIN_ESCRITURA
+                and _base_de_la_peticion().interruptor.abierto):
+            return _no_disponible("La base de datos está en modo solo lectura; intenta de nuevo en unos segundos")
+
+    @app.after_request
+    def marcar_solo_lectura(response):
+        if _base_de_la_peticion().solo_lectura:
+            response.headers['X-Solo-Lectura'] = '1'
+        return response
+
+    @app.errorhandler(BaseDatosNoDisponible)
+    def handle_base_no_disponible(e):
+        logger.warning(f"Petición rechazada sin base de datos: {request.method} {request.path}")
+        return _no_disponible(str(e), e.reintentar_en)
+
+    @app.errorhandler(OperationalError)
+    def handle_error_operacional(e):
+        if vencido():
+            # La sentencia la cortó el plazo de la petición, no una falla de la base
+            return respuesta_plazo_vencido(PlazoVencido('consulta a la base de datos'))
+        # Timeouts y desconexiones que no atrapó la ruta: el cliente puede reintentar
+        logger.error(f"Error de base de datos en {request.method} {request.path}: {str(e.orig)}")
+        return _no_disponible("La base de datos no respondió a tiempo")
+
+
+def _no_disponible(mensaje, reintentar_en: float = None):
+    reintentar_en = max(1, int(reintentar_en or _base_de_la_peticion().intervalo))
+    return jsonify({'error': mensaje}), 503, {'Content-Type': 'application/json; charset=utf-8',
+                                              'Retry-After': str(reintentar_en)}
+
+
+# ---------------------------------------------------------------------
+# GET - Salud de la base de datos (para balanceadores y monitoreo)
+# ---------------------------------------------------------------------
+@salud_bp.route('/salud', methods=['GET'])
+def get_salud():
+    """
+    Estado de la base principal (interruptor, fallas, latencia del último
+    ping), del respaldo y de las bases de shards abiertas en el proceso.
+    Con el interruptor cerrado hace un ping; abierto, responde sin tocar la
+    base. 200 si se atienden lecturas, 503 si no.
+    """
+    bd = database.bd
+    if not bd.interruptor.abierto:
+        bd.ping()
+    estado = bd.estado()
+    if control.activo:
+        estado['carga'] = control.estado()
+    if database.enrutador.activo:
+        estado['shards'] = database.enrutador.estado()
+    codigo = 503 if estado['estado'] == 'sin_servicio' else 200
+    return jsonify(estado), codigo, {'Content-Type': 'application/json; charset=utf-8', 'Cache-Control': 'no-store'}
@@ -1,4 +1,5 @@
 # controllers/user_controller.py
+import os
 import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import (
@@ -9,8 +10,13 @@ from flask_jwt_extended import (
     get_jwt
 )
 from functools import wraps
-from services.user_service import UserService
+from services.user_service import UserService, POLITICA_HORARIOS, MAX_LARGO_EMAIL
+from controllers.parametros import leer_ids, ordenar_por_ids
+from controllers.auditoria import auditar
+from controllers.idempotencia import idempotente
 from config.database import get_db_session
+from config.instituciones import usar_institucion, institucion_actual, CLAIM_INSTITUCION
+from config.rate_limit import limitar_autenticacion
 from flask_jwt_extended.exceptions import NoAuthorizationError
 
 # Configuración de logging
@@ -96,38 +102,46 @@ def role_required(required_role):
 # 🧩 RUTAS DE AUTENTICACIÓN
 # ============================================================
 @user_bp.route("/login", methods=["POST"])
+@limitar_autenticacion("login")
 def login():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
     email = data.get("email")
     password = data.get("password")
 
     if not email or not password:
         return jsonify({"error": "El email y la contraseña son obligatorios."}), 400
 
-    db = next(get_db_session())
-    service = UserService(db)
-    try:
-        user = service.autenticar_usuario(email, password)
-        if not user:
-            logger.warning(f"Intento de login fallido para {email}")
-            return jsonify({"error": "Credenciales inválidas"}), 401
-
-        # Flask-JWT-Extended requiere que identity sea una cadena
-        access_token = create_access_token(identity=str(user.id), additional_claims={"role": user.role})
-        refresh_token = create_refresh_token(identity=str(user.id))
-
-        logger.info(f"Usuario autenticado correctamente: {email}")
-        return jsonify({
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "user": {
-                "id": user.id,
-                "email": user.email,
-                "role": user.role
-            }
-        }), 200
-    finally:
-        db.close()
+    # La institución del cuerpo (o de X-Institucion) decide la base; después viaja en el token
+    institucion = data.get("institucion") or institucion_actual()
+    with usar_institucion(institucion):
+        db = next(get_db_session())
+        service = UserService(db)
+        try:
+            user = service.autenticar_usuario(email, password)
+            if not user:
+                logger.warning(f"Intento de login fallido para {email} ({institucion})")
+                return jsonify({"error": "Credenciales inválidas"}), 401
+
+            # Flask-JWT-Extended requiere que identity sea una cadena
+            access_token = create_access_token(identity=str(user.id), additional_claims={
+                "role": user.role, CLAIM_INSTITUCION: institucion})
+            refresh_token = create_refresh_token(identity=str(user.id), additional_claims={CLAIM_INSTITUCION: institucion})
+
+            logger.info(f"Usuario autenticado correctamente: {email} ({institucion})")
+            return jsonify({
+                "access_token": access_token,
+                "refresh_token": refresh_token,
+                "user": {
+                    "id": user.id,
+                    "email": user.email,
+                    "role": user.role,
+                    "institucion": institucion
+                }
+            }), 200
+        finally:
+            db.close()
 
 
 @user_bp.route("/refresh", methods=["POST"])
@@ -135,7 +149,8 @@ def login():
 def refresh():
     current_user = get_jwt_identity()
     # Asegurar que identity sea string
-    new_access_token = create_access_token(identity=str(current_user))
+    new_access_token = create_access_token(identity=str(current_user),
+                                           additional_claims={CLAIM_INSTITUCION: institucion_actual()})
     return jsonify({"access_token": new_access_token}), 200
 
 
@@ -152,8 +167,11 @@ def logout():
 # 👤 CRUD DE USUARIOS
 # ============================================================
 @user_bp.route("/registry", methods=["POST"])  # 🔥 Ruta corregida para coincidir con tu frontend
+@limitar_autenticacion("registry")
 def register():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
     email = data.get("email")
     password = data.get("password")
     role = data.get("role", "user")
@@ -174,24 +192,66 @@ def register():
     except:
         pass
 
+    # Con token de admin la institución es la del token; si no, la del cuerpo o de X-Institucion
+    with usar_institucion(data.get("institucion") or institucion_actual()):
+        db = next(get_db_session())
+        service = UserService(db)
+        try:
+            # Si no es admin y intenta crear admin, rechazar (un administrador por institución)
+            if not is_admin and role == "admin":
+                if service.contar_admins() > 0:
+                    return jsonify({"error": "No se puede crear un administrador. Solo puede haber uno."}), 403
+
+            new_user = service.crear_usuario(email, password, role)
+            auditar("crear", "usuario", new_user.id, email=new_user.email, role=new_user.role)
+            return jsonify({
+                "id": new_user.id,
+                "email": new_user.email,
+                "role": new_user.role
+            }), 201
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        finally:
+            db.close()
+
+
+# Usuarios por petición en el alta masiva: cada hash tarda ~0,3 s por núcleo y
+# la petición tiene que terminar antes del timeout del worker (30 s en gunicorn).
+# Para miles de cuentas: flask usuarios importar ARCHIVO.csv
+APROVISIONAMIENTO_MAX_POR_PETICION = int(os.getenv("APROVISIONAMIENTO_MAX_POR_PETICION", "100"))
+
+
+@user_bp.route("/users/lote", methods=["POST"])
+@role_required("admin")
+@idempotente
+def create_users_lote():
+    """
+    Alta masiva de usuarios normales: {"usuarios": [{"email", "password"}, ...]}.
+    Los emails ya registrados o repetidos se informan y no se crean; los
+    inválidos se informan por su posición en la lista.
+    """
+    data = request.get_json(silent=True)
+    usuarios = data.get("usuarios") if isinstance(data, dict) else None
+    if not isinstance(usuarios, list) or not usuarios:
+        return jsonify({"error": "Debe enviar 'usuarios' con al menos un usuario"}), 400
+    if len(usuarios) > APROVISIONAMIENTO_MAX_POR_PETICION:
+        return jsonify({"error": f"Máximo {APROVISIONAMIENTO_MAX_POR_PETICION} usuarios por petición; "
+                                 f"para cargas mayores usa `flask usuarios importar`"}), 413
+
     db = next(get_db_session())
     service = UserService(db)
     try:
-        # Si no es admin y intenta crear admin, rechazar
-        if not is_admin and role == "admin":
-            existing_admin = service.obtener_usuario_por_id(1)  # Verificar si existe admin
-            admin_users = [u for u in service.listar_usuarios() if u.role == "admin"]
-            if admin_users:
-                return jsonify({"error": "No se puede crear un administrador. Solo puede haber uno."}), 403
-        
-        new_user = service.crear_usuario(email, password, role)
+        resultado = service.crear_usuarios_lote(usuarios)
+        creados = resultado["creados"]
+        if creados:
+            auditar("crear_lote", "usuario", ids=[u.id for u in creados], total=len(creados))
+        logger.info(f"Alta masiva por admin: {len(creados)} usuarios creados de {len(usuarios)}")
         return jsonify({
-            "id": new_user.id,
-            "email": new_user.email,
-            "role": new_user.role
-        }), 201
-    except ValueError as e:
-        return jsonify({"error": str(e)}), 400
+            "creados": [{"id": u.id, "email": u.email, "role": u.role} for u in creados],
+            "duplicados": resultado["duplicados"],
+            "repetidos": resultado["repetidos"],
+            "invalidos": resultado["invalidos"]
+        }), 201 if creados else 200
     finally:
         db.close()
 
@@ -202,6 +262,8 @@ def list_users():
     # Log del header de autorización para debugging
     auth_header = request.headers.get('Authorization', 'No header')
     logger.info(f"Authorization header recibido en /users: {auth_header[:50] if len(auth_header) > 50 else auth_header}...")
+    if 'ids' in request.args:
+        return _get_users_por_ids()
     db = next(get_db_session())
     service = UserService(db)
     try:
@@ -214,6 +276,24 @@ def list_users():
         db.close()
 
 
+def _get_users_por_ids():
+    """GET /users?ids=3,1,2: varios usuarios con una sola consulta, en el orden pedido."""
+    try:
+        ids = leer_ids(request.args["ids"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    db = next(get_db_session())
+    service = UserService(db)
+    try:
+        users, faltantes = ordenar_por_ids(ids, service.obtener_usuarios_por_ids(ids))
+        return jsonify({
+            "usuarios": [{"id": u.id, "email": u.email, "role": u.role} for u in users],
+            "faltantes": faltantes
+        }), 200
+    finally:
+        db.close()
+
+
 @user_bp.route("/users/<int:user_id>", methods=["GET"])
 @jwt_required()
 def get_user(user_id):
@@ -269,6 +349,8 @@ def update_user(user_id):
             role=data.get("role") if is_admin else None
         )
         if updated:
+            # Solo los nombres de los campos: la contraseña no se audita
+            auditar("actualizar", "usuario", user_id, campos=[c for c in ("email", "password", "role") if data.get(c)])
             logger.info(f"Usuario {user_id} actualizado por {current_user_id}")
             return jsonify({
                 "message": "Usuario actualizado correctamente",
@@ -285,15 +367,87 @@ def update_user(user_id):
         db.close()
 
 
+@user_bp.route("/users/<int:user_id>", methods=["PATCH"])
+@jwt_required()
+def patch_user(user_id):
+    """
+    Actualización parcial de un usuario (email, password y/o role).
+    - Solo se modifican los campos enviados; todos son texto y ninguno admite null ni vacío.
+    - El rol del solicitante solo se consulta si edita a otro usuario o cambia un rol.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not data:
+        return jsonify({"error": "Debe indicar al menos un campo a modificar"}), 400
+    no_validos = set(data) - {"email", "password", "role"}
+    if no_validos:
+        return jsonify({"error": f"Campos no editables: {', '.join(sorted(no_validos))}"}), 400
+    vacios = [campo for campo, valor in data.items() if valor is None or (isinstance(valor, str) and not valor.strip())]
+    if vacios:
+        return jsonify({"error": f"Los campos {', '.join(vacios)} no pueden quedar vacíos"}), 400
+    no_texto = [campo for campo, valor in data.items() if not isinstance(valor, str)]
+    if no_texto:
+        return jsonify({"error": f"Los campos {', '.join(no_texto)} deben ser texto"}), 400
+    if "email" in data and ("@" not in data["email"] or len(data["email"].strip()) > MAX_LARGO_EMAIL):
+        return jsonify({"error": f"Email inválido (máximo {MAX_LARGO_EMAIL} caracteres)"}), 400
+    if "role" in data and data["role"] not in ("admin", "user"):
+        return jsonify({"error": "Rol inválido"}), 400
+
+    current_user_id = get_jwt_identity()
+    current_user_id = int(current_user_id) if isinstance(current_user_id, str) else current_user_id
+
+    db = next(get_db_session())
+    service = UserService(db)
+    try:
+        if current_user_id != user_id or "role" in data:
+            current_user = service.obtener_usuario_por_id(current_user_id)
+            if not current_user or current_user.role != "admin":
+                logger.warning(f"Acceso denegado: usuario {current_user_id} intenta editar a {user_id} o su rol")
+                return jsonify({"error": "Solo puedes editar tu propio perfil y solo un administrador puede cambiar roles"}), 403
+
+        updated = service.actualizar_usuario_parcial(user_id, data)
+        if not updated:
+            return jsonify({"error": "Usuario no encontrado"}), 404
+        auditar("actualizar", "usuario", user_id, campos=sorted(data))
+        logger.info(f"Usuario {user_id} actualizado parcialmente por {current_user_id}")
+        return jsonify({
+            "message": "Usuario actualizado correctamente",
+            "user": {
+                "id": updated.id,
+                "email": updated.email,
+                "role": updated.role
+            }
+        }), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        db.close()
+
+
 @user_bp.route("/users/<int:user_id>", methods=["DELETE"])
 @role_required("admin")
 def delete_user(user_id):
+    """
+    `?horarios=desasignar|reasignar|eliminar` decide qué pasa con los horarios
+    del usuario (por defecto, USUARIO_ELIMINADO_HORARIOS); con 'reasignar'
+    se indica el destino en `?reasignar_a=<id>`.
+    """
+    politica = request.args.get("horarios")
+    reasignar_a = request.args.get("reasignar_a")
+    if reasignar_a is not None:
+        if not reasignar_a.isdigit():
+            return jsonify({"error": "'reasignar_a' debe ser el ID de un usuario"}), 400
+        reasignar_a = int(reasignar_a)
+
     db = next(get_db_session())
     service = UserService(db)
     try:
-        deleted = service.eliminar_usuario(user_id)
+        deleted, afectados = service.eliminar_usuario(user_id, politica, reasignar_a)
         if deleted:
-            return jsonify({"message": "Usuario eliminado correctamente"}), 200
+            auditar("eliminar", "usuario", user_id, horarios=politica or POLITICA_HORARIOS,
+                    reasignar_a=reasignar_a, horarios_afectados=afectados)
+            return jsonify({"message": "Usuario eliminado correctamente", "horarios_afectados": afectados}), 200
         return jsonify({"error": "Usuario no encontrado"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     finally:
         db.close()
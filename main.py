@@ -7,6 +7,18 @@ from flask import Flask, send_from_directory, jsonify
 from config.jwt import *
 from controllers.user_controller import user_bp, register_jwt_error_handlers
 from controllers.horario_controller import horario_bp
+from controllers.estadisticas_controller import estadisticas_bp
+from controllers.analitica_controller import analitica_bp
+from controllers.auditoria_controller import auditoria_bp
+from controllers.salud_controller import salud_bp, register_salud_handlers
+from controllers.perfilador_controller import perfilador_bp
+from services.perfilador_service import perfilador
+from config.compression import init_compression, servir_precomprimido
+from config.sobrecarga import init_sobrecarga
+from config.instituciones import init_instituciones
+from commands import register_commands
+from commands.db_command import ejecutando_comando_db
+from config.migraciones import verificar_esquema, ESQUEMA_AUTO_MIGRAR
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
 import os
@@ -59,17 +71,49 @@ def unauthorized_callback(error):
 # Registrar Blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(horario_bp, url_prefix='/api')
+app.register_blueprint(estadisticas_bp, url_prefix='/api')
+app.register_blueprint(analitica_bp, url_prefix='/api')
+app.register_blueprint(auditoria_bp, url_prefix='/api')
+app.register_blueprint(salud_bp, url_prefix='/api')
+app.register_blueprint(perfilador_bp, url_prefix='/api')
 
-# Registrar manejo de errores JWT
+# Plazo por petición y descarte por sobrecarga: antes que cualquier otro before_request
+init_sobrecarga(app)
+
+# Registrar manejo de errores JWT y del modo degradado de la base de datos
 register_jwt_error_handlers(app)
+register_salud_handlers(app)
+# 400 para tokens o peticiones de una institución que no está en el catálogo
+init_instituciones(app)
+
+# Compresión gzip/brotli de respuestas y comandos de la CLI (flask build-static, ...)
+init_compression(app)
+register_commands(app)
+
+# Perfilado bajo demanda (POST /api/perfilador); sin sesión activa no agrega nada a las peticiones
+perfilador.init_app(app, excluir=('/api/perfilador',))
+
+# Estáticos generados por `flask build-static` (con huella de contenido y precomprimidos)
+DIST_DIR = os.path.join(app.root_path, 'static', 'dist')
 
 # Ruta principal
 @app.route('/')
 def index():
-    return send_from_directory('static', 'index.html')
+    # El HTML se revalida siempre (ETag); los assets con huella se cachean un año
+    if os.path.exists(os.path.join(DIST_DIR, 'index.html')):
+        return servir_precomprimido(DIST_DIR, 'index.html', 'no-cache')
+    response = send_from_directory('static', 'index.html')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/assets/<path:nombre>')
+def assets(nombre):
+    return servir_precomprimido(DIST_DIR, nombre, 'public, max-age=31536000, immutable')
+
+# Verificar que el esquema esté en la última migración (`flask db ...` se encarga de migrarlo).
+# Con `python main.py` (desarrollo) las migraciones pendientes se aplican solas.
+if not ejecutando_comando_db():
+    verificar_esquema(engine, migrar_si_falta=ESQUEMA_AUTO_MIGRAR or __name__ == "__main__")
 
-# Inicializar la base de datos
 if __name__ == "__main__":
-    Base.metadata.create_all(engine)
-    logger.info("Tablas creadas correctamente.")
     app.run(debug=False, use_reloader=False)
@@ -0,0 +1,61 @@
+# migrations/env.py
+import os
+import sys
+from alembic import context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Base
+from config.migraciones import incluir_objeto, limitar_bloqueos
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Genera el SQL de las migraciones sin conectarse (flask db upgrade --sql)."""
+    from config.database import MYSQL_URI, SQLITE_URI
+    context.configure(
+        url=MYSQL_URI or SQLITE_URI,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_object=incluir_objeto,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # Quien llama puede pasar su propia conexión (por ejemplo `flask db planes`, que usa una base temporal)
+    conexion = config.attributes.get('connection')
+    if conexion is not None:
+        _migrar_con(conexion)
+        return
+    # Una migración puede tardar más que el límite por sentencia de la app
+    from config.database import engine_sin_limite
+    with engine_sin_limite().connect() as conexion:
+        _migrar_con(conexion)
+
+
+def _migrar_con(conexion):
+    limitar_bloqueos(conexion)
+    conexion.commit()
+    context.configure(
+        connection=conexion,
+        target_metadata=target_metadata,
+        include_object=incluir_objeto,
+        # SQLite no soporta la mayoría de ALTER TABLE: se recrea la tabla en modo batch
+        render_as_batch=conexion.dialect.name == 'sqlite',
+        # Cada revisión en su propia transacción: una falla no deshace las anteriores
+        transaction_per_migration=True,
+        compare_type=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,50 @@
+# migrations/utilidades.py
+"""Funciones comunes de las revisiones: comprobaciones tolerantes e índices en línea."""
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def tiene_tabla(tabla: str):
+    if context.is_offline_mode():
+        return False
+    return _inspector().has_table(tabla)
+
+
+def tiene_columna(tabla: str, columna: str):
+    if context.is_offline_mode():
+        return False
+    return any(c['name'] == columna for c in _inspector().get_columns(tabla))
+
+
+def tiene_indice(tabla: str, nombre: str):
+    if context.is_offline_mode():
+        return False
+    return any(i['name'] == nombre for i in _inspector().get_indexes(tabla))
+
+
+def crear_indice(nombre: str, tabla: str, columnas: list, unique: bool = False):
+    """
+    Crea el índice si no existe, sin bloquear escrituras cuando el motor lo
+    permite: ALGORITHM=INPLACE, LOCK=NONE en MySQL y CONCURRENTLY en PostgreSQL.
+    """
+    if tiene_indice(tabla, nombre):
+        return
+    dialecto = context.get_context().dialect.name
+    if dialecto == 'mysql':
+        tipo = 'UNIQUE INDEX' if unique else 'INDEX'
+        op.execute(f"CREATE {tipo} {nombre} ON {tabla} ({', '.join(columnas)}) ALGORITHM=INPLACE LOCK=NONE")
+    elif dialecto == 'postgresql':
+        # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción
+        with context.get_context().autocommit_block():
+            op.create_index(nombre, tabla, columnas, unique=unique, postgresql_concurrently=True)
+    else:
+        op.create_index(nombre, tabla, columnas, unique=unique)
+
+
+def eliminar_indice(nombre: str, tabla: str):
+    if context.is_offline_mode() or tiene_indice(tabla, nombre):
+        op.drop_index(nombre, table_name=tabla)
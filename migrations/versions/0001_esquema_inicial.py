@@ -0,0 +1,123 @@
+"""Esquema inicial (tolerante con bases creadas antes de las migraciones)
+
+Crea las tablas que falten y agrega a las existentes las columnas e índices
+que antes agregaba `actualizar_esquema` en config/database.py, así una base
+creada con `create_all` (como horario_local.db) queda en esta revisión sin
+perder datos.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from migrations.utilidades import tiene_tabla, tiene_columna, tiene_indice, crear_indice
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Índice de búsqueda tal como era en esta revisión (las siguientes lo modifican)
+DDL_FTS5 = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS horarios_fts USING fts5("
+    "materia, docente, salon, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+LLENAR_FTS5 = "INSERT INTO horarios_fts (rowid, materia, docente, salon) SELECT id, materia, docente, salon FROM horarios"
+DDL_FULLTEXT = "ALTER TABLE horarios ADD FULLTEXT INDEX ix_horarios_fulltext (materia, docente, salon)"
+
+
+def upgrade():
+    if not tiene_tabla('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('email', sa.String(100), nullable=False),
+            sa.Column('password', sa.String(255), nullable=False),
+            sa.Column('role', sa.String(20), nullable=False),
+            sa.Column('ical_token_hash', sa.String(64), nullable=True),
+        )
+    elif not tiene_columna('users', 'ical_token_hash'):
+        op.add_column('users', sa.Column('ical_token_hash', sa.String(64), nullable=True))
+    crear_indice('ix_users_email', 'users', ['email'], unique=True)
+    crear_indice('ix_users_ical_token_hash', 'users', ['ical_token_hash'], unique=True)
+
+    if not tiene_tabla('horarios'):
+        op.create_table(
+            'horarios',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('materia', sa.String(255), nullable=False),
+            sa.Column('docente', sa.String(255), nullable=False),
+            sa.Column('dia', sa.String(50), nullable=False),
+            sa.Column('hora_inicio', sa.Time(), nullable=False),
+            sa.Column('hora_fin', sa.Time(), nullable=False),
+            sa.Column('salon', sa.String(100), nullable=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+            sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+    else:
+        if not tiene_columna('horarios', 'version'):
+            op.add_column('horarios', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+        if not tiene_columna('horarios', 'updated_at'):
+            op.add_column('horarios', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    crear_indice('ix_horarios_id', 'horarios', ['id'])
+    crear_indice('ix_horarios_version', 'horarios', ['version'])
+
+    if not tiene_tabla('contador_versiones'):
+        op.create_table(
+            'contador_versiones',
+            sa.Column('nombre', sa.String(50), primary_key=True),
+            sa.Column('valor', sa.Integer(), nullable=False),
+        )
+    if not tiene_tabla('horarios_eliminados'):
+        op.create_table(
+            'horarios_eliminados',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('horario_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('eliminado_en', sa.DateTime(), nullable=False),
+        )
+    crear_indice('ix_horarios_eliminados_version', 'horarios_eliminados', ['version'])
+
+    if not tiene_tabla('claves_idempotencia'):
+        op.create_table(
+            'claves_idempotencia',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('clave', sa.String(255), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('huella', sa.String(64), nullable=False),
+            sa.Column('estado', sa.String(20), nullable=False),
+            sa.Column('status_code', sa.Integer(), nullable=True),
+            sa.Column('respuesta', sa.Text(), nullable=True),
+            sa.Column('creada_en', sa.DateTime(), nullable=False),
+            sa.Column('expira_en', sa.DateTime(), nullable=False),
+            sa.UniqueConstraint('clave', 'user_id', name='uq_clave_idempotencia_usuario'),
+        )
+    crear_indice('ix_claves_idempotencia_expira_en', 'claves_idempotencia', ['expira_en'])
+
+    # El contador de versiones debe existir antes de la primera escritura
+    if context.is_offline_mode():
+        op.execute("INSERT INTO contador_versiones (nombre, valor) VALUES ('horarios', 0)")
+    elif not op.get_bind().execute(sa.text("SELECT 1 FROM contador_versiones WHERE nombre = 'horarios'")).first():
+        op.execute("INSERT INTO contador_versiones (nombre, valor) VALUES ('horarios', 0)")
+
+    # Índice de búsqueda de texto (FTS5 en SQLite, FULLTEXT en MySQL)
+    dialecto = context.get_context().dialect.name
+    if dialecto == 'sqlite' and not tiene_tabla('horarios_fts'):
+        op.execute(DDL_FTS5)
+        op.execute(LLENAR_FTS5)
+    elif dialecto == 'mysql' and not tiene_indice('horarios', 'ix_horarios_fulltext'):
+        op.execute(DDL_FULLTEXT)
+
+
+def downgrade():
+    if context.get_context().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS horarios_fts")
+    op.drop_table('claves_idempotencia')
+    op.drop_table('horarios_eliminados')
+    op.drop_table('contador_versiones')
+    op.drop_table('horarios')
+    op.drop_table('users')
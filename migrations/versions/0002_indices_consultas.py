@@ -0,0 +1,34 @@
+"""Índices para las rutas de consulta
+
+horarios.user_id (mis-horarios, iCal, filtros por lote), horarios.dia y
+horarios.salon (filtros y conflictos) y users.role (conteo de admins).
+Se crean sin bloquear escrituras donde el motor lo permite.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:01
+
+"""
+from migrations.utilidades import crear_indice, eliminar_indice
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ('ix_horarios_user_id', 'horarios', ['user_id']),
+    ('ix_horarios_dia', 'horarios', ['dia']),
+    ('ix_horarios_salon', 'horarios', ['salon']),
+    ('ix_users_role', 'users', ['role']),
+]
+
+
+def upgrade():
+    for nombre, tabla, columnas in INDICES:
+        crear_indice(nombre, tabla, columnas)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        eliminar_indice(nombre, tabla)
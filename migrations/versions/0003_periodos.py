@@ -0,0 +1,91 @@
+"""Periodo académico en horarios y tabla de horarios archivados
+
+Agrega horarios.periodo (los horarios existentes quedan en el periodo activo
+al momento de migrar), reemplaza los índices de dia y salon por índices que
+empiezan por el periodo y crea horarios_historicos para `flask periodos archivar`.
+ix_horarios_user_id se conserva: lo usa la llave foránea en MySQL.
+En SQLite el índice FTS5 se recrea con el periodo como columna no indexada,
+para filtrar la búsqueda sin un JOIN previo con horarios.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:02
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from config.periodos import PERIODO_ACTIVO
+from migrations.utilidades import tiene_tabla, tiene_columna, crear_indice, eliminar_indice
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ('ix_horarios_periodo_user_id', 'horarios', ['periodo', 'user_id']),
+    ('ix_horarios_periodo_dia', 'horarios', ['periodo', 'dia']),
+    ('ix_horarios_periodo_salon', 'horarios', ['periodo', 'salon']),
+]
+FTS5_OPCIONES = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+DDL_FTS5 = f"CREATE VIRTUAL TABLE horarios_fts USING fts5(materia, docente, salon, periodo UNINDEXED, {FTS5_OPCIONES})"
+LLENAR_FTS5 = ("INSERT INTO horarios_fts (rowid, materia, docente, salon, periodo) "
+               "SELECT id, materia, docente, salon, periodo FROM horarios")
+DDL_FTS5_ANTERIOR = f"CREATE VIRTUAL TABLE horarios_fts USING fts5(materia, docente, salon, {FTS5_OPCIONES})"
+LLENAR_FTS5_ANTERIOR = "INSERT INTO horarios_fts (rowid, materia, docente, salon) SELECT id, materia, docente, salon FROM horarios"
+# Índices de 0002 que quedan cubiertos por los del periodo
+REEMPLAZADOS = [
+    ('ix_horarios_dia', 'horarios', ['dia']),
+    ('ix_horarios_salon', 'horarios', ['salon']),
+]
+
+
+def upgrade():
+    if not tiene_columna('horarios', 'periodo'):
+        # Con DEFAULT la columna se llena al agregarla (sin UPDATE fila por fila);
+        # la app siempre envía el periodo explícito, el default solo sirve a las filas existentes
+        op.add_column('horarios', sa.Column('periodo', sa.String(20), nullable=False, server_default=PERIODO_ACTIVO))
+    for nombre, tabla, columnas in INDICES:
+        crear_indice(nombre, tabla, columnas)
+    for nombre, tabla, _ in REEMPLAZADOS:
+        eliminar_indice(nombre, tabla)
+
+    if not tiene_tabla('horarios_historicos'):
+        op.create_table(
+            'horarios_historicos',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column('materia', sa.String(255), nullable=False),
+            sa.Column('docente', sa.String(255), nullable=False),
+            sa.Column('dia', sa.String(50), nullable=False),
+            sa.Column('hora_inicio', sa.Time(), nullable=False),
+            sa.Column('hora_fin', sa.Time(), nullable=False),
+            sa.Column('salon', sa.String(100), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('periodo', sa.String(20), nullable=False),
+            sa.Column('archivado_en', sa.DateTime(), nullable=False),
+        )
+    crear_indice('ix_horarios_historicos_periodo', 'horarios_historicos', ['periodo'])
+
+    if context.get_context().dialect.name == 'sqlite':
+        _recrear_fts5(DDL_FTS5, LLENAR_FTS5)
+
+
+def _recrear_fts5(ddl, llenar):
+    # FTS5 no admite ALTER TABLE: se recrea y se vuelve a llenar
+    op.execute("DROP TABLE IF EXISTS horarios_fts")
+    op.execute(ddl)
+    op.execute(llenar)
+
+
+def downgrade():
+    if context.get_context().dialect.name == 'sqlite':
+        _recrear_fts5(DDL_FTS5_ANTERIOR, LLENAR_FTS5_ANTERIOR)
+    op.drop_table('horarios_historicos')
+    for nombre, tabla, columnas in REEMPLAZADOS:
+        crear_indice(nombre, tabla, columnas)
+    for nombre, tabla, _ in reversed(INDICES):
+        eliminar_indice(nombre, tabla)
+    with op.batch_alter_table('horarios') as batch:
+        batch.drop_column('periodo')
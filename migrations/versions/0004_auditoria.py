@@ -0,0 +1,43 @@
+"""Tabla de auditoría
+
+Registro de solo inserción de las escrituras sobre horarios y usuarios. Lo
+llena por lotes services/auditoria_service.py desde un hilo en segundo plano.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:03
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.utilidades import tiene_tabla, crear_indice
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ('ix_auditoria_entidad', 'auditoria', ['entidad', 'entidad_id']),
+    ('ix_auditoria_actor_id', 'auditoria', ['actor_id']),
+]
+
+
+def upgrade():
+    if not tiene_tabla('auditoria'):
+        op.create_table(
+            'auditoria',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('ocurrido_en', sa.DateTime(), nullable=False),
+            sa.Column('actor_id', sa.Integer(), nullable=True),
+            sa.Column('accion', sa.String(30), nullable=False),
+            sa.Column('entidad', sa.String(20), nullable=False),
+            sa.Column('entidad_id', sa.Integer(), nullable=True),
+            sa.Column('detalle', sa.Text(), nullable=True),
+        )
+    for nombre, tabla, columnas in INDICES:
+        crear_indice(nombre, tabla, columnas)
+
+
+def downgrade():
+    op.drop_table('auditoria')
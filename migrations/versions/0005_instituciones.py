@@ -0,0 +1,34 @@
+"""Catálogo de instituciones
+
+Institución (facultad) -> shard donde vive su base de datos. Lo lee
+config/instituciones.py para enrutar las sesiones y lo modifica
+`flask instituciones crear|mover`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:04
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.utilidades import tiene_tabla
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not tiene_tabla('instituciones'):
+        op.create_table(
+            'instituciones',
+            sa.Column('nombre', sa.String(40), primary_key=True),
+            sa.Column('shard', sa.String(40), nullable=False),
+            sa.Column('estado', sa.String(20), nullable=False, server_default='activa'),
+            sa.Column('actualizado_en', sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade():
+    op.drop_table('instituciones')
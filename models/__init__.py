@@ -1,3 +1,7 @@
 from models.db import Base
 from models.user_model import User
-from models.horario_model import Horario
+from models.horario_model import Horario, HorarioHistorico
+from models.sync_model import ContadorVersion, HorarioEliminado
+from models.idempotencia_model import ClaveIdempotencia
+from models.auditoria_model import EventoAuditoria
+from models.institucion_model import Institucion
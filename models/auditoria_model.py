@@ -0,0 +1,31 @@
+#models/auditoria_model
+import logging
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from models.db import Base
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EventoAuditoria(Base):
+    """
+    Registro de auditoría (solo se agregan filas): quién creó, editó o
+    eliminó qué horario o usuario. No tiene llaves foráneas para que el
+    registro sobreviva a la eliminación del actor o de la entidad.
+    """
+    __tablename__ = 'auditoria'
+    __table_args__ = (
+        Index('ix_auditoria_entidad', 'entidad', 'entidad_id'),
+        Index('ix_auditoria_actor_id', 'actor_id'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    ocurrido_en = Column(DateTime, nullable=False)
+    actor_id = Column(Integer, nullable=True)
+    accion = Column(String(30), nullable=False)
+    entidad = Column(String(20), nullable=False)
+    entidad_id = Column(Integer, nullable=True)  # None en operaciones por lote
+    detalle = Column(Text, nullable=True)  # JSON con los campos o la selección
+
+    def __repr__(self):
+        return f"<EventoAuditoria(id={self.id}, accion='{self.accion}', entidad='{self.entidad}', entidad_id={self.entidad_id})>"
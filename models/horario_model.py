@@ -1,8 +1,9 @@
 #models/horario_model
 import logging
-from sqlalchemy import Column, Integer, String, Time, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Time, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from models.db import Base
+from config.periodos import PERIODO_ACTIVO
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +14,13 @@ class Horario(Base):
     Modelo de la tabla 'horarios' para el sistema de gestión de horarios.
     """
     __tablename__ = 'horarios'
+    # Índices que empiezan por el periodo: las consultas del periodo activo no
+    # recorren el historial, por grande que sea
+    __table_args__ = (
+        Index('ix_horarios_periodo_user_id', 'periodo', 'user_id'),
+        Index('ix_horarios_periodo_dia', 'periodo', 'dia'),
+        Index('ix_horarios_periodo_salon', 'periodo', 'salon'),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     materia = Column(String(255), nullable=False)
@@ -21,9 +29,14 @@ class Horario(Base):
     hora_inicio = Column(Time, nullable=False)
     hora_fin = Column(Time, nullable=False)
     salon = Column(String(100), nullable=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True)
+    # Versión monotónica de la última escritura (ver models/sync_model.py)
+    version = Column(Integer, nullable=False, default=0, server_default='0', index=True)
+    updated_at = Column(DateTime, nullable=True)
+    # Periodo académico (config/periodos.py); por defecto, el activo
+    periodo = Column(String(20), nullable=False, default=PERIODO_ACTIVO)
 
-    def __init__(self, materia, docente, dia, hora_inicio, hora_fin, salon=None, user_id=None):
+    def __init__(self, materia, docente, dia, hora_inicio, hora_fin, salon=None, user_id=None, periodo=None):
         self.materia = materia
         self.docente = docente
         self.dia = dia
@@ -31,10 +44,35 @@ class Horario(Base):
         self.hora_fin = hora_fin
         self.salon = salon
         self.user_id = user_id
+        self.periodo = periodo or PERIODO_ACTIVO
 
     def __repr__(self):
         return (
             f"<Horario(id={self.id}, materia='{self.materia}', docente='{self.docente}', "
             f"dia='{self.dia}', hora_inicio='{self.hora_inicio}', hora_fin='{self.hora_fin}', "
-            f"salon='{self.salon}', user_id={self.user_id})>"
+            f"salon='{self.salon}', user_id={self.user_id}, version={self.version}, periodo='{self.periodo}')>"
         )
+
+
+class HorarioHistorico(Base):
+    """
+    Horarios de periodos archivados (`flask periodos archivar`). Conserva el
+    id original; solo se consulta para reportes históricos.
+    """
+    __tablename__ = 'horarios_historicos'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    materia = Column(String(255), nullable=False)
+    docente = Column(String(255), nullable=False)
+    dia = Column(String(50), nullable=False)
+    hora_inicio = Column(Time, nullable=False)
+    hora_fin = Column(Time, nullable=False)
+    salon = Column(String(100), nullable=True)
+    user_id = Column(Integer, nullable=True)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+    periodo = Column(String(20), nullable=False, index=True)
+    archivado_en = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<HorarioHistorico(id={self.id}, periodo='{self.periodo}', materia='{self.materia}')>"
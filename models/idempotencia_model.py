@@ -0,0 +1,38 @@
+#models/idempotencia_model
+import logging
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from models.db import Base
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ClaveIdempotencia(Base):
+    """
+    Respuesta guardada para un header Idempotency-Key. Mientras la petición
+    original se procesa la fila queda 'en_proceso'; al terminar guarda el
+    status y el cuerpo para repetirlos ante reintentos con la misma clave.
+    """
+    __tablename__ = 'claves_idempotencia'
+    __table_args__ = (UniqueConstraint('clave', 'user_id', name='uq_clave_idempotencia_usuario'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    clave = Column(String(255), nullable=False)
+    user_id = Column(Integer, nullable=False)
+    huella = Column(String(64), nullable=False)
+    estado = Column(String(20), nullable=False, default='en_proceso')
+    status_code = Column(Integer, nullable=True)
+    respuesta = Column(Text, nullable=True)
+    creada_en = Column(DateTime, nullable=False)
+    expira_en = Column(DateTime, nullable=False, index=True)
+
+    def __init__(self, clave, user_id, huella, creada_en, expira_en):
+        self.clave = clave
+        self.user_id = user_id
+        self.huella = huella
+        self.estado = 'en_proceso'
+        self.creada_en = creada_en
+        self.expira_en = expira_en
+
+    def __repr__(self):
+        return f"<ClaveIdempotencia(clave='{self.clave}', user_id={self.user_id}, estado='{self.estado}')>"
@@ -0,0 +1,24 @@
+#models/institucion_model
+import logging
+from sqlalchemy import Column, String, DateTime
+from models.db import Base
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class Institucion(Base):
+    """
+    Catálogo de instituciones (facultades) y el shard donde vive la base de
+    cada una. Solo se usa en la base principal; en las bases de las
+    instituciones la tabla existe (misma cadena de migraciones) pero queda vacía.
+    """
+    __tablename__ = 'instituciones'
+
+    nombre = Column(String(40), primary_key=True)
+    shard = Column(String(40), nullable=False)
+    estado = Column(String(20), nullable=False, default='activa')  # 'activa' o 'moviendo'
+    actualizado_en = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<Institucion(nombre='{self.nombre}', shard='{self.shard}', estado='{self.estado}')>"
@@ -0,0 +1,49 @@
+#models/sync_model
+import logging
+from sqlalchemy import Column, Integer, String, DateTime
+from models.db import Base
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ContadorVersion(Base):
+    """
+    Contador monotónico de versiones. Cada escritura sobre horarios toma el
+    siguiente valor dentro de su transacción, por lo que las versiones se
+    confirman en orden.
+    """
+    __tablename__ = 'contador_versiones'
+
+    nombre = Column(String(50), primary_key=True)
+    valor = Column(Integer, nullable=False, default=0)
+
+    def __init__(self, nombre, valor=0):
+        self.nombre = nombre
+        self.valor = valor
+
+    def __repr__(self):
+        return f"<ContadorVersion(nombre='{self.nombre}', valor={self.valor})>"
+
+
+class HorarioEliminado(Base):
+    """
+    Lápida (tombstone) de un horario eliminado, para que los clientes que
+    sincronizan por versión puedan quitarlo de su copia local.
+    """
+    __tablename__ = 'horarios_eliminados'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    horario_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    version = Column(Integer, nullable=False, index=True)
+    eliminado_en = Column(DateTime, nullable=False)
+
+    def __init__(self, horario_id, version, eliminado_en, user_id=None):
+        self.horario_id = horario_id
+        self.version = version
+        self.eliminado_en = eliminado_en
+        self.user_id = user_id
+
+    def __repr__(self):
+        return f"<HorarioEliminado(horario_id={self.horario_id}, version={self.version})>"
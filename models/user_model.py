@@ -16,7 +16,9 @@ class User(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password = Column(String(255), nullable=False)
-    role = Column(String(20), default='user', nullable=False)
+    role = Column(String(20), default='user', nullable=False, index=True)
+    # Hash SHA-256 del token del feed iCal (null = sin feed o revocado)
+    ical_token_hash = Column(String(64), unique=True, index=True, nullable=True)
 
     def __init__(self, email, password, role='user'):
         self.email = email
@@ -0,0 +1,100 @@
+#repositories/async_repository
+import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.horario_model import Horario
+from models.sync_model import ContadorVersion
+from models.user_model import User
+from config.periodos import PERIODO_ACTIVO
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------
+# Sentencias de lectura del modo ASGI. Se arman con select() para que
+# `flask db planes` las revise también con una sesión síncrona.
+# ---------------------------------------------------------------------
+def consulta_version_actual():
+    return select(ContadorVersion.valor).where(ContadorVersion.nombre == 'horarios')
+
+
+def consulta_horarios_con_email(periodo: str = PERIODO_ACTIVO):
+    """Horarios del periodo con el email del usuario asignado en la misma consulta."""
+    return (select(Horario, User.email)
+            .outerjoin(User, User.id == Horario.user_id)
+            .where(Horario.periodo == periodo))
+
+
+def consulta_horarios_por_ids(ids: list):
+    return (select(Horario, User.email)
+            .outerjoin(User, User.id == Horario.user_id)
+            .where(Horario.id.in_(ids)))
+
+
+def consulta_horario_por_id(horario_id: int):
+    return select(Horario).where(Horario.id == horario_id)
+
+
+def consulta_horarios_de_usuario(user_id: int, periodo: str = PERIODO_ACTIVO):
+    return select(Horario).where(Horario.periodo == periodo, Horario.user_id == user_id)
+
+
+def consulta_usuarios():
+    return select(User)
+
+
+def consulta_usuarios_por_ids(ids: list):
+    return select(User).where(User.id.in_(ids))
+
+
+def consulta_usuario_por_id(user_id: int):
+    return select(User).where(User.id == user_id)
+
+
+class HorarioAsyncRepository:
+    """
+    Lecturas de horarios sobre AsyncSession (asgi.py). Mismos resultados que
+    HorarioRepository, pero el listado trae el email en un solo JOIN.
+    """
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def get_version_actual(self):
+        version = await self.db.scalar(consulta_version_actual())
+        return version or 0
+
+    async def get_all_horarios(self, periodo: str = PERIODO_ACTIVO):
+        """Pares (horario, email) del periodo (por defecto, el activo)."""
+        logger.info(f"Obteniendo todos los horarios del periodo {periodo} (async)")
+        return (await self.db.execute(consulta_horarios_con_email(periodo))).all()
+
+    async def get_horarios_by_ids(self, ids: list):
+        """Pares (horario, email) de los IDs pedidos, sin orden definido."""
+        logger.info(f"Buscando {len(ids)} horarios por ID (async)")
+        return (await self.db.execute(consulta_horarios_por_ids(ids))).all()
+
+    async def get_horario_by_id(self, horario_id: int):
+        logger.info(f"Buscando horario por ID: {horario_id} (async)")
+        return await self.db.scalar(consulta_horario_por_id(horario_id))
+
+    async def get_horarios_by_user(self, user_id: int, periodo: str = PERIODO_ACTIVO):
+        logger.info(f"Obteniendo horarios del usuario {user_id} en el periodo {periodo} (async)")
+        return (await self.db.scalars(consulta_horarios_de_usuario(user_id, periodo))).all()
+
+
+class UserAsyncRepository:
+    """Lecturas de usuarios sobre AsyncSession (asgi.py)."""
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def get_all_users(self):
+        logger.info("Obteniendo todos los usuarios (async)")
+        return (await self.db.scalars(consulta_usuarios())).all()
+
+    async def get_user_by_id(self, user_id: int):
+        logger.info(f"Buscando usuario por ID: {user_id} (async)")
+        return await self.db.scalar(consulta_usuario_por_id(user_id))
+
+    async def get_users_by_ids(self, ids: list):
+        logger.info(f"Buscando {len(ids)} usuarios por ID (async)")
+        return (await self.db.scalars(consulta_usuarios_por_ids(ids))).all()
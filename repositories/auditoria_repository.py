@@ -0,0 +1,42 @@
+#repositories/auditoria_repository
+import logging
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from models.auditoria_model import EventoAuditoria
+
+# Configuración de logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AuditoriaRepository:
+    """
+    Acceso a la tabla de auditoría: inserción por lotes y lectura paginada por
+    keyset (id descendente), que cuesta lo mismo en la primera página que en
+    la última.
+    """
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def insertar_lote(self, eventos: list):
+        """Inserta varios eventos con un solo executemany y confirma."""
+        try:
+            self.db.execute(insert(EventoAuditoria), eventos)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def listar(self, limite: int, antes_de: int = None, entidad: str = None, entidad_id: int = None,
+               actor_id: int = None):
+        """Eventos más recientes primero; `antes_de` es el id del último evento de la página anterior."""
+        consulta = select(EventoAuditoria).order_by(EventoAuditoria.id.desc()).limit(limite)
+        if antes_de is not None:
+            consulta = consulta.where(EventoAuditoria.id < antes_de)
+        if entidad is not None:
+            consulta = consulta.where(EventoAuditoria.entidad == entidad)
+        if entidad_id is not None:
+            consulta = consulta.where(EventoAuditoria.entidad_id == entidad_id)
+        if actor_id is not None:
+            consulta = consulta.where(EventoAuditoria.actor_id == actor_id)
+        return self.db.execute(consulta).scalars().all()
@@ -0,0 +1,143 @@
+#repositories/busqueda_repository
+import re
+import logging
+import unicodedata
+from sqlalchemy import Table, Column, Integer, MetaData, select, insert, delete, func, or_, literal_column
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.mysql import match
+from models.horario_model import Horario
+from config.periodos import PERIODO_ACTIVO
+
+# Configuración de logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tabla virtual FTS5 (solo SQLite), creada por las migraciones. Usa su propio MetaData para
+# que autogenerate no la compare con los modelos; el rowid de cada fila es el id del horario.
+horarios_fts = Table(
+    'horarios_fts', MetaData(),
+    Column('rowid', Integer, primary_key=True),
+    Column('materia'),
+    Column('docente'),
+    Column('salon'),
+    Column('periodo'),
+)
+# Peso de cada columna en el ranking bm25 (materia, docente, salon)
+PESOS_BM25 = (3.0, 2.0, 1.0)
+MAX_TERMINOS = 8
+
+
+def terminos_busqueda(texto: str):
+    """Separa la búsqueda en términos sin tildes ni signos (cada uno se busca como prefijo)."""
+    sin_tildes = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return re.findall(r'\w+', sin_tildes.lower())[:MAX_TERMINOS]
+
+
+def reconstruir_indice_busqueda(conn):
+    """
+    Vuelve a llenar el índice FTS5 después de una carga masiva que no pasó
+    por el repositorio (seed, respaldo, copia entre shards), si quedó
+    desfasado. El índice lo crean solo las migraciones; en MySQL el FULLTEXT
+    lo mantiene el motor y no hay nada que hacer.
+    """
+    if conn.dialect.name != 'sqlite':
+        return
+    indexados = conn.execute(select(func.count()).select_from(horarios_fts)).scalar()
+    total = conn.execute(select(func.count()).select_from(Horario.__table__)).scalar()
+    if indexados != total:
+        logger.info(f"Reconstruyendo índice de búsqueda ({indexados} de {total} horarios indexados)")
+        conn.execute(delete(horarios_fts))
+        conn.execute(insert(horarios_fts).from_select(
+            ['rowid', 'materia', 'docente', 'salon', 'periodo'],
+            select(Horario.id, Horario.materia, Horario.docente, Horario.salon, Horario.periodo)
+        ))
+
+
+class BusquedaRepository:
+    """
+    Búsqueda de horarios por materia, docente y salón sobre un índice de texto.
+    En SQLite el índice FTS5 se mantiene desde las escrituras de
+    HorarioRepository; en MySQL el índice FULLTEXT lo mantiene el motor.
+    Otros motores usan LIKE como respaldo.
+    """
+    def __init__(self, db_session: Session):
+        self.db = db_session
+        self.dialecto = db_session.get_bind().dialect.name
+
+    # -----------------------------------------------------------------
+    # Sincronización del índice (misma transacción que la escritura)
+    # -----------------------------------------------------------------
+    def indexar(self, *condiciones):
+        """Reindexa los horarios que cumplen las condiciones."""
+        if self.dialecto != 'sqlite':
+            return
+        self.desindexar(*condiciones)
+        self.db.execute(insert(horarios_fts).from_select(
+            ['rowid', 'materia', 'docente', 'salon', 'periodo'],
+            select(Horario.id, Horario.materia, Horario.docente, Horario.salon, Horario.periodo).where(*condiciones)
+        ))
+
+    def desindexar(self, *condiciones):
+        """Quita del índice los horarios que cumplen las condiciones (antes de borrarlos)."""
+        if self.dialecto != 'sqlite':
+            return
+        self.db.execute(delete(horarios_fts).where(
+            horarios_fts.c.rowid.in_(select(Horario.id).where(*condiciones))
+        ))
+
+    # -----------------------------------------------------------------
+    # Consulta
+    # -----------------------------------------------------------------
+    def buscar(self, texto: str, limite: int = 50, user_id: int = None, periodo: str = PERIODO_ACTIVO):
+        """
+        Retorna los horarios del periodo que contienen todos los términos (como
+        prefijo), ordenados por relevancia.
+        """
+        terminos = terminos_busqueda(texto)
+        if not terminos:
+            return []
+        logger.info(f"Buscando horarios: {terminos} (motor: {self.dialecto}, periodo: {periodo})")
+        if self.dialecto == 'sqlite':
+            return self._buscar_fts5(terminos, limite, user_id, periodo)
+        consulta = self._consulta_fulltext(terminos) if self.dialecto == 'mysql' else self._consulta_like(terminos)
+        consulta = consulta.filter(Horario.periodo == periodo)
+        if user_id is not None:
+            consulta = consulta.filter(Horario.user_id == user_id)
+        return consulta.limit(limite).all()
+
+    def _buscar_fts5(self, terminos, limite, user_id=None, periodo=PERIODO_ACTIVO):
+        """
+        Ordena y limita dentro del índice FTS5 y solo después trae los horarios:
+        así el JOIN con la tabla se hace para `limite` filas y no para todas las coincidencias.
+        El periodo se guarda en el índice (columna no indexada) y se filtra ahí mismo.
+        """
+        tabla = literal_column('horarios_fts')
+        rango = func.bm25(tabla, *PESOS_BM25).label('rango')
+        mejores = (select(horarios_fts.c.rowid, rango)
+                   .where(tabla.op('MATCH')(' '.join(f'"{termino}"*' for termino in terminos)),
+                          horarios_fts.c.periodo == periodo))
+        if user_id is not None:
+            mejores = mejores.where(horarios_fts.c.rowid.in_(
+                select(Horario.id).where(Horario.periodo == periodo, Horario.user_id == user_id)
+            ))
+        mejores = mejores.order_by(rango, horarios_fts.c.rowid).limit(limite).subquery()
+        return (self.db.query(Horario)
+                .join(mejores, mejores.c.rowid == Horario.id)
+                .order_by(mejores.c.rango, Horario.id)
+                .all())
+
+    def _consulta_fulltext(self, terminos):
+        # Modo booleano: +termino* exige cada término como prefijo; la intercalación
+        # de la columna (utf8mb4_*_ci) ignora tildes y mayúsculas
+        relevancia = match(
+            Horario.materia, Horario.docente, Horario.salon,
+            against=' '.join(f'+{termino}*' for termino in terminos)
+        ).in_boolean_mode()
+        return self.db.query(Horario).filter(relevancia > 0).order_by(relevancia.desc(), Horario.id)
+
+    def _consulta_like(self, terminos):
+        condiciones = [
+            or_(Horario.materia.ilike(f'%{t}%'), Horario.docente.ilike(f'%{t}%'), Horario.salon.ilike(f'%{t}%'))
+            for t in terminos
+        ]
+        return self.db.query(Horario).filter(*condiciones).order_by(Horario.materia, Horario.id)
@@ -0,0 +1,72 @@
+#repositories/estadisticas_repository
+import logging
+from sqlalchemy import func, extract
+from sqlalchemy.orm import Session
+from models.horario_model import Horario
+from models.user_model import User
+from config.periodos import PERIODO_ACTIVO
+
+# Configuración de logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EstadisticasRepository:
+    """
+    Repositorio de consultas agregadas (GROUP BY / COUNT / SUM) para el dashboard.
+    Todas las agregaciones se calculan en la base de datos, sobre el periodo activo.
+    """
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def _minutos(self):
+        """Expresión SQL con la duración en minutos de cada horario según el motor."""
+        dialecto = self.db.get_bind().dialect.name
+        if dialecto == 'sqlite':
+            segundos = func.strftime('%s', Horario.hora_fin) - func.strftime('%s', Horario.hora_inicio)
+        elif dialecto == 'mysql':
+            segundos = func.time_to_sec(Horario.hora_fin) - func.time_to_sec(Horario.hora_inicio)
+        else:
+            segundos = extract('epoch', Horario.hora_fin - Horario.hora_inicio)
+        return segundos / 60
+
+    def totales_horarios(self):
+        """Retorna (total, asignados) en una sola consulta."""
+        logger.info("Contando horarios asignados y sin asignar")
+        total, asignados = (self.db.query(func.count(Horario.id), func.count(Horario.user_id))
+                            .filter(Horario.periodo == PERIODO_ACTIVO).one())
+        return total, asignados
+
+    def usuarios_por_rol(self):
+        logger.info("Contando usuarios por rol")
+        return self.db.query(User.role, func.count(User.id)).group_by(User.role).all()
+
+    def horarios_por_dia(self):
+        logger.info("Agrupando horarios por día")
+        return (self.db.query(Horario.dia, func.count(Horario.id))
+                .filter(Horario.periodo == PERIODO_ACTIVO)
+                .group_by(Horario.dia)
+                .all())
+
+    def horarios_por_docente(self):
+        logger.info("Agrupando horarios por docente")
+        return (self.db.query(Horario.docente, func.count(Horario.id))
+                .filter(Horario.periodo == PERIODO_ACTIVO)
+                .group_by(Horario.docente)
+                .order_by(func.count(Horario.id).desc())
+                .all())
+
+    def uso_por_salon(self):
+        """Retorna (salon, total_horarios, minutos_semanales) por salón."""
+        logger.info("Agrupando horarios por salón")
+        return (self.db.query(Horario.salon, func.count(Horario.id), func.sum(self._minutos()))
+                .filter(Horario.periodo == PERIODO_ACTIVO)
+                .group_by(Horario.salon)
+                .all())
+
+    def minutos_por_usuario(self):
+        """Retorna (user_id, email, total_horarios, minutos_semanales) por usuario con horarios."""
+        logger.info("Sumando minutos semanales por usuario")
+        return (self.db.query(User.id, User.email, func.count(Horario.id), func.sum(self._minutos()))
+                .join(Horario, (Horario.user_id == User.id) & (Horario.periodo == PERIODO_ACTIVO))
+                .group_by(User.id, User.email)
+                .all())
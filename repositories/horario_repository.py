@@ -1,36 +1,155 @@
 #repositories/horario_repository
 import logging
+from datetime import datetime
+from sqlalchemy import update, delete, select, insert, literal, func
 from sqlalchemy.orm import Session
 from models.horario_model import Horario
+from models.user_model import User
+from models.sync_model import ContadorVersion, HorarioEliminado
+from repositories.busqueda_repository import BusquedaRepository
+from config.periodos import PERIODO_ACTIVO, validar_periodo
 from dateutil import parser
 
 # Configuración de logs
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Campos que se pueden usar como filtro o modificar en operaciones por lote
+CAMPOS_FILTRO = ('user_id', 'materia', 'docente', 'dia', 'salon', 'periodo')
+CAMPOS_EDITABLES = ('materia', 'docente', 'dia', 'hora_inicio', 'hora_fin', 'salon', 'user_id', 'periodo')
+# Campos que no admiten null ni cadena vacía en una actualización parcial
+CAMPOS_OBLIGATORIOS = ('materia', 'docente', 'dia', 'hora_inicio', 'hora_fin', 'periodo')
+# Campos guardados en el índice de búsqueda de texto
+CAMPOS_TEXTO = ('materia', 'docente', 'salon', 'periodo')
+
+
+def _parse_hora(valor):
+    """Convierte una hora en texto (HH:MM u otro formato) a datetime.time."""
+    if not isinstance(valor, str):
+        raise ValueError(f"Formato de hora inválido: {valor}")
+    if len(valor) == 5 and ':' in valor:
+        return datetime.strptime(valor, '%H:%M').time()
+    try:
+        return parser.parse(valor).time()
+    except Exception:
+        raise ValueError(f"Formato de hora inválido: {valor}")
+
+
+def _normalizar_valores(cambios: dict):
+    """Convierte las horas de texto y valida el periodo de unos cambios."""
+    valores = dict(cambios)
+    for campo in ('hora_inicio', 'hora_fin'):
+        if valores.get(campo):
+            valores[campo] = _parse_hora(valores[campo])
+    if 'periodo' in valores:
+        valores['periodo'] = validar_periodo(valores['periodo'])
+    return valores
+
+
 class HorarioRepository:
     """
     Repositorio encargado de manejar las operaciones CRUD del modelo Horario.
+    Los listados, búsquedas y filtros se limitan al periodo activo
+    (PERIODO_ACTIVO) salvo que se indique otro; las operaciones por ID no.
     """
     def __init__(self, db_session: Session):
         self.db = db_session
+        self.busqueda = BusquedaRepository(db_session)
+        # Versión asignada a la última escritura hecha con este repositorio
+        self.ultima_version = None
+
+    def _siguiente_version(self):
+        """
+        Incrementa el contador de versiones dentro de la transacción actual.
+        El UPDATE bloquea la fila del contador hasta el commit, así que las
+        versiones se confirman en el mismo orden en que se asignan.
+        """
+        sentencia = (update(ContadorVersion).where(ContadorVersion.nombre == 'horarios')
+                     .values(valor=ContadorVersion.valor + 1))
+        if self.db.get_bind().dialect.update_returning:
+            version = self.db.execute(sentencia.returning(ContadorVersion.valor)).scalar()
+        else:
+            resultado = self.db.execute(sentencia)
+            version = None
+            if resultado.rowcount:
+                version = self.db.execute(
+                    select(ContadorVersion.valor).where(ContadorVersion.nombre == 'horarios')
+                ).scalar()
+        if version is None:
+            version = 1
+            self.db.add(ContadorVersion('horarios', version))
+            self.db.flush()
+        self.ultima_version = version
+        return version
 
-    def get_all_horarios(self):
-        """Obtiene todos los registros de horarios."""
-        logger.info("Obteniendo todos los horarios desde el repositorio.")
-        return self.db.query(Horario).all()
+    def get_version_actual(self):
+        """Retorna la última versión confirmada de la tabla de horarios."""
+        version = self.db.query(ContadorVersion.valor).filter(ContadorVersion.nombre == 'horarios').scalar()
+        return version or 0
+
+    def get_cambios_desde(self, version: int):
+        """
+        Retorna los horarios del periodo activo modificados y las lápidas de
+        los eliminados con versión mayor a `version`. Los horarios incluyen el
+        email del usuario. Un horario movido a otro periodo sale de la copia
+        del cliente, así que se entrega como lápida.
+        """
+        logger.info(f"Obteniendo cambios de horarios desde la versión: {version}")
+        modificados = (self.db.query(Horario, User.email)
+                       .outerjoin(User, User.id == Horario.user_id)
+                       .filter(Horario.version > version)
+                       .order_by(Horario.version)
+                       .all())
+        cambios = [(h, email) for h, email in modificados if h.periodo == PERIODO_ACTIVO]
+        fuera_del_periodo = [HorarioEliminado(h.id, h.version, h.updated_at, h.user_id)
+                             for h, _ in modificados if h.periodo != PERIODO_ACTIVO]
+        eliminados = (self.db.query(HorarioEliminado)
+                      .filter(HorarioEliminado.version > version)
+                      .order_by(HorarioEliminado.version)
+                      .all())
+        if fuera_del_periodo:
+            eliminados = sorted(eliminados + fuera_del_periodo, key=lambda e: e.version)
+        return cambios, eliminados
+
+    def get_all_horarios(self, periodo: str = PERIODO_ACTIVO):
+        """
+        Obtiene todos los horarios de un periodo (por defecto, el activo) con
+        el email del usuario asignado en la misma consulta. Retorna pares
+        (horario, email).
+        """
+        logger.info(f"Obteniendo todos los horarios del periodo {periodo} desde el repositorio.")
+        return (self.db.query(Horario, User.email)
+                .outerjoin(User, User.id == Horario.user_id)
+                .filter(Horario.periodo == periodo)
+                .all())
 
     def get_horario_by_id(self, horario_id: int):
         """Busca un horario específico por su ID."""
         logger.info(f"Buscando horario por ID: {horario_id}")
         return self.db.query(Horario).filter(Horario.id == horario_id).first()
 
-    def get_horarios_by_user(self, user_id: int):
-        """Obtiene todos los horarios asignados a un usuario específico."""
-        logger.info(f"Obteniendo horarios del usuario: {user_id}")
-        return self.db.query(Horario).filter(Horario.user_id == user_id).all()
+    def get_horarios_by_ids(self, ids: list):
+        """
+        Obtiene varios horarios por ID con un solo IN, junto al email del
+        usuario asignado. Retorna pares (horario, email) sin orden definido.
+        """
+        logger.info(f"Buscando {len(ids)} horarios por ID")
+        return (self.db.query(Horario, User.email)
+                .outerjoin(User, User.id == Horario.user_id)
+                .filter(Horario.id.in_(ids))
+                .all())
+
+    def get_horarios_by_user(self, user_id: int, periodo: str = PERIODO_ACTIVO):
+        """Obtiene los horarios de un usuario en un periodo (por defecto, el activo)."""
+        logger.info(f"Obteniendo horarios del usuario {user_id} en el periodo {periodo}")
+        return self.db.query(Horario).filter(Horario.periodo == periodo, Horario.user_id == user_id).all()
 
-    def create_horario(self, materia: str, docente: str, dia: str, hora_inicio: str, hora_fin: str, salon: str, user_id: int = None):
+    def buscar_horarios(self, texto: str, limite: int = 50, user_id: int = None):
+        """Búsqueda por materia, docente y salón sobre el índice de texto (periodo activo)."""
+        return self.busqueda.buscar(texto, limite, user_id)
+
+    def create_horario(self, materia: str, docente: str, dia: str, hora_inicio: str, hora_fin: str, salon: str,
+                       user_id: int = None, periodo: str = None):
         """
         Crea un nuevo horario en la base de datos.
         Convierte las horas de texto a formato datetime si es necesario.
@@ -73,10 +192,15 @@ class HorarioRepository:
             hora_inicio=hora_inicio_parsed,
             hora_fin=hora_fin_parsed,
             salon=salon,
-            user_id=user_id
+            user_id=user_id,
+            periodo=validar_periodo(periodo) if periodo else PERIODO_ACTIVO
         )
         try:
+            nuevo_horario.version = self._siguiente_version()
+            nuevo_horario.updated_at = datetime.utcnow()
             self.db.add(nuevo_horario)
+            self.db.flush()
+            self.busqueda.indexar(Horario.id == nuevo_horario.id)
             self.db.commit()
             self.db.refresh(nuevo_horario)
             logger.info(f"Horario creado correctamente con ID: {nuevo_horario.id}")
@@ -112,6 +236,10 @@ class HorarioRepository:
                 horario.salon = salon
             if user_id is not None:
                 horario.user_id = user_id
+            horario.version = self._siguiente_version()
+            horario.updated_at = datetime.utcnow()
+            self.db.flush()
+            self.busqueda.indexar(Horario.id == horario_id)
             self.db.commit()
             self.db.refresh(horario)
             logger.info(f"Horario actualizado correctamente: {horario_id}")
@@ -119,14 +247,158 @@ class HorarioRepository:
         logger.warning(f"Horario no encontrado para actualizar: {horario_id}")
         return None
 
+    def patch_horario(self, horario_id: int, cambios: dict, owner_id: int = None):
+        """
+        Actualización parcial en una sola sentencia: solo modifica los campos
+        presentes en `cambios` (null incluido) y retorna la fila resultante con
+        UPDATE ... RETURNING. Si se indica `owner_id`, la verificación de
+        propiedad va en el mismo WHERE. Retorna None si ninguna fila coincide.
+        """
+        valores = _normalizar_valores(cambios)
+        condiciones = [Horario.id == horario_id]
+        if owner_id is not None:
+            condiciones.append(Horario.user_id == owner_id)
+        columnas = Horario.__table__.c
+        logger.info(f"Actualización parcial del horario {horario_id}: {list(valores)}")
+        try:
+            valores['version'] = self._siguiente_version()
+            valores['updated_at'] = datetime.utcnow()
+            sentencia = (update(Horario).where(*condiciones).values(**valores)
+                         .execution_options(synchronize_session=False))
+            if self.db.get_bind().dialect.update_returning:
+                fila = self.db.execute(sentencia.returning(*columnas)).first()
+            else:
+                # Motores sin RETURNING (MySQL): UPDATE + SELECT en la misma transacción
+                resultado = self.db.execute(sentencia)
+                fila = None
+                if resultado.rowcount:
+                    fila = self.db.execute(select(*columnas).where(Horario.id == horario_id)).first()
+            if fila is not None and set(cambios) & set(CAMPOS_TEXTO):
+                self.busqueda.indexar(Horario.id == horario_id)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error en la actualización parcial del horario {horario_id}: {str(e)}")
+            raise
+        if fila is None:
+            logger.warning(f"Horario no encontrado para actualizar parcialmente: {horario_id}")
+        return fila
+
     def delete_horario(self, horario_id: int):
         """Elimina un horario de la base de datos."""
         horario = self.get_horario_by_id(horario_id)
         if horario:
             logger.info(f"Eliminando horario con ID: {horario_id}")
+            self.db.add(HorarioEliminado(horario.id, self._siguiente_version(), datetime.utcnow(), horario.user_id))
+            self.busqueda.desindexar(Horario.id == horario.id)
             self.db.delete(horario)
             self.db.commit()
             logger.info(f"Horario eliminado correctamente: {horario_id}")
             return horario
         logger.warning(f"Horario no encontrado para eliminar: {horario_id}")
         return None
+
+    def _condiciones_lote(self, ids=None, filtros=None):
+        """
+        Construye las condiciones WHERE de una operación por lote. Un filtro
+        sin 'periodo' se aplica solo al periodo activo; los IDs no se limitan.
+        """
+        condiciones = []
+        if ids:
+            condiciones.append(Horario.id.in_(ids))
+        if filtros and 'periodo' not in filtros:
+            condiciones.append(Horario.periodo == PERIODO_ACTIVO)
+        for campo, valor in (filtros or {}).items():
+            columna = getattr(Horario, campo)
+            condiciones.append(columna.is_(None) if valor is None else columna == valor)
+        if not condiciones:
+            raise ValueError("Debe indicar una lista de IDs o un filtro")
+        return condiciones
+
+    def bulk_update_horarios(self, cambios: dict, ids: list = None, filtros: dict = None):
+        """
+        Aplica los mismos cambios a todos los horarios que cumplen el filtro
+        con un único UPDATE ... WHERE. Retorna el número de filas afectadas.
+        """
+        valores = _normalizar_valores(cambios)
+        condiciones = self._condiciones_lote(ids, filtros)
+        logger.info(f"Actualización por lote de horarios: cambios={list(valores)} ids={len(ids or [])} filtros={filtros}")
+        try:
+            actualizados = self._actualizar_donde(valores, *condiciones)
+            self.db.commit()
+            logger.info(f"Horarios actualizados por lote: {actualizados}")
+            return actualizados
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error en la actualización por lote: {str(e)}")
+            raise
+
+    def bulk_delete_horarios(self, ids: list = None, filtros: dict = None):
+        """
+        Elimina todos los horarios que cumplen el filtro con un único
+        DELETE ... WHERE. Retorna el número de filas eliminadas.
+        """
+        condiciones = self._condiciones_lote(ids, filtros)
+        logger.info(f"Eliminación por lote de horarios: ids={len(ids or [])} filtros={filtros}")
+        try:
+            eliminados = self._eliminar_donde(*condiciones)
+            self.db.commit()
+            logger.info(f"Horarios eliminados por lote: {eliminados}")
+            return eliminados
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error en la eliminación por lote: {str(e)}")
+            raise
+
+    def _actualizar_donde(self, valores: dict, *condiciones):
+        """UPDATE ... WHERE con una versión nueva para todas las filas, sin confirmar. Retorna las filas afectadas."""
+        valores['version'] = self._siguiente_version()
+        valores['updated_at'] = datetime.utcnow()
+        resultado = self.db.execute(
+            update(Horario).where(*condiciones).values(**valores)
+            .execution_options(synchronize_session=False)
+        )
+        if set(valores) & set(CAMPOS_TEXTO):
+            # Las filas recién actualizadas son las que tienen la versión de este lote
+            self.busqueda.indexar(Horario.version == valores['version'])
+        return resultado.rowcount
+
+    def _eliminar_donde(self, *condiciones):
+        """DELETE ... WHERE con sus lápidas y la salida del índice de búsqueda, sin confirmar."""
+        # Las lápidas se insertan con un INSERT ... SELECT antes del DELETE
+        version = self._siguiente_version()
+        self.db.execute(insert(HorarioEliminado).from_select(
+            ['horario_id', 'user_id', 'version', 'eliminado_en'],
+            select(Horario.id, Horario.user_id, literal(version), literal(datetime.utcnow()))
+            .where(*condiciones)
+        ))
+        self.busqueda.desindexar(*condiciones)
+        resultado = self.db.execute(
+            delete(Horario).where(*condiciones)
+            .execution_options(synchronize_session=False)
+        )
+        return resultado.rowcount
+
+    # -----------------------------------------------------------------
+    # Horarios de usuarios eliminados
+    # -----------------------------------------------------------------
+    @staticmethod
+    def condicion_huerfanos():
+        """Horarios (de cualquier periodo) cuyo user_id ya no existe en users."""
+        return Horario.user_id.isnot(None) & ~select(User.id).where(User.id == Horario.user_id).exists()
+
+    def aplicar_politica_usuario(self, condicion, politica: str, destino_id: int = None):
+        """
+        Aplica `politica` a los horarios que cumplen `condicion` con una sola
+        sentencia y sin confirmar: 'desasignar' (user_id = NULL), 'reasignar'
+        (user_id = destino_id) o 'eliminar' (con lápidas). Si ningún horario
+        cumple la condición no se consume una versión. Retorna las filas afectadas.
+        """
+        if self.db.execute(select(Horario.id).where(condicion).limit(1)).first() is None:
+            return 0
+        if politica == 'eliminar':
+            return self._eliminar_donde(condicion)
+        return self._actualizar_donde({'user_id': destino_id if politica == 'reasignar' else None}, condicion)
+
+    def contar_huerfanos(self):
+        return self.db.scalar(select(func.count()).select_from(Horario).where(self.condicion_huerfanos()))
@@ -0,0 +1,73 @@
+#repositories/idempotencia_repository
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.idempotencia_model import ClaveIdempotencia
+
+# Configuración de logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class IdempotenciaRepository:
+    """
+    Acceso a las claves de idempotencia. La restricción única (clave, user_id)
+    hace que solo una petición concurrente pueda reservar la misma clave.
+    """
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def reservar(self, clave: str, user_id: int, huella: str, bloqueo: float, intentos: int = 2):
+        """
+        Intenta reservar la clave. Retorna None si se reservó (la petición debe
+        ejecutarse) o la fila existente si otra petición ya la usó. Si la fila
+        que impidió la reserva se liberó antes de leerla, se reintenta; si
+        sigue pasando, se responde como a una clave en proceso (sin fila
+        guardada), nunca se ejecuta la petición sin reserva.
+        """
+        for _ in range(intentos):
+            ahora = datetime.utcnow()
+            try:
+                # Una clave vencida (o una reserva huérfana de un worker caído) se libera
+                self.db.execute(delete(ClaveIdempotencia).where(
+                    ClaveIdempotencia.clave == clave,
+                    ClaveIdempotencia.user_id == user_id,
+                    ClaveIdempotencia.expira_en < ahora
+                ))
+                self.db.add(ClaveIdempotencia(clave, user_id, huella, ahora, ahora + timedelta(seconds=bloqueo)))
+                self.db.commit()
+                return None
+            except IntegrityError:
+                self.db.rollback()
+                existente = (self.db.query(ClaveIdempotencia)
+                             .filter(ClaveIdempotencia.clave == clave, ClaveIdempotencia.user_id == user_id)
+                             .first())
+                if existente is not None:
+                    return existente
+                logger.info(f"La clave de idempotencia del usuario {user_id} se liberó durante la reserva; reintentando")
+        return ClaveIdempotencia(clave, user_id, huella, ahora, ahora)
+
+    def completar(self, clave: str, user_id: int, status_code: int, respuesta: str, ttl: float):
+        """Guarda la respuesta de la petición original durante `ttl` segundos."""
+        self.db.execute(
+            update(ClaveIdempotencia)
+            .where(ClaveIdempotencia.clave == clave, ClaveIdempotencia.user_id == user_id)
+            .values(estado='completada', status_code=status_code, respuesta=respuesta,
+                    expira_en=datetime.utcnow() + timedelta(seconds=ttl))
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def liberar(self, clave: str, user_id: int):
+        """Borra la reserva para que un reintento pueda ejecutar la petición de nuevo."""
+        self.db.execute(delete(ClaveIdempotencia).where(
+            ClaveIdempotencia.clave == clave, ClaveIdempotencia.user_id == user_id
+        ))
+        self.db.commit()
+
+    def purgar_vencidas(self):
+        """Elimina todas las claves vencidas. Retorna cuántas se borraron."""
+        resultado = self.db.execute(delete(ClaveIdempotencia).where(ClaveIdempotencia.expira_en < datetime.utcnow()))
+        self.db.commit()
+        return resultado.rowcount
@@ -0,0 +1,39 @@
+#repositories/institucion_repository
+import logging
+from datetime import datetime
+from sqlalchemy import select, insert, update
+from sqlalchemy.orm import Session
+from models.institucion_model import Institucion
+
+# Configuración de logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class InstitucionRepository:
+    """Catálogo institución -> shard (tabla `instituciones` de la base principal)."""
+    def __init__(self, db_session: Session):
+        self.db = db_session
+
+    def listar(self):
+        """Retorna [(nombre, shard, estado)] de todas las instituciones."""
+        return self.db.execute(
+            select(Institucion.nombre, Institucion.shard, Institucion.estado).order_by(Institucion.nombre)
+        ).all()
+
+    def obtener(self, nombre: str):
+        return self.db.get(Institucion, nombre)
+
+    def crear(self, nombre: str, shard: str):
+        self.db.execute(insert(Institucion).values(nombre=nombre, shard=shard, estado='activa',
+                                                   actualizado_en=datetime.utcnow()))
+        self.db.commit()
+        logger.info(f"Institución '{nombre}' registrada en el shard '{shard}'")
+
+    def actualizar(self, nombre: str, **valores):
+        """Cambia el shard y/o el estado de la institución. Retorna si existía."""
+        resultado = self.db.execute(
+            update(Institucion).where(Institucion.nombre == nombre).values(actualizado_en=datetime.utcnow(), **valores)
+        )
+        self.db.commit()
+        logger.info(f"Institución '{nombre}' actualizada: {valores}")
+        return resultado.rowcount > 0
@@ -0,0 +1,71 @@
+#repositories/periodo_repository
+import logging
+from datetime import datetime
+from sqlalchemy import select, insert, delete, func, literal
+from sqlalchemy.orm import Session
+from models.horario_model import Horario, HorarioHistorico
+from repositories.busqueda_repository import BusquedaRepository
+
+# Configuración de logs
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columnas que se copian de horarios a horarios_historicos
+COLUMNAS_ARCHIVO = ('id', 'materia', 'docente', 'dia', 'hora_inicio', 'hora_fin', 'salon',
+                    'user_id', 'version', 'updated_at', 'periodo')
+
+
+class PeriodoRepository:
+    """
+    Resumen por periodo académico y archivo de periodos pasados: mueve sus
+    horarios a horarios_historicos (en la misma base o en otro archivo SQLite)
+    para que la tabla de horarios solo crezca con los periodos vigentes.
+    """
+    def __init__(self, db_session: Session):
+        self.db = db_session
+        self.busqueda = BusquedaRepository(db_session)
+
+    def resumen(self):
+        """Retorna {periodo: (horarios, archivados)} con un GROUP BY por tabla."""
+        vigentes = dict(self.db.execute(
+            select(Horario.periodo, func.count()).group_by(Horario.periodo)
+        ).all())
+        archivados = dict(self.db.execute(
+            select(HorarioHistorico.periodo, func.count()).group_by(HorarioHistorico.periodo)
+        ).all())
+        return {periodo: (vigentes.get(periodo, 0), archivados.get(periodo, 0))
+                for periodo in sorted(set(vigentes) | set(archivados))}
+
+    def archivar_lote(self, periodo: str, lote: int, destino=None):
+        """
+        Mueve hasta `lote` horarios del periodo y retorna cuántos movió (0 al
+        terminar). Sin `destino`, la copia y el borrado van en una misma
+        transacción. Con `destino` (engine de otro archivo), la copia se
+        confirma allá antes de borrar aquí; repetir un lote interrumpido solo
+        reemplaza las filas ya copiadas.
+        """
+        ids = list(self.db.execute(select(Horario.id).where(Horario.periodo == periodo).limit(lote)).scalars())
+        if not ids:
+            return 0
+        columnas = [getattr(Horario, nombre) for nombre in COLUMNAS_ARCHIVO]
+        ahora = datetime.utcnow()
+        try:
+            if destino is None:
+                self.db.execute(insert(HorarioHistorico).from_select(
+                    list(COLUMNAS_ARCHIVO) + ['archivado_en'],
+                    select(*columnas, literal(ahora)).where(Horario.id.in_(ids))
+                ))
+            else:
+                filas = [dict(fila._mapping, archivado_en=ahora)
+                         for fila in self.db.execute(select(*columnas).where(Horario.id.in_(ids)))]
+                with destino.begin() as conn:
+                    conn.execute(insert(HorarioHistorico.__table__).prefix_with('OR REPLACE', dialect='sqlite'), filas)
+            self.busqueda.desindexar(Horario.id.in_(ids))
+            self.db.execute(delete(Horario).where(Horario.id.in_(ids)).execution_options(synchronize_session=False))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error al archivar horarios del periodo {periodo}: {str(e)}")
+            raise
+        logger.info(f"Archivados {len(ids)} horarios del periodo {periodo}")
+        return len(ids)
@@ -1,5 +1,6 @@
 #repositories/user_repository
 import logging
+from sqlalchemy import select, insert
 from sqlalchemy.orm import Session
 from models.user_model import User
 import bcrypt
@@ -23,6 +24,31 @@ class UserRepository:
         logger.info(f"Buscando usuario por ID: {user_id}")
         return self.db.query(User).filter(User.id == user_id).first()
 
+    def get_users_by_ids(self, ids: list):
+        """Obtiene varios usuarios por ID con un solo IN (sin orden definido)."""
+        logger.info(f"Buscando {len(ids)} usuarios por ID")
+        return self.db.query(User).filter(User.id.in_(ids)).all()
+
+    def get_emails_existentes(self, emails: list, tamano_in: int = 5000):
+        """Emails de la lista que ya están registrados: un IN por cada `tamano_in` emails (índice único)."""
+        logger.info(f"Verificando {len(emails)} emails contra la base")
+        existentes = set()
+        for i in range(0, len(emails), tamano_in):
+            existentes.update(self.db.scalars(select(User.email).where(User.email.in_(emails[i:i + tamano_in]))))
+        return existentes
+
+    def insert_users_lote(self, filas: list):
+        """
+        Inserta las filas (email, password ya hasheada, role) con un solo
+        INSERT y confirma. Retorna (id, email, role) de las insertadas.
+        """
+        self.db.execute(insert(User.__table__), filas)
+        creados = self.db.execute(select(User.id, User.email, User.role)
+                                  .where(User.email.in_([fila['email'] for fila in filas]))).all()
+        self.db.commit()
+        logger.info(f"{len(creados)} usuarios insertados en lote")
+        return creados
+
     def get_user_by_email(self, email: str):
         logger.info(f"Buscando usuario por email: {email}")
         return self.db.query(User).filter(User.email == email).first()
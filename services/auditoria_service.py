@@ -0,0 +1,187 @@
+#services/auditoria_service
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from config.database import sesion_de
+from config.instituciones import InstitucionDesconocida, INSTITUCION_POR_DEFECTO
+from repositories.auditoria_repository import AuditoriaRepository
+
+# Eventos por INSERT y segundos máximos que un evento espera en memoria
+AUDITORIA_LOTE = int(os.getenv("AUDITORIA_LOTE", "200"))
+AUDITORIA_INTERVALO = float(os.getenv("AUDITORIA_INTERVALO", "1"))
+# Eventos en cola antes de empezar a descartar (si la base no da abasto)
+AUDITORIA_MAX_PENDIENTES = int(os.getenv("AUDITORIA_MAX_PENDIENTES", "10000"))
+# Entidades auditadas
+ENTIDADES = ('horario', 'usuario')
+
+
+class RegistroAuditoria:
+    """
+    Auditoría con escritura diferida: `registrar` solo encola el evento en
+    memoria y un hilo en segundo plano lo guarda junto con otros en un solo
+    INSERT cuando se juntan AUDITORIA_LOTE eventos o pasan AUDITORIA_INTERVALO
+    segundos. Al terminar el proceso se vacía la cola (atexit).
+
+    El hilo se inicia con el primer evento, así que cada worker de gunicorn
+    tiene el suyo después del fork. Si la base falla, el lote vuelve a la
+    cola; si la cola se llena, los eventos nuevos se descartan y se cuentan
+    en `descartados`. Cada evento se guarda en la base de su institución
+    (`sesiones(institucion)`): un lote mezclado hace un INSERT por institución.
+    """
+    def __init__(self, sesiones=sesion_de, lote=AUDITORIA_LOTE, intervalo=AUDITORIA_INTERVALO,
+                 max_pendientes=AUDITORIA_MAX_PENDIENTES):
+        self.sesiones = sesiones
+        self.lote = lote
+        self.intervalo = intervalo
+        self._cola = queue.Queue(maxsize=max_pendientes)
+        self._detener = threading.Event()
+        self._hilo = None
+        self._lock = threading.Lock()
+        self.descartados = 0
+        atexit.register(self.cerrar)
+
+    def registrar(self, accion: str, entidad: str, entidad_id: int = None, actor_id: int = None, detalle: dict = None,
+                  institucion: str = INSTITUCION_POR_DEFECTO):
+        """Encola un evento; no toca la base de datos."""
+        evento = {
+            'institucion': institucion,
+            'ocurrido_en': datetime.utcnow(),
+            'actor_id': actor_id,
+            'accion': accion,
+            'entidad': entidad,
+            'entidad_id': entidad_id,
+            'detalle': dict(detalle) if detalle else None,
+        }
+        try:
+            self._cola.put_nowait(evento)
+        except queue.Full:
+            self.descartados += 1
+            logger.warning(f"Cola de auditoría llena: evento {accion} {entidad} {entidad_id} descartado")
+        if self._hilo is None:
+            self._iniciar()
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def _iniciar(self):
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name='auditoria', daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            eventos = self._tomar_lote()
+            if eventos and not self._guardar(eventos):
+                # La base falló: se reintenta en el siguiente ciclo sin girar en vacío
+                self._detener.wait(self.intervalo)
+
+    def _tomar_lote(self):
+        """
+        Espera el primer evento hasta `intervalo` segundos y junta los que
+        lleguen hasta completar el lote o cumplir el plazo desde el primero.
+        """
+        try:
+            eventos = [self._cola.get(timeout=self.intervalo)]
+        except queue.Empty:
+            return []
+        plazo = time.monotonic() + self.intervalo
+        while len(eventos) < self.lote:
+            restante = plazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                eventos.append(self._cola.get(timeout=restante))
+            except queue.Empty:
+                break
+        return eventos
+
+    def _guardar(self, eventos, reintentar=True):
+        """Inserta el lote (un INSERT por institución); lo que falle vuelve a la cola si `reintentar`. Retorna si se guardó todo."""
+        por_institucion = {}
+        for evento in eventos:
+            por_institucion.setdefault(evento['institucion'], []).append(evento)
+        guardado = True
+        for institucion, grupo in por_institucion.items():
+            if not self._guardar_grupo(institucion, grupo, reintentar):
+                guardado = False
+        return guardado
+
+    def _guardar_grupo(self, institucion, eventos, reintentar):
+        filas = [{clave: valor for clave, valor in e.items() if clave != 'institucion'} for e in eventos]
+        for fila in filas:
+            if fila['detalle'] is not None:
+                fila['detalle'] = json.dumps(fila['detalle'], ensure_ascii=False, default=str)
+        db = None
+        try:
+            db = self.sesiones(institucion)
+            AuditoriaRepository(db).insertar_lote(filas)
+            return True
+        except InstitucionDesconocida:
+            # La institución ya no está en el catálogo: sus eventos no tienen dónde guardarse
+            self.descartados += len(eventos)
+            logger.error(f"{len(eventos)} eventos de auditoría descartados: la institución '{institucion}' no existe")
+            return True
+        except Exception as e:
+            logger.error(f"Error al guardar {len(eventos)} eventos de auditoría de '{institucion}': {str(e)}")
+            if reintentar:
+                for evento in eventos:
+                    try:
+                        self._cola.put_nowait(evento)
+                    except queue.Full:
+                        self.descartados += 1
+            return False
+        finally:
+            if db is not None:
+                db.close()
+
+    def vaciar(self):
+        """Guarda ahora todo lo pendiente desde el hilo que llama. Retorna cuántos eventos guardó."""
+        guardados = 0
+        while True:
+            eventos = []
+            while len(eventos) < self.lote:
+                try:
+                    eventos.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            if not eventos:
+                return guardados
+            if not self._guardar(eventos, reintentar=False):
+                logger.error(f"Se perdieron {len(eventos)} eventos de auditoría al vaciar la cola")
+                continue
+            guardados += len(eventos)
+
+    def cerrar(self, timeout: float = 5):
+        """Detiene el hilo (esperando el lote en curso) y guarda lo que quede en la cola."""
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            self._detener.set()
+            hilo.join(timeout)
+        guardados = self.vaciar()
+        if guardados:
+            logger.info(f"Auditoría: {guardados} eventos pendientes guardados al cerrar")
+
+
+class AuditoriaService:
+    def __init__(self, db_session):
+        self.repository = AuditoriaRepository(db_session)
+
+    def listar_eventos(self, limite: int, antes_de: int = None, entidad: str = None, entidad_id: int = None,
+                       actor_id: int = None):
+        logger.info(f"Listando eventos de auditoría (antes de {antes_de}, limite {limite})")
+        return self.repository.listar(limite, antes_de, entidad, entidad_id, actor_id)
+
+
+auditoria = RegistroAuditoria()
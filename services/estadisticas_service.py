@@ -0,0 +1,77 @@
+#services/estadisticas_service
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from repositories.estadisticas_repository import EstadisticasRepository
+from config.periodos import PERIODO_ACTIVO
+from sqlalchemy.orm import Session
+from config.instituciones import institucion_actual
+
+# Segundos que se reutiliza el resumen antes de volver a consultar la base de datos
+CACHE_TTL = float(os.getenv("ESTADISTICAS_CACHE_TTL", "30"))
+# Minutos disponibles por salón en una semana (por defecto 6 días x 14 horas)
+MINUTOS_DISPONIBLES_SEMANA = int(os.getenv("ESTADISTICAS_MINUTOS_SEMANA", str(6 * 14 * 60)))
+
+# Institución -> (resumen, instante en que expira)
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class EstadisticasService:
+    def __init__(self, db_session: Session):
+        self.repository = EstadisticasRepository(db_session)
+        logger.info("Servicio de estadísticas inicializado")
+
+    def obtener_resumen(self):
+        """Retorna el resumen del dashboard, usando la caché de la institución mientras no haya expirado."""
+        institucion = institucion_actual()
+        with _cache_lock:
+            datos, expira = _cache.get(institucion, (None, 0.0))
+            if datos is not None and time.monotonic() < expira:
+                logger.info("Resumen de estadísticas servido desde caché")
+                return datos
+        datos = self._calcular_resumen()
+        with _cache_lock:
+            _cache[institucion] = (datos, time.monotonic() + CACHE_TTL)
+        return datos
+
+    def _calcular_resumen(self):
+        logger.info("Calculando resumen de estadísticas en la base de datos")
+        total, asignados = self.repository.totales_horarios()
+        usuarios_por_rol = {rol: cantidad for rol, cantidad in self.repository.usuarios_por_rol()}
+        return {
+            'total_horarios': total,
+            'asignados': asignados,
+            'sin_asignar': total - asignados,
+            'total_usuarios': sum(usuarios_por_rol.values()),
+            'usuarios_por_rol': usuarios_por_rol,
+            'por_dia': [
+                {'dia': dia, 'total': cantidad}
+                for dia, cantidad in self.repository.horarios_por_dia()
+            ],
+            'por_docente': [
+                {'docente': docente, 'total': cantidad}
+                for docente, cantidad in self.repository.horarios_por_docente()
+            ],
+            'por_salon': [
+                {
+                    'salon': salon,
+                    'total': cantidad,
+                    'minutos': int(minutos or 0),
+                    'utilizacion': round(float(minutos or 0) * 100 / MINUTOS_DISPONIBLES_SEMANA, 2)
+                }
+                for salon, cantidad, minutos in self.repository.uso_por_salon()
+            ],
+            'minutos_por_usuario': [
+                {'user_id': user_id, 'email': email, 'total': cantidad, 'minutos': int(minutos or 0)}
+                for user_id, email, cantidad, minutos in self.repository.minutos_por_usuario()
+            ],
+            'periodo': PERIODO_ACTIVO,
+            'generado_en': datetime.utcnow().isoformat() + 'Z'
+        }
+
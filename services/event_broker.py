@@ -0,0 +1,223 @@
+#services/event_broker
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Eventos pendientes por suscriptor antes de marcarlo como desbordado
+MAX_EVENTOS_POR_SUSCRIPTOR = int(os.getenv("EVENTOS_MAX_PENDIENTES", "100"))
+# URL de Redis para repartir eventos entre workers (opcional)
+EVENTOS_REDIS_URL = os.getenv("EVENTOS_REDIS_URL")
+EVENTOS_REDIS_CANAL = os.getenv("EVENTOS_REDIS_CANAL", "horarios:eventos")
+# Espera entre reintentos al perder la conexión con Redis: se duplica hasta el máximo
+REDIS_REINTENTO_MIN = 0.5
+REDIS_REINTENTO_MAX = 30.0
+
+
+class Suscripcion:
+    """
+    Cola de eventos de un cliente conectado. Si el cliente no consume a tiempo
+    se descartan los eventos pendientes y se le pide una resincronización.
+    """
+    def __init__(self, filtro=None, max_pendientes=MAX_EVENTOS_POR_SUSCRIPTOR):
+        self.filtro = filtro
+        self.cola = queue.Queue(maxsize=max_pendientes)
+        self.desbordada = False
+
+    def pedir_resync(self):
+        """Reemplaza los pendientes por un `resync` (se perdieron eventos que no llegaron a la cola)."""
+        with self.cola.mutex:
+            self.cola.queue.clear()
+        try:
+            # En la cola, no solo como marca: despierta al cliente que está esperando
+            self.cola.put_nowait({'tipo': 'resync'})
+        except queue.Full:
+            self.desbordada = True
+
+    def entregar(self, evento):
+        if self.filtro is not None and not self.filtro(evento):
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except queue.Full:
+            self.desbordada = True
+
+    def siguiente(self, timeout=None):
+        """Retorna el siguiente evento, o None si no llegó ninguno en `timeout` segundos."""
+        if self.desbordada:
+            self.desbordada = False
+            with self.cola.mutex:
+                self.cola.queue.clear()
+            return {'tipo': 'resync'}
+        try:
+            return self.cola.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class CanalLocal:
+    """
+    Canal entre workers simulado en memoria: todos los brokers conectados al
+    mismo CanalLocal reciben los mensajes de los demás. Sirve como sustituto
+    local de Redis en pruebas y en despliegues de un solo proceso.
+    """
+    def __init__(self):
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def publicar(self, mensaje: str):
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(mensaje)
+
+    def escuchar(self, callback, al_reconectar=None):
+        with self._lock:
+            self._callbacks.append(callback)
+
+
+class CanalRedis:
+    """Canal entre workers sobre Redis pub/sub (requiere el paquete `redis`)."""
+    def __init__(self, url, nombre=EVENTOS_REDIS_CANAL):
+        import redis
+        self.cliente = redis.Redis.from_url(url)
+        self.nombre = nombre
+
+    def publicar(self, mensaje: str):
+        self.cliente.publish(self.nombre, mensaje)
+
+    def escuchar(self, callback, al_reconectar=None):
+        """
+        Se suscribe al canal (si falla, la excepción llega a crear_broker) y
+        escucha en un hilo. Si se pierde la conexión reintenta con espera
+        creciente y, al reconectar, llama a `al_reconectar`: los mensajes
+        publicados mientras tanto no llegan.
+        """
+        pubsub = self.cliente.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.nombre)
+
+        def bucle():
+            nonlocal pubsub
+            espera = REDIS_REINTENTO_MIN
+            while True:
+                try:
+                    if pubsub is None:
+                        pubsub = self.cliente.pubsub(ignore_subscribe_messages=True)
+                        pubsub.subscribe(self.nombre)
+                        logger.info("Reconectado al canal de eventos de Redis")
+                        espera = REDIS_REINTENTO_MIN
+                        if al_reconectar is not None:
+                            al_reconectar()
+                    for mensaje in pubsub.listen():
+                        try:
+                            callback(mensaje['data'].decode('utf-8'))
+                        except Exception as e:
+                            logger.warning(f"Mensaje inválido en el canal de eventos: {str(e)}")
+                    raise ConnectionError("la suscripción terminó")
+                except Exception as e:
+                    logger.warning(f"Se perdió la conexión con el canal de eventos de Redis ({str(e)}); "
+                                   f"reintentando en {espera:g} s")
+                    try:
+                        if pubsub is not None:
+                            pubsub.close()
+                    except Exception:
+                        pass
+                    pubsub = None
+                    time.sleep(espera)
+                    espera = min(espera * 2, REDIS_REINTENTO_MAX)
+
+        threading.Thread(target=bucle, name='eventos-redis', daemon=True).start()
+
+
+class EventBroker:
+    """
+    Reparte los eventos de cambios de horarios a los suscriptores del proceso
+    y, si hay un canal configurado, a los brokers de los demás workers.
+    """
+    def __init__(self, canal=None):
+        self.origen = uuid.uuid4().hex
+        self._suscripciones = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.canal = canal
+        if canal is not None:
+            canal.escuchar(self._recibir_remoto, self.resincronizar)
+
+    def suscribir(self, filtro=None):
+        suscripcion = Suscripcion(filtro)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        logger.info(f"Nueva suscripción a eventos ({len(self._suscripciones)} activas)")
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+        logger.info(f"Suscripción a eventos cancelada ({len(self._suscripciones)} activas)")
+
+    def agregar_listener(self, callback):
+        """Registra una función que recibe todos los eventos (locales y remotos)."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def publicar(self, evento: dict):
+        self._entregar(evento)
+        if self.canal is not None:
+            try:
+                self.canal.publicar(json.dumps({'origen': self.origen, 'evento': evento}))
+            except Exception as e:
+                logger.warning(f"No se pudo publicar el evento en el canal entre workers: {str(e)}")
+
+    def resincronizar(self):
+        """
+        Después de perder eventos del canal: cada suscriptor recibe `resync` y
+        los listeners un evento 'resync' para descartar lo que tengan en caché.
+        """
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+            listeners = list(self._listeners)
+        logger.info(f"Resincronizando {len(suscripciones)} suscripciones tras reconectar el canal de eventos")
+        for suscripcion in suscripciones:
+            suscripcion.pedir_resync()
+        for listener in listeners:
+            try:
+                listener({'tipo': 'resync'})
+            except Exception as e:
+                logger.warning(f"Error en listener de eventos: {str(e)}")
+
+    def _recibir_remoto(self, mensaje: str):
+        datos = json.loads(mensaje)
+        if datos.get('origen') != self.origen:
+            self._entregar(datos['evento'])
+
+    def _entregar(self, evento: dict):
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+            listeners = list(self._listeners)
+        for suscripcion in suscripciones:
+            suscripcion.entregar(evento)
+        for listener in listeners:
+            try:
+                listener(evento)
+            except Exception as e:
+                logger.warning(f"Error en listener de eventos: {str(e)}")
+
+
+def crear_broker():
+    """Crea el broker del proceso, con canal Redis si EVENTOS_REDIS_URL está definido."""
+    if EVENTOS_REDIS_URL:
+        try:
+            nuevo = EventBroker(CanalRedis(EVENTOS_REDIS_URL))
+            logger.info("Canal de eventos entre workers: Redis")
+            return nuevo
+        except Exception as e:
+            logger.warning(f"No se pudo conectar a Redis para eventos, se usarán solo eventos locales: {str(e)}")
+    return EventBroker()
+
+
+broker = crear_broker()
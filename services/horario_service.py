@@ -4,35 +4,128 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from repositories.horario_repository import HorarioRepository
+from config.periodos import PERIODO_ACTIVO
 from models.horario_model import Horario
+from services.event_broker import broker
+from config.instituciones import institucion_actual
 from sqlalchemy.orm import Session
 
+
+# Tipos de evento que HorarioService publica en el broker
+TIPOS_EVENTO = ('creado', 'actualizado', 'eliminado', 'lote_actualizado', 'lote_eliminado')
+
+
+def serializar_horario(h):
+    """Representación JSON de un horario (objeto ORM o fila con las mismas columnas)."""
+    return {
+        'id': h.id,
+        'materia': h.materia,
+        'docente': h.docente,
+        'dia': h.dia,
+        'hora_inicio': str(h.hora_inicio) if h.hora_inicio else None,
+        'hora_fin': str(h.hora_fin) if h.hora_fin else None,
+        'salon': h.salon,
+        'user_id': h.user_id,
+        'version': h.version,
+        'periodo': h.periodo
+    }
+
+
+def publicar_evento(tipo: str, version: int, horario=None, horario_id: int = None, user_ids=None, **extra):
+    """
+    Publica un cambio de horarios en el broker. `user_ids` son los usuarios
+    afectados; None indica que no se conocen (p. ej. reasignaciones o lotes).
+    Los clientes solo ven el periodo activo: un horario de otro periodo se
+    publica como eliminado (si se movió) o no se publica (si se creó). Cada
+    evento lleva su institución: los IDs solo tienen sentido dentro de ella.
+    """
+    if horario is not None and horario.periodo != PERIODO_ACTIVO:
+        if tipo == 'creado':
+            return
+        tipo, horario_id, horario = 'eliminado', horario.id, None
+    evento = {'tipo': tipo, 'version': version, 'user_ids': user_ids, 'institucion': institucion_actual()}
+    if horario is not None:
+        evento['horario'] = serializar_horario(horario)
+        horario_id = horario.id
+    if horario_id is not None:
+        evento['id'] = horario_id
+    evento.update(extra)
+    broker.publicar(evento)
+
 class HorarioService:
     def __init__(self, db_session: Session):
         self.repository = HorarioRepository(db_session)
         logger.info("Servicio de horarios inicializado")
 
-    def listar_horarios(self):
-        logger.info("Listando todos los horarios")
-        return self.repository.get_all_horarios()
+    def listar_horarios(self, periodo: str = PERIODO_ACTIVO):
+        logger.info(f"Listando todos los horarios del periodo {periodo}")
+        return self.repository.get_all_horarios(periodo)
+
+    def obtener_version_actual(self):
+        return self.repository.get_version_actual()
+
+    def obtener_cambios(self, desde_version: int):
+        logger.info(f"Obteniendo cambios desde la versión: {desde_version}")
+        return self.repository.get_cambios_desde(desde_version)
 
     def obtener_horario(self, horario_id: int):
         logger.info(f"Obteniendo horario por ID: {horario_id}")
         return self.repository.get_horario_by_id(horario_id)
 
-    def obtener_horarios_por_usuario(self, user_id: int):
+    def obtener_horarios_por_ids(self, ids: list):
+        logger.info(f"Obteniendo {len(ids)} horarios por ID")
+        return self.repository.get_horarios_by_ids(ids)
+
+    def obtener_horarios_por_usuario(self, user_id: int, periodo: str = PERIODO_ACTIVO):
         logger.info(f"Obteniendo horarios del usuario: {user_id}")
-        return self.repository.get_horarios_by_user(user_id)
+        return self.repository.get_horarios_by_user(user_id, periodo)
+
+    def buscar_horarios(self, texto: str, limite: int = 50, user_id: int = None):
+        logger.info(f"Buscando horarios: {texto}")
+        return self.repository.buscar_horarios(texto, limite, user_id)
 
-    def crear_horario(self, materia: str, docente: str, dia: str, hora_inicio: str, hora_fin: str, salon: str, user_id: int = None):
+    def crear_horario(self, materia: str, docente: str, dia: str, hora_inicio: str, hora_fin: str, salon: str,
+                      user_id: int = None, periodo: str = None):
         logger.info(f"Creando horario para la materia: {materia}")
-        return self.repository.create_horario(materia, docente, dia, hora_inicio, hora_fin, salon, user_id)
+        horario = self.repository.create_horario(materia, docente, dia, hora_inicio, hora_fin, salon, user_id, periodo)
+        publicar_evento('creado', horario.version, horario, user_ids=[horario.user_id] if horario.user_id else [])
+        return horario
 
     def actualizar_horario(self, horario_id: int, materia: str = None, docente: str = None, dia: str = None, 
                            hora_inicio: str = None, hora_fin: str = None, salon: str = None, user_id: int = None):
         logger.info(f"Actualizando horario: {horario_id}")
-        return self.repository.update_horario(horario_id, materia, docente, dia, hora_inicio, hora_fin, salon, user_id)
+        horario = self.repository.update_horario(horario_id, materia, docente, dia, hora_inicio, hora_fin, salon, user_id)
+        if horario:
+            # El dueño anterior no se conoce aquí: se notifica como reasignación posible
+            publicar_evento('actualizado', horario.version, horario, user_ids=None)
+        return horario
+
+    def actualizar_horario_parcial(self, horario_id: int, cambios: dict, owner_id: int = None):
+        logger.info(f"Actualizando parcialmente horario: {horario_id}")
+        horario = self.repository.patch_horario(horario_id, cambios, owner_id)
+        if horario:
+            user_ids = None if 'user_id' in cambios else ([horario.user_id] if horario.user_id else [])
+            publicar_evento('actualizado', horario.version, horario, user_ids=user_ids)
+        return horario
 
     def eliminar_horario(self, horario_id: int):
         logger.info(f"Eliminando horario: {horario_id}")
-        return self.repository.delete_horario(horario_id)
+        horario = self.repository.delete_horario(horario_id)
+        if horario:
+            publicar_evento('eliminado', self.repository.ultima_version, horario_id=horario_id,
+                            user_ids=[horario.user_id] if horario.user_id else [])
+        return horario
+
+    def actualizar_horarios_lote(self, cambios: dict, ids: list = None, filtros: dict = None):
+        logger.info(f"Actualizando horarios por lote: {list(cambios)}")
+        actualizados = self.repository.bulk_update_horarios(cambios, ids, filtros)
+        if actualizados:
+            publicar_evento('lote_actualizado', self.repository.ultima_version, user_ids=None, total=actualizados)
+        return actualizados
+
+    def eliminar_horarios_lote(self, ids: list = None, filtros: dict = None):
+        logger.info("Eliminando horarios por lote")
+        eliminados = self.repository.bulk_delete_horarios(ids, filtros)
+        if eliminados:
+            publicar_evento('lote_eliminado', self.repository.ultima_version, user_ids=None, total=eliminados)
+        return eliminados
@@ -0,0 +1,280 @@
+#services/ical_service
+import os
+import time
+import hashlib
+import secrets
+import logging
+import threading
+import unicodedata
+from datetime import date, datetime, time as hora, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from models.user_model import User
+from repositories.horario_repository import HorarioRepository
+from services.event_broker import broker
+from config.instituciones import institucion_actual, INSTITUCION_POR_DEFECTO
+from config.periodos import PERIODO_INICIO, PERIODO_FIN
+
+# Zona horaria (IANA) de las horas de los horarios; va en el TZID de los eventos
+ICAL_ZONA_HORARIA = os.getenv("ICAL_ZONA_HORARIA", "America/Bogota")
+ZoneInfo(ICAL_ZONA_HORARIA)  # Una zona inexistente falla al arrancar, no en el primer feed
+# Segundos que se recuerda un token inválido o revocado antes de volver a consultarlo
+ICAL_TTL_TOKEN_INVALIDO = float(os.getenv("ICAL_TTL_TOKEN_INVALIDO", "300"))
+# Segundos que se reutilizan un token válido y un feed generado. Acota cuánto
+# tarda otro worker en ver un cambio si no le llega el evento (sin Redis)
+ICAL_TTL_CACHE = float(os.getenv("ICAL_TTL_CACHE", "60"))
+
+DIAS_ICAL = {
+    'lunes': ('MO', 0),
+    'martes': ('TU', 1),
+    'miercoles': ('WE', 2),
+    'jueves': ('TH', 3),
+    'viernes': ('FR', 4),
+    'sabado': ('SA', 5),
+    'domingo': ('SU', 6),
+}
+
+# Cachés del proceso: (institución, hash del token) -> (user_id, vence), y
+# (institución, user_id) -> (feed generado, vence). Invalidar un feed solo lo
+# vence: se conserva para comparar con el siguiente
+_tokens = {}
+_tokens_invalidos = {}
+_feeds = {}
+_lock = threading.Lock()
+# Se incrementa en cada invalidación para no guardar un feed generado con datos viejos
+_generacion = [0]
+MAX_TOKENS_INVALIDOS = 10000
+
+
+class FeedIcal:
+    """Feed generado de un usuario, con sus validadores HTTP."""
+    def __init__(self, contenido: bytes, ultima_modificacion: datetime):
+        """`ultima_modificacion`: cuándo se generó este contenido por primera vez en el proceso."""
+        self.contenido = contenido
+        self.etag = hashlib.sha256(contenido).hexdigest()[:32]
+        self.ultima_modificacion = ultima_modificacion
+
+
+def _hash_token(token: str):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def normalizar_dia(dia: str):
+    sin_tildes = unicodedata.normalize('NFKD', dia or '').encode('ascii', 'ignore').decode('ascii')
+    return sin_tildes.strip().lower()
+
+
+def _desfase(delta: timedelta):
+    """-5 h -> '-0500' (TZOFFSETFROM / TZOFFSETTO)."""
+    segundos = int(delta.total_seconds())
+    signo = '-' if segundos < 0 else '+'
+    horas, resto = divmod(abs(segundos), 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{signo}{horas:02d}{minutos:02d}" + (f"{segundos:02d}" if segundos else '')
+
+
+@lru_cache(maxsize=8)
+def _vtimezone(zona: str, inicio: date, fin: date):
+    """
+    VTIMEZONE de `zona` entre `inicio` y `fin`: la regla vigente al inicio y
+    cada cambio de horario de verano dentro del periodo, buscados cada 15 minutos.
+    """
+    tz = ZoneInfo(zona)
+    momento = datetime.combine(inicio - timedelta(days=1), hora(), tzinfo=timezone.utc)
+    limite = datetime.combine(fin + timedelta(days=2), hora(), tzinfo=timezone.utc)
+    paso = timedelta(minutes=15)
+
+    def componente(local, desde, hasta, nombre, verano):
+        tipo = 'DAYLIGHT' if verano else 'STANDARD'
+        return [f'BEGIN:{tipo}', f"DTSTART:{local.strftime('%Y%m%dT%H%M%S')}",
+                f'TZOFFSETFROM:{_desfase(desde)}', f'TZOFFSETTO:{_desfase(hasta)}',
+                f'TZNAME:{nombre}', f'END:{tipo}']
+
+    actual = momento.astimezone(tz)
+    lineas = ['BEGIN:VTIMEZONE', f'TZID:{zona}']
+    lineas += componente(datetime(1970, 1, 1), actual.utcoffset(), actual.utcoffset(),
+                         actual.tzname(), bool(actual.dst()))
+    while momento < limite:
+        momento += paso
+        siguiente = momento.astimezone(tz)
+        if siguiente.utcoffset() != actual.utcoffset():
+            # El inicio de la regla se expresa en la hora local anterior al cambio
+            lineas += componente((momento + actual.utcoffset()).replace(tzinfo=None), actual.utcoffset(),
+                                 siguiente.utcoffset(), siguiente.tzname(), bool(siguiente.dst()))
+        actual = siguiente
+    return lineas + ['END:VTIMEZONE']
+
+
+def _escapar(texto: str):
+    return (str(texto or '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _plegar(linea: str):
+    """Pliega las líneas a 75 octetos como exige RFC 5545."""
+    datos = linea.encode('utf-8')
+    if len(datos) <= 75:
+        return linea
+    partes, actual = [], b''
+    for caracter in linea:
+        codificado = caracter.encode('utf-8')
+        if len(actual) + len(codificado) > (75 if not partes else 74):
+            partes.append(actual.decode('utf-8'))
+            actual = b''
+        actual += codificado
+    partes.append(actual.decode('utf-8'))
+    return '\r\n '.join(partes)
+
+
+def generar_ical(horarios, nombre_calendario: str, modificado: datetime,
+                 inicio: date = PERIODO_INICIO, fin: date = PERIODO_FIN, zona: str = ICAL_ZONA_HORARIA):
+    """
+    Genera un VCALENDAR con un VEVENT semanal por horario, en la hora local
+    de `zona` y desde la primera semana del periodo hasta su último día.
+    """
+    sello = modificado.strftime('%Y%m%dT%H%M%SZ')
+    # UNTIL va en UTC cuando DTSTART lleva TZID (RFC 5545): el final del último día del periodo
+    hasta = (datetime.combine(fin, hora(23, 59, 59), tzinfo=ZoneInfo(zona))
+             .astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ'))
+    lineas = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//parcial_2_api_jwt//Horarios//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escapar(nombre_calendario)}',
+        f'X-WR-TIMEZONE:{zona}',
+        *_vtimezone(zona, inicio, fin),
+    ]
+    for h in horarios:
+        dia = DIAS_ICAL.get(normalizar_dia(h.dia))
+        if not dia or not h.hora_inicio or not h.hora_fin:
+            logger.warning(f"Horario {h.id} omitido del feed iCal: día u horas no válidos")
+            continue
+        codigo, indice = dia
+        fecha = inicio + timedelta(days=(indice - inicio.weekday()) % 7)
+        if fecha > fin:
+            # Periodo de menos de una semana que no incluye ese día
+            continue
+        lineas += [
+            'BEGIN:VEVENT',
+            f'UID:horario-{h.id}@parcial2-api-jwt',
+            f'DTSTAMP:{sello}',
+            f"DTSTART;TZID={zona}:{fecha.strftime('%Y%m%d')}T{h.hora_inicio.strftime('%H%M%S')}",
+            f"DTEND;TZID={zona}:{fecha.strftime('%Y%m%d')}T{h.hora_fin.strftime('%H%M%S')}",
+            f'RRULE:FREQ=WEEKLY;BYDAY={codigo};UNTIL={hasta}',
+            f'SUMMARY:{_escapar(h.materia)}',
+            f'LOCATION:{_escapar(h.salon)}',
+            f'DESCRIPTION:{_escapar("Docente: " + (h.docente or ""))}',
+            'END:VEVENT',
+        ]
+    lineas.append('END:VCALENDAR')
+    return ('\r\n'.join(_plegar(linea) for linea in lineas) + '\r\n').encode('utf-8')
+
+
+def _invalidar_por_evento(evento: dict):
+    """Listener del broker: descarta los feeds y tokens afectados por un cambio."""
+    institucion = evento.get('institucion', INSTITUCION_POR_DEFECTO)
+    with _lock:
+        _generacion[0] += 1
+        if evento.get('tipo') == 'resync':
+            # Se perdieron eventos del canal entre workers: se vence todo
+            _tokens.clear()
+            for clave in _feeds:
+                _feeds[clave] = (_feeds[clave][0], 0.0)
+            return
+        if evento.get('tipo') == 'ical_token_revocado':
+            user_id = evento.get('user_id')
+            for clave in [clave for clave, (valor, _) in _tokens.items() if clave[0] == institucion and valor == user_id]:
+                del _tokens[clave]
+            return
+        user_ids = evento.get('user_ids', [])
+        claves = ([clave for clave in _feeds if clave[0] == institucion] if user_ids is None
+                  else [(institucion, user_id) for user_id in user_ids if (institucion, user_id) in _feeds])
+        for clave in claves:
+            _feeds[clave] = (_feeds[clave][0], 0.0)
+
+
+broker.agregar_listener(_invalidar_por_evento)
+
+
+class IcalService:
+    def __init__(self, db_session: Session):
+        self.db = db_session
+        self.repository = HorarioRepository(db_session)
+        self.institucion = institucion_actual()
+
+    def generar_token(self, user_id: int):
+        """Crea (o rota) el token del feed. Solo se guarda su hash."""
+        token = secrets.token_urlsafe(32)
+        self.db.execute(update(User).where(User.id == user_id).values(ical_token_hash=_hash_token(token)))
+        self.db.commit()
+        broker.publicar({'tipo': 'ical_token_revocado', 'user_id': user_id, 'institucion': self.institucion})
+        logger.info(f"Token de feed iCal generado para el usuario {user_id}")
+        return token
+
+    def revocar_token(self, user_id: int):
+        self.db.execute(update(User).where(User.id == user_id).values(ical_token_hash=None))
+        self.db.commit()
+        broker.publicar({'tipo': 'ical_token_revocado', 'user_id': user_id, 'institucion': self.institucion})
+        logger.info(f"Token de feed iCal revocado para el usuario {user_id}")
+
+    def _usuario_por_token(self, token: str):
+        clave = (self.institucion, _hash_token(token))
+        with _lock:
+            encontrado = _tokens.get(clave)
+            if encontrado is not None and encontrado[1] > time.monotonic():
+                return encontrado[0]
+            if _tokens_invalidos.get(clave, 0) > time.monotonic():
+                return None
+        user_id = self.db.query(User.id).filter(User.ical_token_hash == clave[1]).scalar()
+        with _lock:
+            if user_id is None:
+                _tokens.pop(clave, None)
+                if len(_tokens_invalidos) >= MAX_TOKENS_INVALIDOS:
+                    _tokens_invalidos.clear()
+                _tokens_invalidos[clave] = time.monotonic() + ICAL_TTL_TOKEN_INVALIDO
+            else:
+                _tokens[clave] = (user_id, time.monotonic() + ICAL_TTL_CACHE)
+        return user_id
+
+    def obtener_feed(self, token: str):
+        """
+        Retorna el FeedIcal del dueño del token, o None si el token no es
+        válido. Last-Modified es cuándo se generó el contenido, no la última
+        modificación de los horarios que siguen en el feed: quitar un horario
+        (borrarlo o reasignarlo) no la haría avanzar y un cliente con solo
+        If-Modified-Since seguiría mostrándolo. Si al regenerar el contenido
+        no cambió, se conserva la anterior.
+        """
+        user_id = self._usuario_por_token(token)
+        if user_id is None:
+            return None
+        clave = (self.institucion, user_id)
+        with _lock:
+            anterior, vence = _feeds.get(clave, (None, 0.0))
+            generacion = _generacion[0]
+        if vence > time.monotonic():
+            return anterior
+        logger.info(f"Generando feed iCal del usuario {user_id}")
+        horarios = self.repository.get_horarios_by_user(user_id)
+        modificaciones = [h.updated_at for h in horarios if h.updated_at]
+        sello = (max(modificaciones) if modificaciones else datetime(2000, 1, 1)).replace(microsecond=0)
+        contenido = generar_ical(horarios, 'Mis horarios', sello)
+        if anterior is not None and anterior.contenido == contenido:
+            feed = anterior
+        else:
+            generado = datetime.utcnow().replace(microsecond=0)
+            if anterior is not None:
+                # Last-Modified tiene resolución de segundos: un cambio en el mismo segundo debe avanzarla igual
+                generado = max(generado, anterior.ultima_modificacion + timedelta(seconds=1))
+            feed = FeedIcal(contenido, generado)
+        with _lock:
+            if _generacion[0] == generacion:
+                _feeds[clave] = (feed, time.monotonic() + ICAL_TTL_CACHE)
+        return feed
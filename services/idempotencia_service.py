@@ -0,0 +1,57 @@
+#services/idempotencia_service
+import os
+import time
+import hashlib
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from sqlalchemy.orm import Session
+from repositories.idempotencia_repository import IdempotenciaRepository
+
+# Segundos que se guarda la respuesta de una clave ya completada
+IDEMPOTENCIA_TTL = float(os.getenv("IDEMPOTENCIA_TTL", "86400"))
+# Segundos que una reserva 'en_proceso' bloquea la clave (cubre workers caídos)
+IDEMPOTENCIA_BLOQUEO = float(os.getenv("IDEMPOTENCIA_BLOQUEO", "60"))
+# Intervalo mínimo entre purgas de claves vencidas
+IDEMPOTENCIA_PURGA = float(os.getenv("IDEMPOTENCIA_PURGA", "3600"))
+
+_ultima_purga = [0.0]
+
+
+def huella_peticion(metodo: str, ruta: str, cuerpo: bytes):
+    """SHA-256 de método, ruta y cuerpo: identifica si un reintento es la misma petición."""
+    digest = hashlib.sha256()
+    for parte in (metodo.encode('utf-8'), ruta.encode('utf-8'), cuerpo or b''):
+        digest.update(parte)
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class IdempotenciaService:
+    def __init__(self, db_session: Session):
+        self.db = db_session
+        self.repository = IdempotenciaRepository(db_session)
+
+    def reservar(self, clave: str, user_id: int, huella: str):
+        """Retorna None si la petición debe ejecutarse, o la clave existente a responder."""
+        self._purgar_si_corresponde()
+        existente = self.repository.reservar(clave, user_id, huella, IDEMPOTENCIA_BLOQUEO)
+        if existente is not None:
+            logger.info(f"Clave de idempotencia repetida ({existente.estado}) para el usuario {user_id}")
+        return existente
+
+    def completar(self, clave: str, user_id: int, status_code: int, respuesta: str):
+        self.repository.completar(clave, user_id, status_code, respuesta, IDEMPOTENCIA_TTL)
+
+    def liberar(self, clave: str, user_id: int):
+        logger.info(f"Liberando clave de idempotencia del usuario {user_id}")
+        self.repository.liberar(clave, user_id)
+
+    def _purgar_si_corresponde(self):
+        if time.monotonic() - _ultima_purga[0] < IDEMPOTENCIA_PURGA:
+            return
+        _ultima_purga[0] = time.monotonic()
+        purgadas = self.repository.purgar_vencidas()
+        if purgadas:
+            logger.info(f"Claves de idempotencia vencidas eliminadas: {purgadas}")
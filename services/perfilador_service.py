@@ -0,0 +1,247 @@
+#services/perfilador_service
+import os
+import io
+import sys
+import time
+import pstats
+import marshal
+import cProfile
+import logging
+import threading
+from collections import Counter
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Límites de una sesión de perfilado
+PERFILADOR_MAX_SEGUNDOS = float(os.getenv("PERFILADOR_MAX_SEGUNDOS", "60"))
+PERFILADOR_MAX_PETICIONES = int(os.getenv("PERFILADOR_MAX_PETICIONES", "100"))
+# Milisegundos entre muestras del muestreador de pilas
+PERFILADOR_INTERVALO_MS = float(os.getenv("PERFILADOR_INTERVALO_MS", "5"))
+# Profundidad máxima de las pilas muestreadas (se conservan los marcos más cercanos a la petición)
+MAX_PROFUNDIDAD = 128
+
+TIPOS = ('cprofile', 'muestreo')
+FORMATOS = {'cprofile': ('pstats', 'prof'), 'muestreo': ('collapsed',)}
+
+
+class SesionPerfilado:
+    """Una sesión: qué peticiones se perfilan, hasta cuándo y lo acumulado."""
+    def __init__(self, tipo: str, regla=None, metodo: str = None, peticiones: int = None,
+                 segundos: float = None, intervalo_ms: float = PERFILADOR_INTERVALO_MS):
+        self.tipo = tipo
+        self.regla = regla
+        self.metodo = metodo
+        self.peticiones = peticiones
+        self.segundos = segundos
+        self.intervalo = intervalo_ms / 1000
+        self.inicio = time.time()
+        self.plazo = time.monotonic() + segundos
+        self.fin = None
+        self.motivo_fin = None
+        self.perfiladas = 0
+        self.omitidas = 0
+        self.muestras = 0
+        self.stats = None
+        self.pilas = Counter()
+        self.terminada = threading.Event()
+
+    def resumen(self):
+        return {
+            'tipo': self.tipo,
+            'ruta': self.regla.rule if self.regla is not None else None,
+            'metodo': self.metodo,
+            'peticiones': self.peticiones,
+            'segundos': self.segundos,
+            'intervalo_ms': round(self.intervalo * 1000, 2) if self.tipo == 'muestreo' else None,
+            'inicio': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(self.inicio)),
+            'fin': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(self.fin)) if self.fin else None,
+            'motivo_fin': self.motivo_fin,
+            'perfiladas': self.perfiladas,
+            'omitidas': self.omitidas,
+            'muestras': self.muestras if self.tipo == 'muestreo' else None,
+            'pid': os.getpid(),
+        }
+
+
+class Perfilador:
+    """
+    Perfilado bajo demanda de las peticiones de la app Flask. Mientras no hay
+    una sesión activa, `app.wsgi_app` es el original: no se agrega ni una
+    llamada por petición. Al iniciar una sesión se envuelve `app.wsgi_app` y
+    al terminar se restaura.
+
+    - 'cprofile': cProfile en cada petición que coincide; resultado en texto
+      de pstats o en el binario .prof (snakeviz, pstats.Stats). Se perfila
+      una petición a la vez: las simultáneas pasan sin perfilar (`omitidas`).
+    - 'muestreo': un hilo toma la pila de los hilos que atienden peticiones
+      cada `intervalo_ms`; resultado en pilas colapsadas (flamegraph.pl,
+      speedscope). El costo no depende de cuánto código ejecute la petición.
+
+    El estado es del proceso: con varios workers de gunicorn solo se perfila
+    el worker que recibió la petición que inició la sesión.
+    """
+    def __init__(self):
+        self.app = None
+        self.excluir = ()
+        self.sesion = None
+        self.ultima = None
+        self._wsgi_original = None
+        self._lock = threading.Lock()
+        self._un_cprofile = threading.Lock()
+        self._en_peticion = set()
+
+    def init_app(self, app, excluir=()):
+        """`excluir`: prefijos de rutas que nunca se perfilan (las del propio perfilador)."""
+        self.app = app
+        self.excluir = tuple(excluir)
+
+    @property
+    def activo(self):
+        return self.sesion is not None
+
+    def buscar_regla(self, ruta: str):
+        """Regla de la app por su patrón ('/api/horarios/<int:horario_id>') o endpoint. None si no existe."""
+        for regla in self.app.url_map.iter_rules():
+            if ruta in (regla.rule, regla.endpoint):
+                return regla
+        return None
+
+    def iniciar(self, sesion: SesionPerfilado):
+        """Arma la sesión y envuelve la app. Retorna False si ya hay una activa."""
+        with self._lock:
+            if self.sesion is not None:
+                return False
+            self.sesion = sesion
+            self._en_peticion.clear()
+            self._wsgi_original = self.app.wsgi_app
+            self.app.wsgi_app = self._wsgi_perfilado
+            threading.Thread(target=self._vigilar, args=(sesion,), name='perfilador', daemon=True).start()
+        logger.info(f"Perfilado iniciado: {sesion.resumen()}")
+        return True
+
+    def detener(self, motivo: str = 'cancelada', sesion: SesionPerfilado = None):
+        """
+        Restaura la app y guarda la sesión como última. Con `sesion`, solo si
+        sigue siendo la activa. Retorna la sesión terminada (o None).
+        """
+        with self._lock:
+            if self.sesion is None or (sesion is not None and self.sesion is not sesion):
+                return None
+            sesion = self.sesion
+            self.app.wsgi_app = self._wsgi_original
+            self.sesion = None
+            sesion.fin = time.time()
+            sesion.motivo_fin = motivo
+            self.ultima = sesion
+            sesion.terminada.set()
+        logger.info(f"Perfilado terminado ({motivo}): {sesion.perfiladas} peticiones, {sesion.muestras} muestras")
+        return sesion
+
+    # -----------------------------------------------------------------
+    # Solo se ejecuta con una sesión activa
+    # -----------------------------------------------------------------
+    def _coincide(self, sesion, environ):
+        if environ.get('PATH_INFO', '').startswith(self.excluir):
+            return False
+        if sesion.metodo and environ.get('REQUEST_METHOD') != sesion.metodo:
+            return False
+        if sesion.regla is None:
+            return True
+        try:
+            regla, _ = self.app.url_map.bind_to_environ(environ).match(return_rule=True)
+        except (HTTPException, RequestRedirect):
+            return False
+        return regla is sesion.regla
+
+    def _wsgi_perfilado(self, environ, start_response):
+        sesion = self.sesion
+        if sesion is None or not self._coincide(sesion, environ):
+            return self._wsgi_original(environ, start_response)
+        if sesion.tipo == 'cprofile':
+            return self._con_cprofile(sesion, environ, start_response)
+        ident = threading.get_ident()
+        self._en_peticion.add(ident)
+        try:
+            return self._wsgi_original(environ, start_response)
+        finally:
+            self._en_peticion.discard(ident)
+            self._contar(sesion)
+
+    def _con_cprofile(self, sesion, environ, start_response):
+        # Un solo cProfile a la vez (desde Python 3.12 el profiler es global al proceso)
+        if not self._un_cprofile.acquire(blocking=False):
+            sesion.omitidas += 1
+            return self._wsgi_original(environ, start_response)
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+            try:
+                return self._wsgi_original(environ, start_response)
+            finally:
+                perfil.disable()
+                if sesion.stats is None:
+                    sesion.stats = pstats.Stats(perfil)
+                else:
+                    sesion.stats.add(perfil)
+        finally:
+            self._un_cprofile.release()
+            self._contar(sesion)
+
+    def _contar(self, sesion):
+        sesion.perfiladas += 1
+        if sesion.peticiones and sesion.perfiladas >= sesion.peticiones:
+            self.detener('peticiones', sesion)
+
+    def _vigilar(self, sesion):
+        """Hilo de la sesión: toma las muestras (si corresponde) y la cierra al vencer el plazo."""
+        esperar = sesion.intervalo if sesion.tipo == 'muestreo' else sesion.segundos
+        while not sesion.terminada.wait(min(esperar, max(0, sesion.plazo - time.monotonic()))):
+            if time.monotonic() >= sesion.plazo:
+                self.detener('segundos', sesion)
+                return
+            if sesion.tipo == 'muestreo':
+                self._muestrear(sesion)
+
+    def _muestrear(self, sesion):
+        marcos = sys._current_frames()
+        for ident in list(self._en_peticion):
+            marco = marcos.get(ident)
+            if marco is None:
+                continue
+            pila = []
+            while marco is not None and len(pila) < MAX_PROFUNDIDAD:
+                # Lo que está por encima de la app (servidor WSGI) no aporta
+                if marco.f_code is Perfilador._wsgi_perfilado.__code__:
+                    break
+                codigo = marco.f_code
+                pila.append(f"{marco.f_globals.get('__name__', '?')}:{getattr(codigo, 'co_qualname', codigo.co_name)}")
+                marco = marco.f_back
+            sesion.pilas[';'.join(reversed(pila))] += 1
+            sesion.muestras += 1
+
+    # -----------------------------------------------------------------
+    # Resultados
+    # -----------------------------------------------------------------
+    @staticmethod
+    def collapsed(sesion):
+        """Una línea por pila: `marco;marco;... cantidad`, de la más frecuente a la menos."""
+        return ''.join(f"{pila} {total}\n" for pila, total in sesion.pilas.most_common())
+
+    @staticmethod
+    def texto_pstats(sesion, orden: str = 'cumulative', limite: int = 50):
+        salida = io.StringIO()
+        if sesion.stats is None:
+            return 'Sin peticiones perfiladas\n'
+        sesion.stats.stream = salida
+        sesion.stats.sort_stats(orden).print_stats(limite)
+        return salida.getvalue()
+
+    @staticmethod
+    def binario_prof(sesion):
+        """El mismo formato que pstats.Stats.dump_stats (se abre con pstats.Stats(archivo) o snakeviz)."""
+        return marshal.dumps(sesion.stats.stats if sesion.stats is not None else {})
+
+
+perfilador = Perfilador()
@@ -0,0 +1,335 @@
+#services/snapshot_service
+import os
+import time
+import logging
+import threading
+from datetime import time as hora
+import numpy as np
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.horario_model import Horario
+from config.periodos import PERIODO_ACTIVO
+from repositories.horario_repository import HorarioRepository
+from services.event_broker import broker
+from services.ical_service import DIAS_ICAL, normalizar_dia
+from config.instituciones import INSTITUCION_POR_DEFECTO
+
+# Segundos máximos sin sincronizar con la base de datos (cubre cambios de otros workers)
+SNAPSHOT_MAX_EDAD = float(os.getenv("SNAPSHOT_MAX_EDAD", "5"))
+# Franja del día en la que se buscan huecos libres (minutos desde medianoche)
+JORNADA_INICIO = int(os.getenv("JORNADA_INICIO_MIN", str(7 * 60)))
+JORNADA_FIN = int(os.getenv("JORNADA_FIN_MIN", str(22 * 60)))
+
+NOMBRES_DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+SIN_VALOR = -1
+
+# Columnas del snapshot: (nombre, dtype)
+COLUMNAS = (
+    ('id', np.int64),
+    ('version', np.int64),
+    ('user_id', np.int32),
+    ('dia', np.int8),
+    ('inicio', np.int16),
+    ('fin', np.int16),
+    ('materia', np.int32),
+    ('docente', np.int32),
+    ('salon', np.int32),
+    ('vivo', np.bool_),
+)
+
+
+def indice_dia(dia: str):
+    """Lunes=0 ... Domingo=6, o -1 si el día no es reconocible."""
+    encontrado = DIAS_ICAL.get(normalizar_dia(dia))
+    return encontrado[1] if encontrado else SIN_VALOR
+
+
+def a_minutos(valor):
+    """Convierte un datetime.time o 'HH:MM[:SS]' a minutos desde medianoche."""
+    if valor is None:
+        return 0
+    if isinstance(valor, hora):
+        return valor.hour * 60 + valor.minute
+    partes = str(valor).split(':')
+    return int(partes[0]) * 60 + int(partes[1])
+
+
+def a_texto_hora(minutos: int):
+    return f"{int(minutos) // 60:02d}:{int(minutos) % 60:02d}"
+
+
+class Diccionario:
+    """Interna cadenas repetidas (materia, docente, salón) como códigos enteros."""
+    def __init__(self):
+        self.codigos = {}
+        self.valores = []
+
+    def codigo(self, valor):
+        if valor is None:
+            return SIN_VALOR
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            self.codigos[valor] = codigo
+            self.valores.append(valor)
+        return codigo
+
+    def buscar(self, valor):
+        return self.codigos.get(valor, SIN_VALOR)
+
+    def valor(self, codigo):
+        return None if codigo == SIN_VALOR else self.valores[codigo]
+
+
+class HorarioSnapshot:
+    """
+    Copia de solo lectura de la tabla de horarios en columnas numpy.
+    Se construye con una consulta masiva y se actualiza incrementalmente con
+    los eventos de HorarioService y con el feed de cambios por versión.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.cargado = False
+        self._reiniciar(0)
+
+    def _reiniciar(self, capacidad: int):
+        self.columnas = {nombre: np.zeros(capacidad, dtype=tipo) for nombre, tipo in COLUMNAS}
+        self.filas = 0
+        self.fila_por_id = {}
+        self.textos = {'materia': Diccionario(), 'docente': Diccionario(), 'salon': Diccionario()}
+        self.version = 0
+        self.sincronizado_en = 0.0
+        self.pendiente = False
+
+    # -----------------------------------------------------------------
+    # Construcción y actualización
+    # -----------------------------------------------------------------
+    def cargar(self, db: Session):
+        """Reconstruye el snapshot del periodo activo con una sola consulta (sin hidratar objetos ORM)."""
+        repository = HorarioRepository(db)
+        version = repository.get_version_actual()
+        filas = db.execute(select(
+            Horario.id, Horario.version, Horario.user_id, Horario.dia, Horario.hora_inicio,
+            Horario.hora_fin, Horario.materia, Horario.docente, Horario.salon
+        ).where(Horario.periodo == PERIODO_ACTIVO)).all()
+        with self._lock:
+            self._reiniciar(max(len(filas), 16))
+            for fila in filas:
+                self._upsert(*fila)
+            self.version = version
+            self.sincronizado_en = time.monotonic()
+            self.cargado = True
+        logger.info(f"Snapshot de horarios cargado: {len(filas)} filas, {self.bytes_por_fila():.1f} bytes/fila")
+
+    def sincronizar(self, db: Session):
+        """Aplica los cambios desde la última versión usando el feed de cambios."""
+        cambios, eliminados = HorarioRepository(db).get_cambios_desde(self.version)
+        with self._lock:
+            version = self.version
+            for h, _ in cambios:
+                self._upsert(h.id, h.version, h.user_id, h.dia, h.hora_inicio, h.hora_fin, h.materia, h.docente, h.salon)
+                version = max(version, h.version)
+            for e in eliminados:
+                self._eliminar(e.horario_id, e.version)
+                version = max(version, e.version)
+            self.version = version
+            self.sincronizado_en = time.monotonic()
+            self.pendiente = False
+
+    def asegurar_actualizado(self, db: Session):
+        if not self.cargado:
+            self.cargar(db)
+        elif self.pendiente or time.monotonic() - self.sincronizado_en > SNAPSHOT_MAX_EDAD:
+            self.sincronizar(db)
+
+    def aplicar_evento(self, evento: dict):
+        """Listener del broker: aplica en memoria los eventos que traen la fila."""
+        if not self.cargado:
+            return
+        with self._lock:
+            if evento.get('tipo') in ('creado', 'actualizado') and evento.get('horario'):
+                h = evento['horario']
+                self._upsert(h['id'], h['version'], h['user_id'], h['dia'], h['hora_inicio'],
+                             h['hora_fin'], h['materia'], h['docente'], h['salon'])
+            elif evento.get('tipo') == 'eliminado':
+                self._eliminar(evento['id'], evento['version'])
+            elif evento.get('tipo') in ('lote_actualizado', 'lote_eliminado'):
+                # Los lotes no traen las filas: se aplican desde el feed en la próxima consulta
+                self.pendiente = True
+
+    def _crecer(self):
+        capacidad = max(16, len(self.columnas['id']) * 2)
+        for nombre, columna in self.columnas.items():
+            nueva = np.zeros(capacidad, dtype=columna.dtype)
+            nueva[:self.filas] = columna[:self.filas]
+            self.columnas[nombre] = nueva
+
+    def _upsert(self, horario_id, version, user_id, dia, hora_inicio, hora_fin, materia, docente, salon):
+        fila = self.fila_por_id.get(horario_id)
+        if fila is None:
+            if self.filas == len(self.columnas['id']):
+                self._crecer()
+            fila = self.filas
+            self.filas += 1
+            self.fila_por_id[horario_id] = fila
+        elif self.columnas['version'][fila] > (version or 0):
+            return  # Evento atrasado: ya se aplicó una versión más nueva
+        c = self.columnas
+        c['id'][fila] = horario_id
+        c['version'][fila] = version or 0
+        c['user_id'][fila] = SIN_VALOR if user_id is None else user_id
+        c['dia'][fila] = indice_dia(dia)
+        c['inicio'][fila] = a_minutos(hora_inicio)
+        c['fin'][fila] = a_minutos(hora_fin)
+        c['materia'][fila] = self.textos['materia'].codigo(materia)
+        c['docente'][fila] = self.textos['docente'].codigo(docente)
+        c['salon'][fila] = self.textos['salon'].codigo(salon)
+        c['vivo'][fila] = True
+
+    def _eliminar(self, horario_id, version):
+        fila = self.fila_por_id.get(horario_id)
+        if fila is not None and self.columnas['version'][fila] <= (version or 0):
+            self.columnas['vivo'][fila] = False
+            self.columnas['version'][fila] = version or 0
+
+    # -----------------------------------------------------------------
+    # Consultas vectorizadas
+    # -----------------------------------------------------------------
+    def _vista(self):
+        """Columnas recortadas a las filas vivas."""
+        n = self.filas
+        vivos = self.columnas['vivo'][:n]
+        return {nombre: columna[:n][vivos] for nombre, columna in self.columnas.items()}
+
+    def bytes_por_fila(self):
+        capacidad = len(self.columnas['id']) or 1
+        return sum(columna.nbytes for columna in self.columnas.values()) / capacidad
+
+    def estado(self):
+        with self._lock:
+            return {
+                'filas': int(self.columnas['vivo'][:self.filas].sum()),
+                'capacidad': len(self.columnas['id']),
+                'bytes_por_fila': round(self.bytes_por_fila(), 1),
+                'bytes_columnas': int(sum(columna.nbytes for columna in self.columnas.values())),
+                'textos_internados': {clave: len(d.valores) for clave, d in self.textos.items()},
+                'version': self.version
+            }
+
+    def ocupacion(self):
+        """Minutos reservados por salón y día, con porcentaje sobre la jornada."""
+        with self._lock:
+            v = self._vista()
+            salones = self.textos['salon']
+            validos = (v['salon'] >= 0) & (v['dia'] >= 0)
+            clave = v['salon'][validos].astype(np.int64) * 7 + v['dia'][validos]
+            minutos = (v['fin'][validos] - v['inicio'][validos]).astype(np.int64)
+            total = np.bincount(clave, weights=minutos, minlength=len(salones.valores) * 7)
+            jornada = JORNADA_FIN - JORNADA_INICIO
+            resultado = []
+            for posicion in np.flatnonzero(total):
+                salon, dia = divmod(int(posicion), 7)
+                resultado.append({
+                    'salon': salones.valor(salon),
+                    'dia': NOMBRES_DIAS[dia],
+                    'minutos': int(total[posicion]),
+                    'ocupacion': round(float(total[posicion]) * 100 / jornada, 2)
+                })
+            return resultado
+
+    def solapamientos(self, por: str = 'salon'):
+        """
+        Horarios que se cruzan con otro del mismo salón/docente/usuario y día.
+        Ordena por (grupo, inicio) y compara cada inicio con el máximo acumulado
+        de los fines anteriores; el desplazamiento por grupo evita mezclar grupos.
+        """
+        with self._lock:
+            v = self._vista()
+            validos = (v[por] >= 0) & (v['dia'] >= 0)
+            grupo = v[por][validos].astype(np.int64) * 7 + v['dia'][validos]
+            inicio, fin, ids = v['inicio'][validos], v['fin'][validos], v['id'][validos]
+            orden = np.lexsort((inicio, grupo))
+            base = grupo[orden] * 2000
+            inicio_abs = base + inicio[orden]
+            fin_abs = base + fin[orden]
+            max_fin_previo = np.concatenate(([-1], np.maximum.accumulate(fin_abs)[:-1])) if len(orden) else fin_abs
+            cruzados = inicio_abs < max_fin_previo
+            # Un horario también está en conflicto si el siguiente de su grupo empieza antes de que termine
+            cruza_siguiente = np.concatenate((inicio_abs[1:] < fin_abs[:-1], [False])) if len(orden) else cruzados
+            filas = orden[cruzados | cruza_siguiente]
+            textos = self.textos.get(por)
+            valores, dias = v[por][validos], v['dia'][validos]
+            return [
+                {
+                    'id': int(ids[fila]),
+                    por: textos.valor(int(valores[fila])) if textos else int(valores[fila]),
+                    'dia': NOMBRES_DIAS[int(dias[fila])],
+                    'hora_inicio': a_texto_hora(inicio[fila]),
+                    'hora_fin': a_texto_hora(fin[fila])
+                }
+                for fila in filas
+            ]
+
+    def salones_libres(self, dia: str, inicio: int, fin: int):
+        """Salones conocidos sin ninguna reserva que se cruce con [inicio, fin) ese día."""
+        with self._lock:
+            v = self._vista()
+            ocupados = (v['dia'] == indice_dia(dia)) & (v['inicio'] < fin) & (v['fin'] > inicio) & (v['salon'] >= 0)
+            conocidos = np.unique(v['salon'][v['salon'] >= 0])
+            libres = np.setdiff1d(conocidos, np.unique(v['salon'][ocupados]))
+            return sorted(self.textos['salon'].valor(int(codigo)) for codigo in libres)
+
+    def huecos(self, salon: str, dia: str):
+        """Intervalos libres de un salón en un día dentro de la jornada."""
+        with self._lock:
+            v = self._vista()
+            codigo = self.textos['salon'].buscar(salon)
+            mascara = (v['salon'] == codigo) & (v['dia'] == indice_dia(dia))
+            orden = np.argsort(v['inicio'][mascara], kind='stable')
+            inicios, fines = v['inicio'][mascara][orden], v['fin'][mascara][orden]
+            # Fin acumulado de las reservas: cada hueco empieza donde termina el bloque anterior
+            fines_acumulados = np.maximum.accumulate(np.concatenate(([JORNADA_INICIO], fines)))
+            desde = fines_acumulados[:-1]
+            hasta = np.concatenate((inicios, [JORNADA_FIN]))
+            desde = np.concatenate((desde, [fines_acumulados[-1]]))
+            libres = hasta > desde
+            return [
+                {'desde': a_texto_hora(max(d, JORNADA_INICIO)), 'hasta': a_texto_hora(min(h, JORNADA_FIN))}
+                for d, h in zip(desde[libres], hasta[libres])
+                if min(h, JORNADA_FIN) > max(d, JORNADA_INICIO)
+            ]
+
+
+class SnapshotsPorInstitucion:
+    """
+    Un HorarioSnapshot por institución (los IDs y los salones de una no se
+    mezclan con los de otra). Cada uno se crea con la primera consulta de
+    analítica de su institución y recibe solo los eventos que le corresponden.
+    """
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def de(self, institucion: str):
+        snapshot = self._snapshots.get(institucion)
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshots.setdefault(institucion, HorarioSnapshot())
+        return snapshot
+
+    def aplicar_evento(self, evento: dict):
+        if evento.get('tipo') == 'resync':
+            # Se perdieron eventos del canal entre workers: cada snapshot se pone al día con el feed
+            for snapshot in list(self._snapshots.values()):
+                snapshot.pendiente = True
+            return
+        snapshot = self._snapshots.get(evento.get('institucion', INSTITUCION_POR_DEFECTO))
+        if snapshot is not None:
+            snapshot.aplicar_evento(evento)
+
+
+snapshots = SnapshotsPorInstitucion()
+broker.agregar_listener(snapshots.aplicar_evento)
@@ -1,10 +1,46 @@
+import os
 import bcrypt
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import update, select
+from sqlalchemy.exc import IntegrityError
 from models.user_model import User
+from models.horario_model import Horario
+from repositories.user_repository import UserRepository
+from repositories.horario_repository import HorarioRepository
+from services.horario_service import publicar_evento
+from config.sobrecarga import verificar_plazo
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Alta masiva: usuarios por INSERT (y por transacción) e hilos que calculan bcrypt.
+# bcrypt libera el GIL mientras calcula, así que los hilos usan todos los núcleos.
+APROVISIONAMIENTO_LOTE = int(os.getenv("APROVISIONAMIENTO_LOTE", "1000"))
+APROVISIONAMIENTO_HILOS = int(os.getenv("APROVISIONAMIENTO_HILOS", str(os.cpu_count() or 1)))
+MAX_LARGO_EMAIL = 100
+
+# Qué pasa con los horarios de un usuario eliminado: 'desasignar' (quedan sin
+# usuario), 'reasignar' (a otro usuario, indicado en cada eliminación) o 'eliminar'
+POLITICAS_HORARIOS = ('desasignar', 'reasignar', 'eliminar')
+POLITICA_HORARIOS = os.getenv("USUARIO_ELIMINADO_HORARIOS", "desasignar")
+
+
+def hashear_password(password: str):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _en_bloques(filas, tamano):
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) == tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
 class UserService:
     def __init__(self, db):
         self.db = db
@@ -21,7 +57,8 @@ class UserService:
             if existing_admin:
                 raise ValueError("Ya existe un administrador. Solo puede haber uno.")
 
-        # Encriptar contraseña
+        # Encriptar contraseña (bcrypt: no se empieza si el cliente ya no espera)
+        verificar_plazo('hash de la contraseña')
         hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
 
         # Crear usuario
@@ -37,7 +74,8 @@ class UserService:
         if not user:
             return None
 
-        # Verificar contraseña
+        # Verificar contraseña (bcrypt: no se empieza si el cliente ya no espera)
+        verificar_plazo('verificación de la contraseña')
         if bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
             return user
         return None
@@ -47,11 +85,19 @@ class UserService:
         logger.info("Listando todos los usuarios")
         return self.db.query(User).all()
 
+    def contar_admins(self):
+        """Cuenta los administradores con un COUNT en la base de datos"""
+        return self.db.query(User).filter(User.role == 'admin').count()
+
     def obtener_usuario_por_id(self, user_id):
         """Obtiene un usuario por su ID"""
         logger.info(f"Obteniendo usuario por ID: {user_id}")
         return self.db.query(User).filter(User.id == user_id).first()
 
+    def obtener_usuarios_por_ids(self, ids):
+        """Obtiene varios usuarios por ID con una sola consulta"""
+        return UserRepository(self.db).get_users_by_ids(ids)
+
     def actualizar_usuario(self, user_id, email=None, password=None, role=None):
         """Actualiza un usuario existente"""
         user = self.db.query(User).filter(User.id == user_id).first()
@@ -86,15 +132,154 @@ class UserService:
         logger.info(f"Usuario actualizado correctamente: {user_id}")
         return user
 
-    def eliminar_usuario(self, user_id):
-        """Elimina un usuario"""
+    def actualizar_usuario_parcial(self, user_id, cambios):
+        """
+        Actualiza solo los campos presentes en `cambios` con un único
+        UPDATE ... RETURNING (o UPDATE + SELECT en motores sin RETURNING).
+        La unicidad del email la garantiza el índice único de la tabla.
+        """
+        valores = dict(cambios)
+        if valores.get('role') == 'admin':
+            existing_admin = self.db.query(User.id).filter(User.role == 'admin', User.id != user_id).first()
+            if existing_admin:
+                raise ValueError("Ya existe un administrador. Solo puede haber uno.")
+        if 'password' in valores:
+            valores['password'] = bcrypt.hashpw(valores['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+        sentencia = (update(User).where(User.id == user_id).values(**valores)
+                     .execution_options(synchronize_session=False))
+        columnas = (User.id, User.email, User.role)
+        logger.info(f"Actualización parcial del usuario {user_id}: {list(cambios)}")
+        try:
+            if self.db.get_bind().dialect.update_returning:
+                fila = self.db.execute(sentencia.returning(*columnas)).first()
+            else:
+                resultado = self.db.execute(sentencia)
+                fila = None
+                if resultado.rowcount:
+                    fila = self.db.execute(select(*columnas).where(User.id == user_id)).first()
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError("El email ya está en uso por otro usuario")
+        if fila is None:
+            logger.warning(f"Usuario no encontrado para actualizar parcialmente: {user_id}")
+        return fila
+
+    def crear_usuarios_lote(self, usuarios, lote: int = APROVISIONAMIENTO_LOTE, hilos: int = APROVISIONAMIENTO_HILOS):
+        """
+        Alta masiva de usuarios normales (nunca administradores). Los emails
+        se comparan con la base en una consulta por conjunto, los hashes se
+        calculan en paralelo y se insertan `lote` usuarios por transacción
+        mientras se siguen calculando los siguientes.
+
+        Retorna un dict con `creados` (filas id, email, role), `duplicados`
+        (ya registrados), `repetidos` (más de una vez en la lista) e
+        `invalidos` ({'indice', 'error'}).
+        """
+        validos, repetidos, invalidos, vistos = [], [], [], set()
+        for indice, datos in enumerate(usuarios):
+            try:
+                email, password = self._validar_alta(datos)
+            except ValueError as e:
+                invalidos.append({'indice': indice, 'error': str(e)})
+                continue
+            if email in vistos:
+                repetidos.append(email)
+                continue
+            vistos.add(email)
+            validos.append((email, password))
+
+        repository = UserRepository(self.db)
+        existentes = repository.get_emails_existentes([email for email, _ in validos])
+        pendientes = [(email, password) for email, password in validos if email not in existentes]
+        logger.info(f"Alta masiva: {len(pendientes)} usuarios nuevos, {len(existentes)} ya registrados, "
+                    f"{len(repetidos)} repetidos, {len(invalidos)} inválidos ({hilos} hilos)")
+
+        creados = []
+        pool = ThreadPoolExecutor(max_workers=max(1, hilos), thread_name_prefix='bcrypt')
+        try:
+            hashes = pool.map(hashear_password, [password for _, password in pendientes])
+            filas = ({'email': email, 'password': hashed, 'role': 'user'} for (email, _), hashed in zip(pendientes, hashes))
+            for bloque in _en_bloques(filas, lote):
+                creados.extend(self._insertar_bloque(repository, bloque, existentes))
+        finally:
+            # Si un bloque falla, no se siguen calculando hashes que nadie va a usar
+            pool.shutdown(cancel_futures=True)
+
+        return {
+            'creados': creados,
+            'duplicados': [email for email, _ in validos if email in existentes],
+            'repetidos': repetidos,
+            'invalidos': invalidos,
+        }
+
+    @staticmethod
+    def _validar_alta(datos):
+        if not isinstance(datos, dict):
+            raise ValueError("Cada usuario debe ser un objeto con 'email' y 'password'")
+        email = str(datos.get('email') or '').strip()
+        password = datos.get('password')
+        if not email or '@' not in email or len(email) > MAX_LARGO_EMAIL:
+            raise ValueError(f"Email inválido (máximo {MAX_LARGO_EMAIL} caracteres)")
+        if not isinstance(password, str) or not password:
+            raise ValueError("La contraseña es obligatoria")
+        if datos.get('role', 'user') != 'user':
+            raise ValueError("El alta masiva solo crea usuarios con rol 'user'")
+        return email, password
+
+    def _insertar_bloque(self, repository, bloque, existentes):
+        """
+        Inserta un bloque en su propia transacción. Si otro proceso registró
+        alguno de los emails después de la verificación, se quitan y se
+        reintenta una vez.
+        """
+        try:
+            return repository.insert_users_lote(bloque)
+        except IntegrityError:
+            self.db.rollback()
+            nuevos = repository.get_emails_existentes([fila['email'] for fila in bloque])
+            logger.warning(f"Alta masiva: {len(nuevos)} emails registrados durante la carga, se reintenta el bloque")
+            existentes.update(nuevos)
+            restantes = [fila for fila in bloque if fila['email'] not in nuevos]
+            return repository.insert_users_lote(restantes) if restantes else []
+
+    def eliminar_usuario(self, user_id, politica: str = None, reasignar_a: int = None):
+        """
+        Elimina un usuario y aplica `politica` (por defecto,
+        USUARIO_ELIMINADO_HORARIOS) a todos sus horarios con una sola
+        sentencia, en la misma transacción: nunca quedan horarios apuntando a
+        un usuario que no existe. Retorna (usuario, horarios afectados), o
+        (None, 0) si el usuario no existe. Lanza ValueError si la política o
+        el usuario destino no son válidos.
+        """
+        politica = politica or POLITICA_HORARIOS
+        if politica not in POLITICAS_HORARIOS:
+            raise ValueError(f"La política de horarios debe ser una de: {', '.join(POLITICAS_HORARIOS)}")
+        if politica == 'reasignar' and reasignar_a is None:
+            raise ValueError("Para reasignar los horarios indica 'reasignar_a'")
+        if politica == 'reasignar' and reasignar_a == user_id:
+            raise ValueError("No se pueden reasignar los horarios al mismo usuario que se elimina")
+
         user = self.db.query(User).filter(User.id == user_id).first()
         if not user:
             logger.warning(f"Usuario no encontrado para eliminar: {user_id}")
-            return None
+            return None, 0
+        if politica == 'reasignar' and self.db.get(User, reasignar_a) is None:
+            raise ValueError(f"El usuario destino {reasignar_a} no existe")
 
-        logger.info(f"Eliminando usuario: {user_id}")
-        self.db.delete(user)
-        self.db.commit()
-        logger.info(f"Usuario eliminado correctamente: {user_id}")
-        return user
+        logger.info(f"Eliminando usuario: {user_id} (horarios: {politica})")
+        horarios = HorarioRepository(self.db)
+        try:
+            afectados = horarios.aplicar_politica_usuario(Horario.user_id == user_id, politica, reasignar_a)
+            self.db.delete(user)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error al eliminar el usuario {user_id}: {str(e)}")
+            raise
+        if afectados:
+            publicar_evento('lote_eliminado' if politica == 'eliminar' else 'lote_actualizado',
+                            horarios.ultima_version, user_ids=None, total=afectados)
+        logger.info(f"Usuario eliminado correctamente: {user_id} ({afectados} horarios con '{politica}')")
+        return user, afectados